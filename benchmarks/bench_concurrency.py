@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: post throughput vs CONCURRENCY against a local mock site
+
+Starts a threaded http.server that mimics the post and paginated comment
+endpoints with a fixed per-request latency, then fetches every post (the
+post and both comment pages) the same way main() schedules posts: a
+semaphore limits the posts in flight, HostRateLimiter spaces page visits
+and throttles every request per host like the page route does, and
+OrderedPostLogger buffers each post's log. Prints posts/s and the speedup
+over CONCURRENCY=1, and checks the captured log is in input order.
+
+Usage:
+    python benchmarks/bench_concurrency.py [post_count] [latency_ms] [request_interval_ms]
+"""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from concurrency import HostRateLimiter, OrderedPostLogger
+
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+
+
+def make_handler(latency: float):
+    class MockSiteHandler(BaseHTTPRequestHandler):
+        """每个帖子: 正文接口 + 两页评论接口，每个请求固定延迟"""
+
+        def do_GET(self):
+            time.sleep(latency)
+            parsed = urlparse(self.path)
+            parts = parsed.path.strip('/').split('/')
+            post_id = parts[3]
+            if parts[-1] == 'comments':
+                page = parse_qs(parsed.query).get('page', ['1'])[0]
+                body = {
+                    'items': [{'id': f'{post_id}-{page}-{n}', 'body_html': f'<p>评论 {n}</p>',
+                               'creator': {'name': f'用户{n}'}, 'created_at': '2024-03-01T11:00:00Z'}
+                              for n in range(20)],
+                    'links': {'next': f'{parsed.path}?page=2' if page == '1' else None}
+                }
+            else:
+                body = {'post': {'id': post_id, 'title': f'帖子 {post_id}', 'body_html': '<p>正文</p>',
+                                 'creator': {'name': '作者'}, 'created_at': '2024-03-01T10:00:00Z'}}
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockSiteHandler
+
+
+def fetch_json(url: str):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+async def fetch_post(loop, executor, rate_limiter: HostRateLimiter, site_url: str, post_id: str):
+    """正文接口和所有评论页，每个请求先经过按主机限速（与页面路由相同）"""
+    async def get(url):
+        await rate_limiter.throttle(url)
+        return await loop.run_in_executor(executor, fetch_json, url)
+
+    await get(f"{site_url}/api/v1/posts/{post_id}")
+    next_url = f"{site_url}/api/v1/posts/{post_id}/comments"
+    while next_url:
+        links = (await get(next_url)).get('links') or {}
+        next_url = f"{site_url}{links['next']}" if links.get('next') else None
+
+
+async def run_batch(site_url: str, post_count: int, concurrency: int, request_interval: float):
+    """按 main() 的方式并发抓取所有帖子，返回 (耗时秒, 日志)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    rate_limiter = HostRateLimiter(0, request_interval)
+    post_logger = OrderedPostLogger(start_index=1)
+    output = io.StringIO()
+    loop = asyncio.get_running_loop()
+
+    async def process_one(i, executor):
+        with post_logger.capture(i):
+            async with semaphore:
+                await rate_limiter.wait(site_url)
+                print(f"🚀 开始处理第 {i}/{post_count} 个URL...")
+                await fetch_post(loop, executor, rate_limiter, site_url, str(i))
+
+    with redirect_stdout(output), ThreadPoolExecutor(max_workers=max(CONCURRENCY_LEVELS)) as executor:
+        start = time.perf_counter()
+        with post_logger.install():
+            await asyncio.gather(*(process_one(i, executor) for i in range(1, post_count + 1)))
+        elapsed = time.perf_counter() - start
+    return elapsed, output.getvalue()
+
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    request_interval = (float(sys.argv[3]) if len(sys.argv) > 3 else 0) / 1000
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        site_url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"Posts: {post_count}, 3 requests/post, latency {latency * 1000:.0f} ms, "
+              f"request interval {request_interval * 1000:.0f} ms")
+        baseline = None
+        for concurrency in CONCURRENCY_LEVELS:
+            elapsed, log = asyncio.run(run_batch(site_url, post_count, concurrency, request_interval))
+            starts = [line for line in log.splitlines() if line.startswith('🚀')]
+            assert starts == [f"🚀 开始处理第 {i}/{post_count} 个URL..." for i in range(1, post_count + 1)]
+            throughput = post_count / elapsed
+            baseline = baseline or throughput
+            print(f"concurrency {concurrency}: {elapsed:6.2f} s  {throughput:6.1f} posts/s  "
+                  f"speedup {throughput / baseline:4.2f}x")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CPU time per 1,000 comments for the output stage HTML work
+
+legacy:      BeautifulSoup collects images -> BeautifulSoup rewrites images
+             -> regex preprocessing + markdownify parses again
+single-pass: html_normalizer.normalize_post (one parse per fragment)
+
+Usage:
+    python benchmarks/bench_html_normalize.py [comment_count]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from bs4 import BeautifulSoup
+
+from html_normalizer import find_image_sources, normalize_post
+from image_processor import rewrite_image_sources
+from markdown_renderer import render_obsidian_markdown
+
+
+URL = 'https://onenewbite.com/posts/43168058'
+
+COMMENT_TEMPLATES = [
+    '<p>读到第{n}章，很有启发 <a class="navigate mighty-hashtag" href="/spaces/1/hashtags/reading">#读书</a></p>',
+    '<p>第一段 <b>加粗</b> 和 <i>斜体</i></p><p>第二段 <a href="https://example.com/{n}">链接</a></p>',
+    '<p>配图：</p><p><img src="https://cdn.example.com/images/{n}.png" alt="图{n}"></p>',
+    '<ul><li>要点一</li><li>要点二 <code>code</code></li></ul><blockquote>引用第{n}条</blockquote>',
+]
+
+
+def make_thread(comment_count: int):
+    """生成约 comment_count 条评论（含回复）的合成帖子"""
+    post_content = {
+        'title': '合成基准帖子',
+        'content': '<h2>导读</h2><p>正文 <img src="https://cdn.example.com/cover.png"></p>',
+        'timestamp': '2天前'
+    }
+    comments = []
+    n = 0
+    while n < comment_count:
+        replies = []
+        for _ in range(min(3, comment_count - n - 1)):
+            n += 1
+            replies.append({'author': f'回复者{n}', 'text': COMMENT_TEMPLATES[n % 4].format(n=n),
+                            'timestamp': '1小时前', 'replies': []})
+        n += 1
+        comments.append({'author': f'作者{n}', 'text': COMMENT_TEMPLATES[n % 4].format(n=n),
+                         'timestamp': '3小时前', 'replies': replies})
+    return post_content, comments
+
+
+def make_replacements(post_content, comments):
+    replacements = {'https://cdn.example.com/cover.png': '../attachments/cover_0000.png'}
+
+    def walk(items):
+        for item in items:
+            for src in find_image_sources(item['text']):
+                replacements[src] = f"../attachments/{Path(src).stem}_0000.png"
+            walk(item['replies'])
+
+    walk(comments)
+    return replacements
+
+
+def legacy_collect_sources(html_fragments):
+    """旧流程的图片收集：每个片段用 BeautifulSoup 完整解析一次"""
+    return [[img_tag.get('src') for img_tag in BeautifulSoup(html, 'html.parser').find_all('img') if img_tag.get('src')]
+            for html in html_fragments]
+
+
+def legacy_passes(post_content, comments, url, replacements):
+    """旧流程：图片处理解析两次，Markdown转换再解析一次"""
+    fragments = []  # 旧流程只解析含 <img 的片段
+    processed_content = dict(post_content)
+    if '<img' in processed_content['content']:
+        fragments.append((processed_content, 'content'))
+
+    def copy_tree(items):
+        copied = []
+        for item in items:
+            item = dict(item)
+            if '<img' in item['text']:
+                fragments.append((item, 'text'))
+            item['replies'] = copy_tree(item['replies'])
+            copied.append(item)
+        return copied
+
+    processed_comments = copy_tree(comments)
+    html_fragments = [owner[field] for owner, field in fragments]
+    legacy_collect_sources(html_fragments)
+    for (owner, field), html in zip(fragments, rewrite_image_sources(html_fragments, replacements)):
+        owner[field] = html
+    markdown = render_obsidian_markdown(processed_content, processed_comments, url)
+    return processed_content, processed_comments, markdown
+
+
+def measure(func, *args, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    comment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    post_content, comments = make_thread(comment_count)
+    replacements = make_replacements(post_content, comments)
+
+    legacy_markdown = legacy_passes(post_content, comments, URL, replacements)[2]
+    single_markdown = normalize_post(post_content, comments, URL, replacements)[2]
+    print(f"Markdown identical: {legacy_markdown == single_markdown}")
+
+    legacy_time = measure(legacy_passes, post_content, comments, URL, replacements)
+    single_time = measure(normalize_post, post_content, comments, URL, replacements)
+    scale = 1000 / comment_count
+
+    print(f"Comments:     {comment_count}")
+    print(f"legacy:       {legacy_time * scale * 1000:.1f} ms CPU per 1,000 comments")
+    print(f"single-pass:  {single_time * scale * 1000:.1f} ms CPU per 1,000 comments")
+    print(f"reduction:    {(1 - single_time / legacy_time) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: data.json (json.dumps indent=2) vs data.ndjson (one line per comment)
+
+Measures write time, peak traced memory while writing, and peak memory while
+reading the thread back comment by comment.
+
+Usage:
+    python benchmarks/bench_stream_store.py [comment_count]
+"""
+
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from output_writer import atomic_write_text
+from stream_store import open_thread, orjson, write_thread_ndjson
+
+
+def make_output_data(comment_count: int):
+    comments = []
+    for n in range(0, comment_count, 4):
+        replies = [{'id': str(n + k), 'author': f'回复者{n + k}', 'timestamp': '1小时前',
+                    'text': f'<p>回复 {n + k} ' + '这是一段评论内容。' * 20 + '</p>', 'replies': []}
+                   for k in range(1, 4)]
+        comments.append({'id': str(n), 'author': f'作者{n}', 'timestamp': '3小时前',
+                         'text': f'<p>评论 {n} ' + '这是一段评论内容。' * 20 + '</p>', 'replies': replies})
+    return {
+        'url': 'https://onenewbite.com/posts/1',
+        'scraped_at': '2024-01-01T00:00:00',
+        'post': {'title': '大帖子', 'content': '<p>正文</p>'},
+        'total_comments': len(comments),
+        'comments': comments
+    }
+
+
+def write_json(path, output_data):
+    atomic_write_text(path, json.dumps(output_data, ensure_ascii=False, indent=2))
+
+
+def write_ndjson(path, output_data):
+    header = {key: value for key, value in output_data.items() if key != 'comments'}
+    write_thread_ndjson(path, header, output_data['comments'])
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return sum(1 for _ in data['comments'])
+
+
+def read_ndjson(path):
+    header, comments = open_thread(path)
+    return sum(1 for _ in comments)
+
+
+def measure(func, *args):
+    """返回 (耗时秒, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    comment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    output_data = make_output_data(comment_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / 'data.json'
+        ndjson_path = Path(tmp) / 'data.ndjson'
+
+        print(f"Comments: {comment_count} (encoder: {'orjson' if orjson else 'json'})")
+        for label, func, path in (('write data.json', write_json, json_path),
+                                  ('write data.ndjson', write_ndjson, ndjson_path)):
+            func(path, output_data)  # 预热
+            elapsed, peak = measure(func, path, output_data)
+            print(f"{label:18} {elapsed * 1000:7.1f} ms  peak {peak:6.1f} MB  size {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        for label, func, path in (('read data.json', read_json, json_path),
+                                  ('read data.ndjson', read_ndjson, ndjson_path)):
+            elapsed, peak = measure(func, path)
+            print(f"{label:18} {elapsed * 1000:7.1f} ms  peak {peak:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: markdownify vs the wysiwyg streaming converter on comment-sized fragments
+
+Fragments follow the Mighty editor's markup; one template in ten uses a tag outside
+the supported subset, so the fallback cost is included in the numbers.
+
+Usage:
+    python benchmarks/bench_wysiwyg_markdown.py [fragment_count]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from markdownify import markdownify as md
+
+from wysiwyg_markdown import wysiwyg_to_markdown
+
+
+TEMPLATES = [
+    '<div class="fr-view mighty-wysiwyg-content"><p>读到第{n}章，很有启发 <strong>推荐</strong></p></div>',
+    '<p><a class="mighty-mention" href="https://onenewbite.com/members/{n}">@成员{n}</a>&nbsp;同意<br>补充一点</p>',
+    '<p>第一段 <b>加粗</b> 和 <i>斜体</i></p><p>第二段 <a href="https://example.com/{n}">链接</a></p>',
+    '<p>配图：</p><p><img src="https://cdn.example.com/images/{n}.png" alt="图{n}"></p>',
+    '<ul><li>要点一</li><li>要点二 <em>重点</em></li></ul><p>总结 snake_case_{n}</p>',
+    '<ol><li><p>步骤一</p></li><li><p>步骤二</p></li></ol>',
+    '<p>很长的评论 {n} '
+    + '这是一段比较长的文字，用来模拟真实评论的长度。' * 6 + '</p>',
+    '<p>短评 {n}</p>',
+    '<p><span>表情</span> 👍 <a href="https://example.com">https://example.com</a></p>',
+    '<blockquote>引用第{n}条</blockquote><p>回复内容</p>',
+]
+
+
+def make_fragments(count: int):
+    return [TEMPLATES[n % len(TEMPLATES)].format(n=n) for n in range(count)]
+
+
+def convert_markdownify(fragments):
+    return [md(html, heading_style="ATX", bullets="-") for html in fragments]
+
+
+def convert_wysiwyg(fragments):
+    return [wysiwyg_to_markdown(html) for html in fragments]
+
+
+def measure(func, *args, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    fragments = make_fragments(count)
+    print(f"Output identical: {convert_markdownify(fragments) == convert_wysiwyg(fragments)}")
+
+    markdownify_time = measure(convert_markdownify, fragments)
+    wysiwyg_time = measure(convert_wysiwyg, fragments)
+    scale = 1000 / count
+
+    print(f"Fragments:    {count}")
+    print(f"markdownify:  {markdownify_time * scale * 1000:.1f} ms CPU per 1,000 fragments")
+    print(f"wysiwyg:      {wysiwyg_time * scale * 1000:.1f} ms CPU per 1,000 fragments")
+    print(f"speedup:      {markdownify_time / wysiwyg_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,8 @@
 将现有的Phase 3真实抓取数据转换为Phase 4 Obsidian优化格式
 """
 
-import json
+import argparse
 import sys
-import shutil
 from pathlib import Path
 
 # Add the src directory to the Python path
@@ -19,21 +18,34 @@ from obsidian_helpers import (
     OBSIDIAN_ATTACHMENTS_DIR
 )
 from image_processor import create_markdown_from_html
+from batch_convert import ConversionManifest, converter_version, run_batch
+from file_linking import get_file_linker
+from stream_store import load_thread, thread_file_in
+from wysiwyg_markdown import converter_signature
+import image_processor
+import obsidian_helpers
+import wysiwyg_markdown
 
-def clean_html_to_markdown(html_content):
+# 转换清单：只重新转换 data.json 或转换代码有变化的帖子
+CONVERSION_MANIFEST_FILE = Path('output') / '.obsidian_conversion_manifest.json'
+# 修改输出格式时递增（本文件内容变化也会触发重新转换）
+CONVERTER_REVISION = 1
+
+# 只移除这些标签但保留内容
+CLEAN_HTML_STRIP_TAGS = ('div', 'span')
+
+
+def _clean_html_to_markdown(html_content):
     """
-    将HTML内容转换为干净的Markdown格式
+    clean_html_to_markdown 的实际转换（结果按HTML缓存）
     """
-    if not html_content or not html_content.strip():
-        return ""
-    
-    try:
-        from bs4 import BeautifulSoup
-        from markdownify import markdownify as md
-        
-        # 首先用BeautifulSoup清理无意义的链接
+    from bs4 import BeautifulSoup
+    from wysiwyg_markdown import wysiwyg_to_markdown
+
+    # 只有包含OneNewBite内部链接时才需要用BeautifulSoup清理
+    if 'onenewbite.com' in html_content:
         soup = BeautifulSoup(html_content, 'html.parser')
-        
+
         # 移除OneNewBite内部链接，保留纯文本
         for link in soup.find_all('a'):
             href = link.get('href', '')
@@ -44,32 +56,49 @@ def clean_html_to_markdown(html_content):
                 # 如果是帖子链接，也只保留文本
                 elif '/posts/' in href:
                     link.replace_with(link.get_text())
+        html_content = str(soup)
+
+    # 转换清理后的HTML为Markdown
+    markdown_content = wysiwyg_to_markdown(
+        html_content,
+        strip=CLEAN_HTML_STRIP_TAGS
+    )
+
+    # 清理多余的空行
+    lines = markdown_content.split('\n')
+    cleaned_lines = []
+    prev_empty = False
+
+    for line in lines:
+        line = line.strip()
+        if line == "":
+            if not prev_empty:
+                cleaned_lines.append("")
+            prev_empty = True
+        else:
+            cleaned_lines.append(line)
+            prev_empty = False
+
+    return '\n'.join(cleaned_lines).strip()
+
+
+def clean_html_to_markdown(html_content):
+    """
+    将HTML内容转换为干净的Markdown格式
+    """
+    if not html_content or not html_content.strip():
+        return ""
+    
+    try:
+        from markdown_cache import cached_markdown
+        from wysiwyg_markdown import converter_signature
         
-        # 转换清理后的HTML为Markdown
-        markdown_content = md(
-            str(soup), 
-            heading_style="ATX",  # 使用 # ## ### 格式
-            bullets="-",          # 使用 - 作为列表符号
-            strip=['div', 'span']  # 只移除这些标签但保留内容
+        return cached_markdown(
+            f"clean_html_to_markdown-1|{converter_signature(CLEAN_HTML_STRIP_TAGS)}",
+            html_content,
+            _clean_html_to_markdown
         )
         
-        # 清理多余的空行
-        lines = markdown_content.split('\n')
-        cleaned_lines = []
-        prev_empty = False
-        
-        for line in lines:
-            line = line.strip()
-            if line == "":
-                if not prev_empty:
-                    cleaned_lines.append("")
-                prev_empty = True
-            else:
-                cleaned_lines.append(line)
-                prev_empty = False
-        
-        return '\n'.join(cleaned_lines).strip()
-        
     except ImportError:
         # 如果markdownify不可用，进行简单的HTML清理
         from bs4 import BeautifulSoup
@@ -105,7 +134,7 @@ def clean_html_to_markdown(html_content):
 def convert_images_to_obsidian_paths(html_content, source_images_dir, filename_prefix):
     """
     将HTML中的图片路径转换为Obsidian统一附件格式
-    同时复制图片到统一附件目录
+    同时把图片放到统一附件目录（依次尝试 reflink、硬链接，最后才复制）
     """
     if not html_content:
         return html_content
@@ -129,10 +158,10 @@ def convert_images_to_obsidian_paths(html_content, source_images_dir, filename_p
                 # 确保目标目录存在
                 OBSIDIAN_ATTACHMENTS_DIR.mkdir(parents=True, exist_ok=True)
                 
-                # 复制图片到统一附件目录
+                # 迁移图片到统一附件目录
                 if not target_path.exists():
-                    shutil.copy2(source_path, target_path)
-                    print(f"    📷 复制图片: {source_path.name} -> {target_path.name}")
+                    strategy = get_file_linker().link(source_path, target_path)
+                    print(f"    📷 迁移图片({strategy}): {source_path.name} -> {target_path.name}")
                 
                 # 更新HTML中的路径
                 img_tag['src'] = f"../attachments/{new_filename}"
@@ -140,13 +169,17 @@ def convert_images_to_obsidian_paths(html_content, source_images_dir, filename_p
     return str(soup)
 
 def convert_single_post(data_json_path):
-    """转换单个帖子的数据"""
+    """
+    转换单个帖子的数据（模块顶层函数，可在进程池中执行）
+    
+    Returns:
+        str: 成功时返回生成的Markdown文件路径，失败时返回 None
+    """
     try:
         print(f"\n🔄 处理: {data_json_path}")
         
-        # 读取JSON数据
-        with open(data_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 读取JSON数据（data.json 或 data.ndjson）
+        data = load_thread(data_json_path)
         
         post_data = data.get('post', {})
         comments = data.get('comments', [])
@@ -265,19 +298,27 @@ def convert_single_post(data_json_path):
         
         print(f"    ✅ 已转换: {markdown_file}")
         
-        return True
+        return str(markdown_file)
         
     except Exception as e:
         print(f"    ❌ 转换失败: {e}")
-        return False
+        return None
 
-def main():
-    """主函数：转换所有现有的JSON数据"""
+def main(processes=None, force=False):
+    """
+    主函数：转换所有现有的JSON数据
+    只转换有变化的帖子，多个帖子在进程池中并行转换
+    
+    Args:
+        processes: 进程数，默认使用全部CPU核
+        force: 忽略转换清单，全部重新转换
+    """
     print("🚀 开始将Phase 3真实数据转换为Phase 4 Obsidian格式...\n")
     
-    # 查找所有data.json文件
+    # 查找所有帖子目录中的data.json（或data.ndjson）文件
     output_dir = Path('output')
-    json_files = list(output_dir.glob('*/data.json'))
+    post_folders = [folder for folder in output_dir.iterdir() if folder.is_dir()] if output_dir.is_dir() else []
+    json_files = sorted(filter(None, (thread_file_in(folder) for folder in post_folders)))
     
     if not json_files:
         print("❌ 没有找到任何data.json文件")
@@ -285,10 +326,15 @@ def main():
     
     print(f"📋 找到 {len(json_files)} 个JSON文件待转换")
     
-    # 清理旧的示例文件
+    manifest = ConversionManifest(CONVERSION_MANIFEST_FILE)
+    converted_files = {
+        Path(output).resolve() for entry in manifest.entries.values() for output in entry.get('outputs', [])
+    }
+    
+    # 清理旧的示例文件（保留清单中记录的转换结果）
     if OBSIDIAN_ARTICLES_DIR.exists():
         for file in OBSIDIAN_ARTICLES_DIR.glob('*.md'):
-            if file.stat().st_size < 1000:  # 小文件可能是示例
+            if file.stat().st_size < 1000 and file.resolve() not in converted_files:  # 小文件可能是示例
                 file.unlink()
                 print(f"🗑️  删除旧示例文件: {file.name}")
     
@@ -298,25 +344,29 @@ def main():
                 file.unlink()
                 print(f"🗑️  删除旧示例文件: {file.name}")
     
-    # 转换所有文件
-    successful_count = 0
-    failed_count = 0
-    
-    for json_file in json_files:
-        if convert_single_post(json_file):
-            successful_count += 1
-        else:
-            failed_count += 1
+    # 转换有变化的文件
+    # 转换器版本包含 markdownify/富文本转换器的签名，以及转换代码、frontmatter 模板和图片处理代码本身
+    version = converter_version(
+        f"convert_to_obsidian-{CONVERTER_REVISION}", converter_signature(CLEAN_HTML_STRIP_TAGS),
+        source_files=[Path(__file__), Path(obsidian_helpers.__file__),
+                      Path(wysiwyg_markdown.__file__), Path(image_processor.__file__)]
+    )
+    stats = run_batch(json_files, convert_single_post, manifest, version, processes=processes, force=force)
     
     # 显示最终统计
     print(f"\n🎉 转换完成！")
     print(f"📊 统计信息:")
-    print(f"   ✅ 成功转换: {successful_count} 个")
-    print(f"   ❌ 转换失败: {failed_count} 个")
+    print(f"   ✅ 成功转换: {stats['converted']} 个")
+    print(f"   ⏭️  未变化跳过: {stats['skipped']} 个")
+    print(f"   ❌ 转换失败: {stats['failed']} 个")
     print(f"   📁 Obsidian文章目录: {OBSIDIAN_ARTICLES_DIR}")
     print(f"   🖼️  Obsidian附件目录: {OBSIDIAN_ATTACHMENTS_DIR}")
     
     print(f"\n🎯 现在你可以将 'output/articles' 和 'output/attachments' 复制到Obsidian库中使用！")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="将抓取的data.json转换为Obsidian格式")
+    parser.add_argument('--jobs', '-j', type=int, help='进程数（默认使用全部CPU核）')
+    parser.add_argument('--force', '-f', action='store_true', help='忽略转换清单，重新转换所有帖子')
+    args = parser.parse_args()
+    main(processes=args.jobs, force=args.force)
@@ -0,0 +1,160 @@
+"""
+按内容寻址的附件库
+附件以内容的 SHA-256 命名，相同字节只保存一份，所有笔记引用同一个文件；
+URL -> 哈希 的索引保存在附件目录中，查找已下载的图片只需一次字典查询和一次 stat
+
+索引同时记录每个URL的 ETag、Last-Modified 和上次检查时间：
+新鲜期内直接复用本地文件，过期后发送条件请求，304 时不重新下载
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from output_writer import atomic_write_text
+
+
+INDEX_FILENAME = '.attachment_index.json'
+
+# 文件名中保留的哈希长度（64位十六进制中的前16位，足以避免冲突）
+HASH_NAME_LENGTH = 16
+
+
+class AttachmentStore:
+    """
+    内容寻址附件库
+
+    用法:
+        store = get_attachment_store(OBSIDIAN_ATTACHMENTS_DIR)
+        filename = store.lookup(url)
+        if filename is None or not store.is_fresh(url, ttl):
+            headers = store.conditional_headers(url)
+            ...  # 304 时 store.touch(url)，否则 store.store_bytes(url, data, 'cover.png', etag, last_modified)
+        store.save()
+    """
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+        self.index_path = self.root_dir / INDEX_FILENAME
+        self.urls: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, str] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.urls = data.get('urls', {})
+            self.files = data.get('files', {})
+        except (FileNotFoundError, ValueError, AttributeError):
+            self.urls, self.files = {}, {}
+        # 早期索引只记录了 URL -> 哈希
+        for url, record in list(self.urls.items()):
+            if isinstance(record, str):
+                self.urls[url] = {'hash': record}
+
+    def save(self):
+        """有变化时把索引写回磁盘"""
+        if not self._dirty:
+            return
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.index_path, json.dumps(
+            {'urls': self.urls, 'files': self.files}, ensure_ascii=False, indent=2
+        ))
+        self._dirty = False
+
+    def lookup(self, url: str) -> Optional[str]:
+        """URL已下载且文件仍存在时返回本地文件名"""
+        digest = self.urls.get(url, {}).get('hash')
+        return self.filename_for_hash(digest) if digest else None
+
+    def is_fresh(self, url: str, ttl: float) -> bool:
+        """上次下载或验证距今不超过 ttl 秒时无需请求网络"""
+        checked_at = self.urls.get(url, {}).get('checked_at')
+        return bool(checked_at) and ttl > 0 and time.time() - checked_at < ttl
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """根据上次响应的验证器生成条件请求头"""
+        record = self.urls.get(url, {})
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def touch(self, url: str, etag: str = None, last_modified: str = None):
+        """服务器返回 304 时刷新检查时间（以及新的验证器）"""
+        record = self.urls.get(url)
+        if record is None:
+            return
+        record['checked_at'] = time.time()
+        if etag:
+            record['etag'] = etag
+        if last_modified:
+            record['last_modified'] = last_modified
+        self._dirty = True
+
+    def filename_for_hash(self, digest: str) -> Optional[str]:
+        filename = self.files.get(digest)
+        if filename and (self.root_dir / filename).exists():
+            return filename
+        return None
+
+    def _filename(self, digest: str, suggested_name: str) -> str:
+        stem, ext = os.path.splitext(suggested_name or '')
+        return f"{stem[:60] or 'image'}_{digest[:HASH_NAME_LENGTH]}{ext or '.jpg'}"
+
+    def _register(self, url: str, digest: str, filename: str, etag: str = None, last_modified: str = None):
+        self.urls[url] = {
+            'hash': digest,
+            'etag': etag,
+            'last_modified': last_modified,
+            'checked_at': time.time()
+        }
+        self.files[digest] = filename
+        self._dirty = True
+
+    def store_bytes(self, url: str, data: bytes, suggested_name: str,
+                    etag: str = None, last_modified: str = None) -> str:
+        """保存图片内容并返回文件名；相同内容已存在时直接复用"""
+        digest = hashlib.sha256(data).hexdigest()
+        filename = self.filename_for_hash(digest)
+        if filename is None:
+            filename = self._filename(digest, suggested_name)
+            self.root_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.root_dir / f".{filename}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.root_dir / filename)
+        self._register(url, digest, filename, etag, last_modified)
+        return filename
+
+    def store_file(self, url: str, tmp_path: Path, digest: str, suggested_name: str,
+                   etag: str = None, last_modified: str = None) -> str:
+        """
+        登记一个已经写好并计算过哈希的临时文件（流式下载时使用）
+        相同内容已存在时删除临时文件
+        """
+        filename = self.filename_for_hash(digest)
+        if filename is None:
+            filename = self._filename(digest, suggested_name)
+            os.replace(tmp_path, self.root_dir / filename)
+        else:
+            Path(tmp_path).unlink()
+        self._register(url, digest, filename, etag, last_modified)
+        return filename
+
+
+_stores: Dict[Path, AttachmentStore] = {}
+
+
+def get_attachment_store(root_dir: Path) -> AttachmentStore:
+    """每个附件目录共用一个附件库实例"""
+    key = Path(root_dir).resolve()
+    if key not in _stores:
+        _stores[key] = AttachmentStore(root_dir)
+    return _stores[key]
@@ -0,0 +1,151 @@
+"""
+批量转换
+html_to_markdown 和 convert_to_obsidian 共用：
+- 转换清单记录每个输入JSON的修改时间、大小、内容哈希、转换器版本和输出文件，
+  输入和转换器都没有变化时直接跳过（只做一次 stat，不读文件）
+- 需要转换的文件提交到进程池，按CPU核数并行执行
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from output_writer import atomic_write_text
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def converter_version(*parts: str, source_files: Iterable[Path] = ()) -> str:
+    """
+    由显式版本号和转换代码本身的哈希组成转换器版本
+    修改模板或转换代码后，所有帖子自动重新转换
+    """
+    digest = hashlib.sha256('|'.join(parts).encode('utf-8'))
+    for source_file in source_files:
+        digest.update(Path(source_file).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ConversionManifest:
+    """
+    转换清单：输入文件 -> 修改时间、大小、哈希、转换器版本和输出文件
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def is_current(self, input_path: Path, version: str) -> bool:
+        """输入内容和转换器版本都未变化、且输出文件还在时返回 True"""
+        entry = self.entries.get(str(input_path))
+        if not entry or entry.get('converter') != version:
+            return False
+        if not all(Path(output).exists() for output in entry.get('outputs', [])):
+            return False
+
+        stat = input_path.stat()
+        if entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+            return True
+        # 修改时间变了（复制、touch、重新抓取但内容相同）时再比较内容哈希
+        if entry.get('sha256') != file_digest(input_path):
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        entry['size'] = stat.st_size
+        self._dirty = True
+        return True
+
+    def record(self, input_path: Path, version: str, outputs: List[str]):
+        stat = input_path.stat()
+        self.entries[str(input_path)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': file_digest(input_path),
+            'converter': version,
+            'outputs': [str(output) for output in outputs]
+        }
+        self._dirty = True
+
+    def save(self):
+        if self._dirty:
+            atomic_write_text(self.path, json.dumps(self.entries, ensure_ascii=False, indent=2))
+            self._dirty = False
+
+
+def _as_outputs(result) -> List[str]:
+    if not result:
+        return []
+    if isinstance(result, (str, Path)):
+        return [str(result)]
+    return [str(output) for output in result]
+
+
+def run_batch(input_paths: Iterable[Path], convert_func: Callable[..., Any], manifest: ConversionManifest,
+              version: str, args: Tuple = (), processes: Optional[int] = None,
+              force: bool = False) -> Dict[str, int]:
+    """
+    只转换有变化的输入文件，多个文件时在进程池中并行转换
+
+    Args:
+        input_paths: 输入JSON文件
+        convert_func: 模块顶层函数 convert_func(input_path, *args)，返回输出文件路径（或路径列表），失败时返回假值或抛出异常
+        manifest: 转换清单
+        version: 转换器版本
+        args: 传给 convert_func 的其余参数
+        processes: 进程数，默认使用全部CPU核
+        force: 忽略清单，全部重新转换
+
+    Returns:
+        dict: converted / skipped / failed 数量
+    """
+    input_paths = [Path(path) for path in input_paths]
+    stale = [path for path in input_paths if force or not manifest.is_current(path, version)]
+    stats = {'converted': 0, 'skipped': len(input_paths) - len(stale), 'failed': 0}
+
+    def finish(path: Path, result):
+        outputs = _as_outputs(result)
+        if outputs:
+            manifest.record(path, version, outputs)
+            stats['converted'] += 1
+        else:
+            stats['failed'] += 1
+
+    processes = processes or os.cpu_count() or 1
+    try:
+        if len(stale) <= 1 or processes == 1:
+            # 单个文件不值得启动进程池
+            for path in stale:
+                try:
+                    finish(path, convert_func(path, *args))
+                except Exception as e:
+                    print(f"❌ 转换失败 {path}: {e}")
+                    stats['failed'] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=min(processes, len(stale))) as executor:
+                futures = {executor.submit(convert_func, path, *args): path for path in stale}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        finish(path, future.result())
+                    except Exception as e:
+                        print(f"❌ 转换失败 {path}: {e}")
+                        stats['failed'] += 1
+    finally:
+        manifest.save()
+    return stats
@@ -0,0 +1,108 @@
+"""
+批量展开评论
+每一轮用一个页面内脚本点击所有匹配的 "Previous Comments" 按钮或 "more" 链接，
+然后只等待一次评论区域稳定，展开成本随轮数而不是链接数量增长
+"""
+import re
+from typing import List, Tuple
+
+from dom_stability import wait_for_dom_stable
+
+
+# Playwright 的 :has-text("...") 伪类在 querySelectorAll 中不可用，需要拆成 CSS + 文本过滤
+_HAS_TEXT_PATTERN = re.compile(r':has-text\((["\'])(.*?)\1\)')
+
+_CLICK_ALL_JS = """
+(specs) => {
+    const seen = new Set();
+    let clicked = 0;
+    for (const spec of specs) {
+        let elements;
+        try {
+            elements = document.querySelectorAll(spec.css);
+        } catch (e) {
+            continue;
+        }
+        for (const el of elements) {
+            if (seen.has(el)) {
+                continue;
+            }
+            if (spec.text && !(el.textContent || '').toLowerCase().includes(spec.text)) {
+                continue;
+            }
+            // 只点击可见元素
+            if (el.getClientRects().length === 0) {
+                continue;
+            }
+            // 只记录已点击的元素：被文本过滤掉的元素仍可以由后面的选择器点击
+            seen.add(el);
+            el.click();
+            clicked += 1;
+        }
+    }
+    return clicked;
+}
+"""
+
+
+def split_text_selector(selector: str) -> dict:
+    """
+    把带 :has-text("...") 的 Playwright 选择器拆成纯CSS和文本过滤条件
+
+    例如: 'a.more:has-text("more")' -> {'css': 'a.more', 'text': 'more'}
+    """
+    match = _HAS_TEXT_PATTERN.search(selector)
+    if not match:
+        return {'css': selector, 'text': ''}
+    css = (selector[:match.start()] + selector[match.end():]).strip()
+    return {'css': css or '*', 'text': match.group(2).lower()}
+
+
+async def click_all_in_page(page, selectors: List[str]) -> int:
+    """在一次页面内脚本中点击所有匹配且可见的元素，返回点击数"""
+    specs = [split_text_selector(selector) for selector in selectors]
+    return await page.evaluate(_CLICK_ALL_JS, specs)
+
+
+async def expand_in_rounds(page, config, selectors: List[str], label: str,
+                           max_rounds: int = 10, stop_condition=None) -> Tuple[int, int]:
+    """
+    分轮批量展开：每轮点击所有匹配元素，然后等待一次评论区域稳定
+
+    Args:
+        page: Playwright 页面
+        config: 配置
+        selectors: 按钮/链接选择器列表（支持 :has-text）
+        label: 日志中显示的名称
+        max_rounds: 最大轮数，防止无限循环
+        stop_condition: 可选的异步函数，返回True时提前结束
+
+    Returns:
+        (rounds, clicks): 实际执行的轮数和总点击数
+    """
+    rounds = 0
+    total_clicks = 0
+
+    for _ in range(max_rounds):
+        if stop_condition and await stop_condition():
+            print(f"  {label}: 满足停止条件，提前结束")
+            break
+
+        try:
+            clicked = await click_all_in_page(page, selectors)
+        except Exception as e:
+            print(f"  {label}: 批量点击失败: {e}")
+            break
+
+        if clicked == 0:
+            break
+
+        rounds += 1
+        total_clicks += clicked
+        print(f"  {label}: 第 {rounds} 轮批量点击了 {clicked} 个元素")
+
+        # 每轮只等待一次网络和DOM静默
+        await wait_for_dom_stable(page, config)
+
+    print(f"  {label}: 共 {rounds} 轮，点击 {total_clicks} 次")
+    return rounds, total_clicks
@@ -0,0 +1,322 @@
+"""
+浏览器池管理
+由 main.main() 持有一个长期存活的浏览器和上下文，process_single_url 从中借用页面，
+避免每个URL都重新启动和关闭浏览器
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+from launch_cache import LaunchCache, compute_cache_key, order_attempts
+from login import auto_login, check_login_status
+
+
+# macOS 优化的浏览器启动参数
+CHROMIUM_FULL_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-web-security',
+    '--disable-extensions',
+    '--no-first-run',
+    '--disable-default-apps',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=TranslateUI',
+    '--disable-ipc-flooding-protection',
+    '--enable-features=NetworkService,NetworkServiceInProcess',
+    '--force-color-profile=srgb',
+    '--disable-background-networking',
+    '--disable-client-side-phishing-detection',
+    '--disable-component-update',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--no-default-browser-check',
+    '--no-service-autorun',
+    '--password-store=basic',
+    '--use-mock-keychain'
+]
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def get_browser_attempts(config) -> list:
+    """
+    按优先级返回浏览器启动方案列表
+    """
+    return [
+        # 尝试1: Firefox（通常比 Chromium 更稳定）
+        {
+            'type': 'firefox',
+            'args': [],
+            'headless': config.HEADLESS,
+            'name': 'Firefox'
+        },
+        # 尝试2: Chromium 最小参数
+        {
+            'type': 'chromium',
+            'args': ['--no-sandbox'],
+            'headless': True,
+            'name': 'Chromium (最小参数)'
+        },
+        # 尝试3: Chromium 完整参数
+        {
+            'type': 'chromium',
+            'args': CHROMIUM_FULL_ARGS,
+            'headless': config.HEADLESS,
+            'name': 'Chromium (完整参数)'
+        }
+    ]
+
+
+class BrowserPool:
+    """
+    长期存活的浏览器/上下文池
+
+    - 浏览器只启动一次，崩溃或断开后在下次借用页面时自动重启
+    - 上下文在服务 recycle_after 个帖子后轮换，旧上下文在其页面全部归还后关闭，
+      以限制浏览器进程的内存增长
+    - 每个上下文只做一次登录状态检查
+    """
+
+    def __init__(self, config, recycle_after: int = None):
+        self.config = config
+        self.recycle_after = recycle_after or config.CONTEXT_RECYCLE_POSTS
+        self._playwright = None
+        self._browser = None
+        self._browser_name = None
+        self._context = None
+        self._context_posts = 0
+        self._active_pages = {}  # 上下文 -> 正在使用的页面数
+        self._retired_contexts = set()
+        self._verified_contexts = set()
+        self._lock = asyncio.Lock()
+        self._session_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """启动 Playwright（浏览器在第一次借用页面时才启动）"""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+    async def close(self):
+        """关闭所有上下文、浏览器和 Playwright"""
+        print("🔄 正在关闭浏览器池...")
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+                print("✅ 浏览器已关闭")
+        except Exception as e:
+            print(f"⚠️  关闭浏览器时出错: {e}")
+        finally:
+            self._browser = None
+            self._context = None
+            self._active_pages.clear()
+            self._retired_contexts.clear()
+            self._verified_contexts.clear()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def is_healthy(self) -> bool:
+        """浏览器是否仍然连接可用"""
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _launch_browser(self):
+        """依次尝试各个启动方案，直到有一个成功"""
+        print("🚀 启动浏览器...")
+        # 从上次成功的启动方案开始尝试
+        launch_cache = LaunchCache(self.config.LAUNCH_CACHE_FILE)
+        cache_key = compute_cache_key(self._playwright)
+        preferred_name = launch_cache.get(cache_key).get('last_good_attempt')
+        browser_attempts = order_attempts(get_browser_attempts(self.config), preferred_name)
+        if preferred_name:
+            print(f"⚡ 使用缓存的启动方案: {preferred_name}")
+
+        for i, attempt in enumerate(browser_attempts, 1):
+            try:
+                print(f"🔄 尝试启动 {attempt['name']} (方案 {i}/{len(browser_attempts)})")
+
+                if attempt['type'] == 'firefox':
+                    browser = await self._playwright.firefox.launch(
+                        headless=attempt['headless'],
+                        timeout=60000
+                    )
+                else:  # chromium
+                    browser = await self._playwright.chromium.launch(
+                        headless=attempt['headless'],
+                        args=attempt['args'],
+                        timeout=60000
+                    )
+
+                print(f"✅ {attempt['name']} 启动成功")
+                if attempt['name'] != preferred_name:
+                    launch_cache.update(cache_key, last_good_attempt=attempt['name'])
+                self._browser = browser
+                self._browser_name = attempt['name']
+                self._context = None
+                self._context_posts = 0
+                self._active_pages.clear()
+                self._retired_contexts.clear()
+                self._verified_contexts.clear()
+                return
+
+            except Exception as e:
+                print(f"❌ {attempt['name']} 启动失败: {e}")
+                if i == len(browser_attempts):
+                    raise Exception("所有浏览器启动尝试都失败了")
+                continue
+
+    async def _ensure_browser(self):
+        """健康检查：浏览器崩溃或断开时重新启动"""
+        if self.is_healthy():
+            return
+        if self._browser is not None:
+            print(f"⚠️ 浏览器 {self._browser_name} 已断开，正在重新启动...")
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        await self._launch_browser()
+
+    def _build_context_options(self) -> dict:
+        """构建上下文参数（尝试使用已保存的会话）"""
+        context_options = {
+            'viewport': {'width': 1920, 'height': 1080},
+            'user_agent': USER_AGENT,
+            'ignore_https_errors': True
+        }
+
+        # 先检查会话文件是否有效
+        if self.config.AUTH_FILE.exists():
+            print("📂 找到保存的登录状态，尝试使用...")
+            try:
+                with open(self.config.AUTH_FILE, 'r') as f:
+                    storage_state = json.load(f)
+                context_options['storage_state'] = storage_state
+            except Exception as e:
+                print(f"⚠️  会话文件读取失败，将重新登录: {e}")
+                if self.config.AUTH_FILE.exists():
+                    self.config.AUTH_FILE.unlink()  # 删除损坏的会话文件
+
+        return context_options
+
+    async def _close_context(self, context):
+        """关闭上下文并清理相关状态"""
+        self._active_pages.pop(context, None)
+        self._retired_contexts.discard(context)
+        self._verified_contexts.discard(context)
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"⚠️  关闭浏览器上下文时出错: {e}")
+
+    async def _ensure_context(self):
+        """确保有可用的上下文，达到轮换阈值时创建新的上下文"""
+        if self._context is not None and self._context_posts >= self.recycle_after:
+            old_context = self._context
+            self._context = None
+            print(f"♻️ 上下文已服务 {self._context_posts} 个帖子，轮换新上下文")
+            if self._active_pages.get(old_context, 0) == 0:
+                await self._close_context(old_context)
+            else:
+                # 仍有页面在使用，等其全部归还后再关闭
+                self._retired_contexts.add(old_context)
+
+        if self._context is None:
+            print("🔧 创建浏览器上下文...")
+            self._context = await self._browser.new_context(**self._build_context_options())
+            self._context_posts = 0
+            self._active_pages[self._context] = 0
+            print("✅ 浏览器上下文创建成功")
+
+        return self._context
+
+    async def _new_page(self, context, max_retries: int = 3):
+        """创建新页面（带重试）"""
+        print("📄 创建新页面...")
+        for attempt in range(max_retries):
+            try:
+                page = await context.new_page()
+                print("✅ 页面创建成功")
+                return page
+            except Exception as e:
+                print(f"⚠️ 页面创建失败 (尝试 {attempt + 1}/{max_retries}): {e}")
+                if attempt < max_retries - 1:
+                    print("🔄 等待后重试...")
+                    await asyncio.sleep(2)
+                    # 页面创建失败通常意味着浏览器或上下文已损坏
+                    if not self.is_healthy():
+                        await self._ensure_browser()
+                        context = await self._ensure_context()
+                else:
+                    raise Exception(f"页面创建失败，已重试{max_retries}次: {e}")
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        借用一个页面，使用完毕后自动关闭并归还
+
+        用法:
+            async with pool.page() as page:
+                ...
+        """
+        async with self._lock:
+            await self._ensure_browser()
+            context = await self._ensure_context()
+            page = await self._new_page(context)
+            context = page.context
+            self._active_pages[context] = self._active_pages.get(context, 0) + 1
+            self._context_posts += 1
+
+        # 设置超时
+        page.set_default_timeout(self.config.TIMEOUT)
+
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            async with self._lock:
+                remaining = self._active_pages.get(context, 1) - 1
+                self._active_pages[context] = remaining
+                if remaining <= 0 and context in self._retired_contexts:
+                    await self._close_context(context)
+
+    async def ensure_session(self, page):
+        """
+        确保页面所在上下文处于登录状态
+        同一上下文只检查一次，并发时串行化登录流程
+        """
+        context = page.context
+        if context in self._verified_contexts:
+            return
+
+        async with self._session_lock:
+            if context in self._verified_contexts:
+                return
+
+            # 检查/执行登录
+            login_needed = True
+            if self.config.AUTH_FILE.exists():
+                print("🔍 检查登录状态...")
+                login_needed = not await check_login_status(page, self.config)
+
+            if login_needed:
+                print("🔑 需要重新登录...")
+                login_success = await auto_login(page, self.config)
+                if not login_success:
+                    raise Exception("登录失败")
+            else:
+                print("✅ 已登录状态有效")
+
+            self._verified_contexts.add(context)
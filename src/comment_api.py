@@ -0,0 +1,262 @@
+"""
+评论接口响应捕获
+监听 page.on('response')，记录评论接口返回的JSON，并据此构建评论树。
+接口数据中缺失的字段（以及只存在于页面中的评论）再用DOM提取结果补齐；
+接口数据已完整时不再做DOM提取
+"""
+import asyncio
+import re
+from typing import List, Dict, Any, Optional
+
+from models import iter_comments
+
+
+# 接口数据中可能的字段名（按优先级）
+ID_KEYS = ['id', 'comment_id', 'uuid']
+BODY_KEYS = ['body_html', 'html', 'body', 'content', 'text']
+PARENT_KEYS = ['parent_id', 'parent_comment_id', 'reply_to_id', 'in_reply_to_id']
+AUTHOR_KEYS = ['author', 'creator', 'user', 'member']
+AUTHOR_NAME_KEYS = ['name', 'full_name', 'display_name', 'username']
+TIME_KEYS = ['created_at', 'published_at', 'timestamp', 'time']
+CHILDREN_KEYS = ['replies', 'children', 'comments']
+# 非评论的容器对象（例如响应中附带的帖子本身），遍历时跳过
+SKIP_KEYS = ['post', 'parent_post', 'space', 'network']
+# 接口数据缺失时由DOM补齐的字段
+MERGED_FIELDS = ('text', 'author', 'timestamp')
+# 页面中评论元素 id 的前缀（incremental 中的页面脚本使用相同的规则）
+DOM_ID_PREFIX_RE = re.compile(r'^(?:comment|reply)[-_]', re.IGNORECASE)
+
+
+def normalize_comment_id(raw_id) -> str:
+    """
+    统一接口ID和DOM id 的格式
+    只去掉DOM id 的已知前缀，例如 'comment-12345' 和 12345 都归一为 '12345'，
+    其他ID（UUID等）保持原样，避免不同评论被归为同一个ID
+    """
+    if raw_id is None:
+        return ''
+    return DOM_ID_PREFIX_RE.sub('', str(raw_id).strip())
+
+
+def _first_value(record: dict, keys: List[str]):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _author_name(record: dict) -> str:
+    author = _first_value(record, AUTHOR_KEYS)
+    if isinstance(author, dict):
+        return str(_first_value(author, AUTHOR_NAME_KEYS) or '')
+    return str(author or '')
+
+
+def _parent_id(record: dict) -> str:
+    parent = _first_value(record, PARENT_KEYS)
+    if parent is None and isinstance(record.get('parent'), dict):
+        parent = _first_value(record['parent'], ID_KEYS)
+    return normalize_comment_id(parent) if parent is not None else ''
+
+
+def _looks_like_comment(record: dict) -> bool:
+    return (
+        _first_value(record, ID_KEYS) is not None
+        and isinstance(_first_value(record, BODY_KEYS), str)
+    )
+
+
+def collect_comment_records(payload, parent_id: str = '', records: Optional[list] = None) -> List[Dict[str, Any]]:
+    """
+    递归遍历接口返回的JSON，收集所有看起来像评论的对象
+    嵌套在 replies/children 中的评论继承外层评论作为父级
+    """
+    if records is None:
+        records = []
+
+    if isinstance(payload, list):
+        for item in payload:
+            collect_comment_records(item, parent_id, records)
+        return records
+
+    if not isinstance(payload, dict):
+        return records
+
+    if _looks_like_comment(payload):
+        comment_id = normalize_comment_id(_first_value(payload, ID_KEYS))
+        records.append({
+            'id': comment_id,
+            'parent_id': _parent_id(payload) or parent_id,
+            'html': _first_value(payload, BODY_KEYS),
+            'author': _author_name(payload),
+            'timestamp': str(_first_value(payload, TIME_KEYS) or '')
+        })
+        for key in CHILDREN_KEYS:
+            if isinstance(payload.get(key), list):
+                collect_comment_records(payload[key], comment_id, records)
+        return records
+
+    for key, value in payload.items():
+        if key in SKIP_KEYS:
+            continue
+        if isinstance(value, (dict, list)):
+            collect_comment_records(value, parent_id, records)
+    return records
+
+
+def build_comment_tree_from_payloads(payloads: list, clean_html=None) -> List[Dict[str, Any]]:
+    """
+    由接口JSON构建评论树
+
+    Args:
+        payloads: 捕获到的JSON响应列表
+        clean_html: 可选的评论HTML清理函数
+
+    Returns:
+        List[Dict]: 根评论列表，结构与DOM提取结果一致
+    """
+    records = {}
+    order = []
+    for payload in payloads:
+        for record in collect_comment_records(payload):
+            existing = records.get(record['id'])
+            if existing is None:
+                records[record['id']] = record
+                order.append(record['id'])
+            else:
+                # 后到的响应只补充缺失字段
+                for key, value in record.items():
+                    if value and not existing.get(key):
+                        existing[key] = value
+
+    nodes = {}
+    for comment_id in order:
+        record = records[comment_id]
+        html = record['html'] or ''
+        nodes[comment_id] = {
+            'text': clean_html(html) if clean_html else html,
+            'author': record['author'],
+            'timestamp': record['timestamp'],
+            'replies': [],
+            'id': comment_id,
+            'depth': 0
+        }
+
+    roots = []
+    for comment_id in order:
+        parent_id = records[comment_id]['parent_id']
+        if parent_id and parent_id in nodes and parent_id != comment_id:
+            nodes[parent_id]['replies'].append(nodes[comment_id])
+        else:
+            roots.append(nodes[comment_id])
+
+    # 接口时间戳通常是ISO格式，可直接按字符串排序（旧评论在前）
+    def sort_and_set_depth(comments, depth):
+        if all(comment['timestamp'] for comment in comments):
+            comments.sort(key=lambda comment: comment['timestamp'])
+        for comment in comments:
+            comment['depth'] = depth
+            sort_and_set_depth(comment['replies'], depth + 1)
+
+    sort_and_set_depth(roots, 0)
+    return roots
+
+
+def _index_by_id(comments: list, index: Optional[dict] = None) -> dict:
+    if index is None:
+        index = {}
+    for comment in comments:
+        comment_id = normalize_comment_id(comment.get('id'))
+        if comment_id:
+            index[comment_id] = comment
+        _index_by_id(comment.get('replies', []), index)
+    return index
+
+
+def merge_api_and_dom_comments(api_comments: list, dom_comments: list) -> List[Dict[str, Any]]:
+    """
+    以接口评论树为准，用DOM提取结果补齐缺失字段，
+    并追加只出现在页面中的评论（例如随页面直接渲染、没有经过接口加载的评论）
+    """
+    dom_index = _index_by_id(dom_comments)
+    api_index = _index_by_id(api_comments)
+
+    for comment_id, comment in api_index.items():
+        dom_comment = dom_index.get(comment_id)
+        if not dom_comment:
+            continue
+        for key in MERGED_FIELDS:
+            if not comment.get(key) and dom_comment.get(key):
+                comment[key] = dom_comment[key]
+
+    def append_dom_only(dom_list, target_list, depth):
+        for dom_comment in dom_list:
+            comment_id = normalize_comment_id(dom_comment.get('id'))
+            if comment_id and comment_id in api_index:
+                append_dom_only(dom_comment.get('replies', []), api_index[comment_id]['replies'], depth + 1)
+                continue
+            copied = dict(dom_comment, id=comment_id, depth=depth, replies=[])
+            target_list.append(copied)
+            append_dom_only(dom_comment.get('replies', []), copied['replies'], depth + 1)
+
+    merged = list(api_comments)
+    append_dom_only(dom_comments, merged, 0)
+    return merged
+
+
+def api_capture_is_complete(api_comments: list, expected_count: Optional[int]) -> bool:
+    """
+    接口数据是否已覆盖整个评论区：评论数不少于页面显示的总数，且每条评论的字段都不为空
+    页面没有显示总数时无法判断，返回False（仍需DOM提取补齐）
+    """
+    if not api_comments or not expected_count:
+        return False
+    total = 0
+    for comment in iter_comments(api_comments):
+        if not all(comment.get(key) for key in MERGED_FIELDS):
+            return False
+        total += 1
+    return total >= expected_count
+
+
+class CommentResponseRecorder:
+    """
+    记录页面收到的评论接口JSON响应
+
+    用法:
+        recorder = CommentResponseRecorder(Config.COMMENT_API_PATTERN)
+        recorder.attach(page)          # 在 page.goto 之前
+        ...
+        await recorder.drain()
+        tree = build_comment_tree_from_payloads(recorder.payloads)
+    """
+
+    def __init__(self, url_pattern: str):
+        self.url_pattern = re.compile(url_pattern)
+        self.payloads = []
+        self._pending = set()
+
+    def attach(self, page):
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if not self.url_pattern.search(response.url):
+            return
+        content_type = response.headers.get('content-type', '')
+        if 'json' not in content_type:
+            return
+        task = asyncio.ensure_future(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response):
+        try:
+            self.payloads.append(await response.json())
+        except Exception as e:
+            print(f"    ⚠️ 读取评论接口响应失败: {e}")
+
+    async def drain(self):
+        """等待所有正在读取的响应完成"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
@@ -0,0 +1,135 @@
+"""
+单次往返的评论树提取引擎
+在浏览器内一次 page.evaluate 遍历 #sidebar-comments-region，
+返回完整的嵌套评论树（HTML正文、作者、时间、DOM id、层级），
+取代逐条评论、逐个选择器的 Playwright 往返调用
+"""
+from typing import List, Dict, Any, Optional
+
+
+# 与逐条提取时使用的选择器保持一致
+AUTHOR_SELECTORS = [
+    '.comment-author',
+    '.user-name',
+    '.author-name',
+    '.comment-header .name'
+]
+
+TIME_SELECTORS = [
+    '.timestamp',
+    '.comment-time',
+    '.time-ago',
+    'time'
+]
+
+_EXTRACT_TREE_JS = """
+(opts) => {
+    const region = document.querySelector(opts.container);
+    if (!region) {
+        return null;
+    }
+
+    // 元素所属的最近一层评论 li
+    const ownerLi = (el) => el.parentElement ? el.parentElement.closest('li') : null;
+
+    // 优先取属于当前 li 自身（而非其回复）的元素，找不到时退回到任意后代
+    const firstOwned = (li, selectors) => {
+        for (const selector of selectors) {
+            const matches = li.querySelectorAll(selector);
+            for (const el of matches) {
+                if (el.closest('li') === li) {
+                    return el;
+                }
+            }
+            if (matches.length > 0) {
+                return matches[0];
+            }
+        }
+        return null;
+    };
+
+    const directReplies = (li) => Array.from(li.querySelectorAll('li')).filter((child) => ownerLi(child) === li);
+
+    const domId = (li, body) => (
+        li.getAttribute('data-comment-id') ||
+        li.getAttribute('data-id') ||
+        li.id ||
+        (body && (body.getAttribute('data-comment-id') || body.id)) ||
+        ''
+    );
+
+    const walk = (li, depth) => {
+        const body = firstOwned(li, ['.comment-body']);
+        const author = firstOwned(li, opts.authorSelectors);
+        const time = firstOwned(li, opts.timeSelectors);
+        return {
+            id: domId(li, body),
+            depth: depth,
+            html: body ? body.innerHTML : '',
+            author: author ? author.textContent.trim() : '',
+            timestamp: time ? time.textContent.trim() : '',
+            replies: directReplies(li).map((child) => walk(child, depth + 1))
+        };
+    };
+
+    let roots = Array.from(region.querySelectorAll(':scope > div > div.comments-region > ul > li'));
+    if (roots.length === 0) {
+        // 备用方法：没有位于评论区内其他 li 之下的 li 即为根评论
+        roots = Array.from(region.querySelectorAll('li')).filter((li) => {
+            const parent = ownerLi(li);
+            return !parent || !region.contains(parent);
+        });
+    }
+    return roots.map((li) => walk(li, 0));
+}
+"""
+
+
+def _convert_node(node: Dict[str, Any], clean_html) -> Optional[Dict[str, Any]]:
+    """将浏览器返回的节点转换为评论字典，正文为空的节点被跳过"""
+    text = clean_html(node.get('html', ''))
+    if not text.strip():
+        return None
+
+    replies = []
+    for child in node.get('replies', []):
+        reply = _convert_node(child, clean_html)
+        if reply:
+            replies.append(reply)
+
+    return {
+        'text': text,
+        'author': node.get('author', ''),
+        'timestamp': node.get('timestamp', ''),
+        'replies': replies,
+        'id': node.get('id', ''),
+        'depth': node.get('depth', 0)
+    }
+
+
+async def extract_comment_tree(page, container: str, clean_html) -> Optional[List[Dict[str, Any]]]:
+    """
+    一次 page.evaluate 提取整个评论树
+
+    Args:
+        page: Playwright 页面
+        container: 评论区容器选择器
+        clean_html: 评论HTML清理函数
+
+    Returns:
+        List[Dict]: 根评论列表（回复嵌套在 replies 中），找不到评论区时返回None
+    """
+    raw_tree = await page.evaluate(_EXTRACT_TREE_JS, {
+        'container': container,
+        'authorSelectors': AUTHOR_SELECTORS,
+        'timeSelectors': TIME_SELECTORS
+    })
+    if raw_tree is None:
+        return None
+
+    root_comments = []
+    for node in raw_tree:
+        comment = _convert_node(node, clean_html)
+        if comment:
+            root_comments.append(comment)
+    return root_comments
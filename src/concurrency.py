@@ -0,0 +1,144 @@
+"""
+并发抓取辅助工具
+- HostRateLimiter: 按主机限制请求频率，避免触发网站限流
+- install_request_throttling: 页面内的文档和接口请求同样经过限速
+- OrderedPostLogger: 并发时缓冲每个帖子的日志，并按输入顺序整段输出
+"""
+import asyncio
+import contextvars
+import io
+import sys
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    """
+    按主机限速，不同主机互不影响
+    - wait: 两次页面访问（开始处理一个帖子）之间至少间隔 min_interval 秒
+    - throttle: 抓取过程中的每个请求（页面文档、接口、翻页）之间至少间隔 request_interval 秒，
+      并发抓取的所有帖子共用同一个间隔
+    """
+
+    def __init__(self, min_interval: float, request_interval: float = 0.0):
+        self.min_interval = max(0.0, min_interval)
+        self.request_interval = max(0.0, request_interval)
+        self._locks = {}
+        self._last_request = {}
+
+    async def _space(self, key, interval: float, announce: bool = False):
+        """等待到距离同一类请求的上一次至少 interval 秒"""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            last = self._last_request.get(key)
+            if last is not None:
+                delay = interval - (time.monotonic() - last)
+                if delay > 0:
+                    if announce:
+                        print(f"⏳ 主机 {key[1]} 限速，等待 {delay:.1f} 秒...")
+                    await asyncio.sleep(delay)
+            self._last_request[key] = time.monotonic()
+
+    async def wait(self, url: str):
+        """等待直到可以访问该URL所在主机的下一个页面"""
+        await self._space(('page', urlparse(url).netloc), self.min_interval, announce=True)
+
+    async def throttle(self, url: str):
+        """等待直到可以向该URL所在主机发起下一个请求（请求较多，不输出日志）"""
+        if self.request_interval > 0:
+            await self._space(('request', urlparse(url).netloc), self.request_interval)
+
+
+# 经过 throttle 限速的页面请求类型（图片等静态资源由资源拦截或图片下载器处理）
+THROTTLED_RESOURCE_TYPES = ('document', 'xhr', 'fetch')
+
+
+async def install_request_throttling(page, rate_limiter: HostRateLimiter):
+    """
+    为页面安装请求限速路由：文档和接口请求先经过 rate_limiter.throttle，
+    再交给之前安装的路由（资源拦截）或正常发出
+    必须在 install_resource_blocking 之后调用（后安装的路由先执行）
+    """
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in THROTTLED_RESOURCE_TYPES:
+            await rate_limiter.throttle(request.url)
+        await route.fallback()
+
+    await page.route('**/*', handle_route)
+
+
+# 当前任务的日志缓冲区（每个 asyncio 任务拥有独立的上下文副本）
+_current_buffer = contextvars.ContextVar('post_output_buffer', default=None)
+
+
+class _BufferedStdout:
+    """stdout 代理：当前任务设置了缓冲区时写入缓冲区，否则直接输出"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _current_buffer.get()
+        if buffer is not None:
+            return buffer.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class OrderedPostLogger:
+    """
+    按输入顺序输出每个帖子的完整日志，保证并发时日志不交错
+
+    用法:
+        logger = OrderedPostLogger()
+        with logger.install():
+            ...
+            with logger.capture(index):   # 在每个帖子的任务内部
+                ...
+    """
+
+    def __init__(self, start_index: int = 0):
+        self._finished = {}
+        self._next_index = start_index
+        self._stream = None
+
+    @contextmanager
+    def install(self):
+        """替换 sys.stdout 为缓冲代理，退出时恢复并输出剩余日志"""
+        self._stream = sys.stdout
+        sys.stdout = _BufferedStdout(self._stream)
+        try:
+            yield self
+        finally:
+            sys.stdout = self._stream
+            # 输出所有剩余日志（包括因异常未完成的序号之后的日志）
+            for index in sorted(self._finished):
+                self._stream.write(self._finished.pop(index))
+            self._stream.flush()
+
+    @contextmanager
+    def capture(self, index: int):
+        """在当前任务中缓冲日志，结束后按顺序输出"""
+        buffer = io.StringIO()
+        token = _current_buffer.set(buffer)
+        try:
+            yield
+        finally:
+            _current_buffer.reset(token)
+            self._finished[index] = buffer.getvalue()
+            self._flush_ready()
+
+    def _flush_ready(self):
+        """输出从下一个序号开始所有已完成的日志"""
+        stream = self._stream or sys.stdout
+        while self._next_index in self._finished:
+            stream.write(self._finished.pop(self._next_index))
+            self._next_index += 1
+        stream.flush()
@@ -23,12 +23,78 @@ class Config:
     # 设置
     HEADLESS = os.getenv('HEADLESS', 'False').lower() == 'true'
     TIMEOUT = int(os.getenv('TIMEOUT', 30000))
+    # 点击后评论区域需要保持静默（无请求、无DOM变化）的毫秒数
     WAIT_TIME = int(os.getenv('WAIT_TIME', 500))
+    # 等待评论区域稳定的最长时间（毫秒）
+    DOM_STABLE_TIMEOUT = int(os.getenv('DOM_STABLE_TIMEOUT', 10000))
+    # 评论展开方式: batch（每轮页面内批量点击）或 sequential（逐个点击）
+    EXPANSION_MODE = os.getenv('EXPANSION_MODE', 'batch').lower()
+    
+    # 评论来源: dom（从页面提取）或 network（捕获评论接口JSON，DOM只用于补齐缺失字段）
+    COMMENT_SOURCE = os.getenv('COMMENT_SOURCE', 'dom').lower()
+    # 评论接口URL的匹配正则
+    COMMENT_API_PATTERN = os.getenv('COMMENT_API_PATTERN', r'/comments')
+    
+    # 抓取方式: browser（Playwright）或 http（复用会话cookies直接请求接口，失败时退回浏览器）
+    FETCH_MODE = os.getenv('FETCH_MODE', 'browser').lower()
+    POST_API_URL_TEMPLATE = os.getenv('POST_API_URL_TEMPLATE', '{site}/api/v1/posts/{post_id}')
+    COMMENTS_API_URL_TEMPLATE = os.getenv('COMMENTS_API_URL_TEMPLATE', '{site}/api/v1/posts/{post_id}/comments')
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 10))
+    
+    # 增量抓取：重新处理已完成的帖子，只加载上次之后的新评论并合并进已保存的 data.json
+    INCREMENTAL = os.getenv('INCREMENTAL', 'False').lower() == 'true'
+    
+    # 图片下载：全局并发数、同一主机的并发上限和单个图片的超时（秒）
+    IMAGE_CONCURRENCY = int(os.getenv('IMAGE_CONCURRENCY', 16))
+    IMAGE_PER_HOST_LIMIT = int(os.getenv('IMAGE_PER_HOST_LIMIT', 6))
+    IMAGE_TIMEOUT = float(os.getenv('IMAGE_TIMEOUT', 15))
+    # 已下载图片的新鲜期（秒）：期内不请求网络，过期后用 ETag/Last-Modified 发送条件请求；0 表示每次都验证
+    IMAGE_CACHE_TTL = float(os.getenv('IMAGE_CACHE_TTL', 86400))
+    # 从浏览器的网络响应中收集图片内容（启用后不再拦截图片请求），只单独下载页面中没加载过的图片
+    HARVEST_BROWSER_IMAGES = os.getenv('HARVEST_BROWSER_IMAGES', 'False').lower() == 'true'
+    
+    # 旧版 images/ 图片迁移到附件目录的方式: auto（reflink -> 硬链接 -> 复制）、reflink、hardlink 或 copy
+    ATTACHMENT_LINK_MODE = os.getenv('ATTACHMENT_LINK_MODE', 'auto').lower()
+    
+    # HTML处理和Markdown渲染的进程数（0 表示在事件循环线程中直接渲染）
+    RENDER_PROCESSES = int(os.getenv('RENDER_PROCESSES', 2))
+    # 等待输出阶段处理的帖子数上限，超过时暂停抓取（限制已抓取数据和图片在内存中堆积）
+    RENDER_QUEUE_SIZE = int(os.getenv('RENDER_QUEUE_SIZE', 2))
+    
+    # HTML -> Markdown 转换缓存：内存 LRU 条目数和磁盘缓存大小上限（MB）
+    MARKDOWN_CACHE = os.getenv('MARKDOWN_CACHE', 'True').lower() == 'true'
+    MARKDOWN_CACHE_MEMORY_ITEMS = int(os.getenv('MARKDOWN_CACHE_MEMORY_ITEMS', 4096))
+    MARKDOWN_CACHE_MAX_MB = float(os.getenv('MARKDOWN_CACHE_MAX_MB', 64))
+    
+    # 浏览器池：每个上下文处理多少个帖子后轮换，限制内存增长
+    CONTEXT_RECYCLE_POSTS = int(os.getenv('CONTEXT_RECYCLE_POSTS', 20))
+    
+    # 并发：同时处理的帖子数，以及同一主机两次页面访问之间的最小间隔（秒）
+    CONCURRENCY = int(os.getenv('CONCURRENCY', 1))
+    HOST_MIN_INTERVAL = float(os.getenv('HOST_MIN_INTERVAL', 2.0))
+    # 抓取过程中同一主机的文档/接口请求之间的最小间隔（秒），所有并发帖子共用；0 表示不限制
+    HOST_REQUEST_INTERVAL = float(os.getenv('HOST_REQUEST_INTERVAL', 0.2))
+    
+    # 资源拦截：页面加载时中止提取器用不到的资源类型和第三方主机（逗号分隔）
+    BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'True').lower() == 'true'
+    BLOCKED_RESOURCE_TYPES = os.getenv('BLOCKED_RESOURCE_TYPES', 'font,media,image')
+    BLOCKED_HOSTS = os.getenv('BLOCKED_HOSTS', '')
     
     # 路径
     OUTPUT_DIR = Path('output')
     LOGS_DIR = Path('logs')
     AUTH_FILE = Path('auth.json')
+    # 浏览器安装检查结果和上次成功的启动方案
+    LAUNCH_CACHE_FILE = Path(os.getenv('LAUNCH_CACHE_FILE', '.playwright_launch_cache.json'))
+    # 持久化任务队列，以及单个URL的最大尝试次数
+    JOB_DB_FILE = Path(os.getenv('JOB_DB_FILE', 'output/jobs.sqlite3'))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    # 输出清单：记录每个帖子的内容哈希，内容未变化时跳过重写
+    OUTPUT_MANIFEST_FILE = Path(os.getenv('OUTPUT_MANIFEST_FILE', 'output/manifest.json'))
+    # 抓取结果格式: json（data.json）、ndjson（逐行流式的 data.ndjson）或 both（data.ndjson 并导出 data.json）
+    OUTPUT_FORMAT = os.getenv('OUTPUT_FORMAT', 'json').lower()
+    # HTML -> Markdown 转换缓存的磁盘文件
+    MARKDOWN_CACHE_FILE = Path(os.getenv('MARKDOWN_CACHE_FILE', 'output/markdown_cache.sqlite3'))
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,123 @@
+"""
+DOM稳定等待
+在页面内安装 MutationObserver 和 XHR/fetch 在途请求计数器，
+点击后只等待到评论区域真正稳定为止，取代固定时长的 wait_for_timeout
+"""
+
+# 默认观察的区域：评论区容器
+COMMENT_REGION_SELECTOR = '#sidebar-comments-region'
+
+# 在页面中安装稳定性追踪器（重复调用无副作用）
+_INSTALL_TRACKER_JS = """
+(selector) => {
+    if (window.__scraperStability) {
+        return true;
+    }
+    const state = { inflight: 0, lastChange: performance.now() };
+    const touch = () => { state.lastChange = performance.now(); };
+
+    // XHR 在途计数
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        state.inflight += 1;
+        touch();
+        this.addEventListener('loadend', () => {
+            state.inflight = Math.max(0, state.inflight - 1);
+            touch();
+        }, { once: true });
+        return originalSend.apply(this, args);
+    };
+
+    // fetch 在途计数
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function (...args) {
+            state.inflight += 1;
+            touch();
+            return originalFetch.apply(this, args).finally(() => {
+                state.inflight = Math.max(0, state.inflight - 1);
+                touch();
+            });
+        };
+    }
+
+    // 只关心评论区域内的变化（区域不存在时观察整个页面）
+    const observer = new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            const target = mutation.target.nodeType === 1 ? mutation.target : mutation.target.parentElement;
+            if (!document.querySelector(selector) || (target && target.closest(selector))) {
+                touch();
+                return;
+            }
+        }
+    });
+    observer.observe(document.documentElement, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        characterData: true
+    });
+
+    window.__scraperStability = state;
+    return true;
+}
+"""
+
+# 判断是否已稳定：没有在途请求，且距最后一次变化已超过静默窗口
+_IS_STABLE_JS = """
+(quietMs) => {
+    const state = window.__scraperStability;
+    if (!state) {
+        return true;
+    }
+    return state.inflight === 0 && performance.now() - state.lastChange >= quietMs;
+}
+"""
+
+# 把最后变化时间重置为当前时刻，保证点击后至少等待一个静默窗口
+_MARK_ACTIVITY_JS = """
+() => {
+    if (window.__scraperStability) {
+        window.__scraperStability.lastChange = performance.now();
+    }
+}
+"""
+
+
+async def install_stability_tracker(page, selector: str = COMMENT_REGION_SELECTOR):
+    """
+    在页面中安装稳定性追踪器
+    应在第一次点击之前调用，这样点击触发的请求才会被计入在途请求
+    """
+    try:
+        await page.evaluate(_INSTALL_TRACKER_JS, selector)
+    except Exception as e:
+        print(f"    ⚠️ 安装DOM稳定追踪器失败: {e}")
+
+
+async def wait_for_dom_stable(page, config, selector: str = COMMENT_REGION_SELECTOR,
+                              quiet_ms: int = None, timeout_ms: int = None) -> bool:
+    """
+    等待评论区域稳定：没有在途的 XHR/fetch 请求，且 quiet_ms 毫秒内没有DOM变化
+
+    Args:
+        page: Playwright 页面
+        config: 配置（静默窗口默认取 WAIT_TIME，最长等待取 DOM_STABLE_TIMEOUT）
+        selector: 需要观察的区域
+        quiet_ms: 静默窗口（毫秒）
+        timeout_ms: 最长等待时间（毫秒）
+
+    Returns:
+        bool: 是否在超时前达到稳定
+    """
+    quiet_ms = config.WAIT_TIME if quiet_ms is None else quiet_ms
+    timeout_ms = config.DOM_STABLE_TIMEOUT if timeout_ms is None else timeout_ms
+
+    try:
+        await page.evaluate(_INSTALL_TRACKER_JS, selector)
+        await page.evaluate(_MARK_ACTIVITY_JS)
+        await page.wait_for_function(_IS_STABLE_JS, arg=quiet_ms, timeout=timeout_ms, polling=100)
+        return True
+    except Exception as e:
+        print(f"    ⚠️ 等待DOM稳定超时或失败 ({timeout_ms}ms): {str(e)[:100]}")
+        return False
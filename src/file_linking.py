@@ -0,0 +1,131 @@
+"""
+零拷贝的附件迁移
+把已有图片放到另一个目录时依次尝试：
+- reflink：写时复制克隆，Linux 的 FICLONE（btrfs、XFS 等）或 macOS 的 clonefile（APFS）
+- hardlink：硬链接，同一文件系统上不占额外空间
+- copy：shutil.copy2 完整复制
+同一文件系统上迁移大量附件几乎不产生I/O，并统计每种方式的使用次数
+"""
+import errno
+import os
+import shutil
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import Config
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# 依次尝试的方式
+LINK_MODES = {
+    'auto': ('reflink', 'hardlink', 'copy'),
+    'reflink': ('reflink', 'copy'),
+    'hardlink': ('hardlink', 'copy'),
+    'copy': ('copy',),
+}
+
+# 这些错误说明当前文件系统不支持该方式，之后同一对目录不再尝试
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY, errno.ENOSYS,
+    errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+}
+
+
+def _reflink(source: Path, target: Path):
+    if sys.platform.startswith('linux'):
+        import fcntl
+
+        with open(source, 'rb') as src, open(target, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.unlink(target)
+                raise
+        shutil.copystat(source, target)
+    elif sys.platform == 'darwin':
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(source), os.fsencode(target), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(target))
+    else:
+        raise OSError(errno.EOPNOTSUPP, 'reflink is not supported on this platform', str(target))
+
+
+def _hardlink(source: Path, target: Path):
+    os.link(source, target)
+
+
+def _copy(source: Path, target: Path):
+    shutil.copy2(source, target)
+
+
+_STRATEGIES = {
+    'reflink': _reflink,
+    'hardlink': _hardlink,
+    'copy': _copy,
+}
+
+
+class FileLinker:
+    """
+    按配置的顺序尝试 reflink / 硬链接 / 复制
+
+    用法:
+        linker = FileLinker('auto')
+        strategy = linker.link(source_path, target_path)   # 'reflink'、'hardlink' 或 'copy'
+        linker.counts                                       # Counter({'hardlink': 120, ...})
+    """
+
+    def __init__(self, mode: str = 'auto'):
+        if mode not in LINK_MODES:
+            print(f"⚠️ 未知的附件迁移方式 {mode}，使用 auto")
+            mode = 'auto'
+        self.mode = mode
+        self.counts = Counter()
+        self._unsupported = set()
+
+    def link(self, source: Path, target: Path) -> str:
+        """
+        把 source 放到 target（target 不能已存在）
+
+        Returns:
+            str: 实际使用的方式
+        """
+        source, target = Path(source), Path(target)
+        device_pair = (source.stat().st_dev, str(target.parent))
+        for strategy in LINK_MODES[self.mode]:
+            if (strategy, device_pair) in self._unsupported:
+                continue
+            try:
+                _STRATEGIES[strategy](source, target)
+            except OSError as e:
+                if strategy == 'copy':
+                    raise
+                if e.errno in _UNSUPPORTED_ERRNOS:
+                    self._unsupported.add((strategy, device_pair))
+                continue
+            self.counts[strategy] += 1
+            return strategy
+        raise OSError(errno.EIO, 'no link strategy succeeded', str(target))
+
+    def summary(self) -> str:
+        return ', '.join(f"{strategy} {self.counts[strategy]}" for strategy in LINK_MODES['auto'])
+
+
+_linkers: Dict[str, FileLinker] = {}
+
+
+def get_file_linker(mode: Optional[str] = None) -> FileLinker:
+    """返回当前进程共享的 FileLinker（默认使用 Config.ATTACHMENT_LINK_MODE）"""
+    if mode is None:
+        mode = Config.ATTACHMENT_LINK_MODE
+    linker = _linkers.get(mode)
+    if linker is None:
+        linker = _linkers[mode] = FileLinker(mode)
+    return linker
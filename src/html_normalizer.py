@@ -0,0 +1,125 @@
+"""
+单次解析的HTML规范化
+每个HTML片段（正文或一条评论）最多解析一次：
+需要改写时（系统链接移除、图片路径改写）在同一棵树上完成并序列化保存用的HTML，
+Markdown 统一由流式转换器（wysiwyg_markdown）生成，不需要改写的片段完全不经过 BeautifulSoup
+取代原来 BeautifulSoup 改写图片、正则预处理、markdownify 再解析的多次往返
+"""
+import html as html_lib
+import re
+from typing import Any, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from image_processor import create_markdown_from_html
+from markdown_renderer import render_obsidian_markdown
+from models import CommentTree
+
+
+# 评论中的系统按钮链接（与 scraper.clean_comment_html 的规则一致）
+SYSTEM_LINK_WORDS = ('reply', '回复', '删除', 'delete', '编辑', 'edit', 'more', '更多')
+
+# 不解析HTML，快速找出图片src（引号包裹或不带引号的属性值）
+_IMG_SRC_RE = re.compile(
+    r'<img\b[^>]*?\bsrc\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))',
+    re.IGNORECASE
+)
+
+# html.parser 是 BeautifulSoup 内置的解析器，不引入额外依赖
+PARSER = 'html.parser'
+
+
+def find_image_sources(html: str) -> List[str]:
+    """按出现顺序返回HTML中所有图片的src（已解码HTML实体）"""
+    sources = []
+    for match in _IMG_SRC_RE.finditer(html or ''):
+        src = next(group for group in match.groups() if group is not None)
+        if src:
+            sources.append(html_lib.unescape(src))
+    return sources
+
+
+def _is_system_link(link) -> bool:
+    text = link.get_text().lower()
+    return any(word in text for word in SYSTEM_LINK_WORDS)
+
+
+def _needs_tree_edits(html: str, replacements: Dict[str, str], clean_links: bool) -> bool:
+    """不解析HTML，粗略判断片段是否可能需要改写（宁可多判，不会漏判）"""
+    if replacements and any(src in replacements for src in find_image_sources(html)):
+        return True
+    if clean_links:
+        lowered = html.lower()
+        return '<a' in lowered and any(word in lowered for word in SYSTEM_LINK_WORDS)
+    return False
+
+
+def normalize_fragment(html: str, replacements: Dict[str, str] = None,
+                       clean_links: bool = False) -> Tuple[str, str]:
+    """
+    规范化一个片段并生成Markdown，最多解析一次
+
+    Args:
+        html: 原始HTML片段
+        replacements: 图片 src -> 本地路径
+        clean_links: 是否移除系统链接（评论使用，正文不使用）
+
+    Returns:
+        (html, markdown): 保存用的HTML（无改动时原样返回）和Markdown
+    """
+    if not html:
+        return html, ''
+
+    normalized_html = html
+    if _needs_tree_edits(html, replacements, clean_links):
+        soup = BeautifulSoup(html, PARSER)
+        changed = False
+        # 只遍历一次链接和图片
+        for tag in soup.find_all(['a', 'img']):
+            if tag.name == 'img':
+                local_src = replacements.get(tag.get('src')) if replacements else None
+                if local_src:
+                    tag['src'] = local_src
+                    changed = True
+            elif clean_links and tag.get('href') is not None and _is_system_link(tag):
+                tag.decompose()
+                changed = True
+        if changed:
+            normalized_html = str(soup)
+
+    # 大多数片段不需要改写，直接交给流式转换器，不经过 BeautifulSoup
+    return normalized_html, create_markdown_from_html(normalized_html)
+
+
+def normalize_post(post_content: Dict[str, Any], comments: List[Dict[str, Any]], url: str,
+                   replacements: Dict[str, str] = None
+                   ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], str]:
+    """
+    规范化整个帖子并生成 Obsidian Markdown（模块顶层函数，可在进程池中执行）
+
+    Returns:
+        (post_content, comments, markdown): 处理后的副本和完整的Markdown文本
+    """
+    markdown_by_node: Dict[int, str] = {}
+
+    processed_content = dict(post_content) if post_content else post_content
+    if processed_content and 'content' in processed_content:
+        processed_content['content'], markdown_by_node[id(processed_content)] = normalize_fragment(
+            processed_content['content'], replacements
+        )
+
+    # 评论树只复制一次（扁平数组），之后原地替换各条评论的 text
+    tree = CommentTree.from_legacy(comments)
+    for comment in tree:
+        if comment.text is not None:
+            comment.text, markdown_by_node[id(comment)] = normalize_fragment(
+                comment.text, replacements, clean_links=True
+            )
+
+    def markdown_of(node: Dict[str, Any], field: str) -> str:
+        markdown = markdown_by_node.get(id(node))
+        return markdown if markdown is not None else create_markdown_from_html(node[field])
+
+    markdown = render_obsidian_markdown(processed_content, tree, url, markdown_of)
+    return processed_content, tree.to_legacy(), markdown
+
@@ -2,17 +2,25 @@
 HTML to Markdown 转换器
 将抓取到的HTML内容转换为Markdown格式，实现用户友好的文档输出
 """
-import json
 import os
 from pathlib import Path
 from typing import Dict, Any, List
-from markdownify import markdownify as md
+from batch_convert import ConversionManifest, converter_version, run_batch
+from markdown_cache import cached_markdown
+from stream_store import open_thread
+from wysiwyg_markdown import converter_signature, wysiwyg_to_markdown
 import argparse
 
 
+# 转换清单文件名（保存在输出目录中）
+CONVERSION_MANIFEST_NAME = '.conversion_manifest.json'
+# 修改输出格式时递增（本文件内容变化也会触发重新转换）
+CONVERTER_REVISION = 1
+
+
 def convert_html_to_markdown(html_content: str) -> str:
     """
-    将HTML内容转换为Markdown格式
+    将HTML内容转换为Markdown格式（结果按HTML缓存，重复转换直接命中）
     
     Args:
         html_content: 需要转换的HTML内容
@@ -23,17 +31,16 @@ def convert_html_to_markdown(html_content: str) -> str:
     if not html_content:
         return ""
     
-    # 使用markdownify进行转换
-    # heading_style="ATX" 生成 #, ## 这种标题格式
-    # wrap=True 自动换行
-    # convert=['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'em', 'ul', 'ol', 'li', 'a', 'br']
-    markdown_content = md(
-        html_content, 
-        heading_style="ATX",
-        bullets="-",
-        strong_mark="**",
-        emphasis_mark="*"
+    return cached_markdown(
+        f"convert_html_to_markdown-1|{converter_signature()}", html_content, _convert_html_to_markdown
     )
+
+
+def _convert_html_to_markdown(html_content: str) -> str:
+    """convert_html_to_markdown 的实际转换"""
+    # 使用 Mighty 富文本专用转换器（其他标签自动交给markdownify）
+    # 标题使用 #, ## 这种 ATX 格式，列表使用 - 符号
+    markdown_content = wysiwyg_to_markdown(html_content)
     
     # 清理多余的空行
     lines = markdown_content.split('\n')
@@ -99,21 +106,20 @@ def convert_comment_to_markdown(comment: Dict[str, Any], level: int = 0) -> str:
 def process_json_to_markdown(json_file_path: str, output_dir: str = None) -> str:
     """
     处理JSON文件，将其转换为Markdown格式
+    data.ndjson 按顶层评论逐棵读取，不需要一次载入整个评论树
     
     Args:
-        json_file_path: 输入的JSON文件路径
+        json_file_path: 输入的 JSON 或 NDJSON 文件路径
         output_dir: 输出目录，如果为None则使用input文件同级的markdown目录
         
     Returns:
         生成的Markdown文件路径
     """
-    # 读取JSON文件
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # 读取帖子信息，评论按需迭代
+    data, comments = open_thread(json_file_path)
     
     # 获取帖子信息
     post = data.get('post', {})
-    comments = data.get('comments', [])
     
     # 开始构建Markdown内容
     markdown_content = []
@@ -146,16 +152,15 @@ def process_json_to_markdown(json_file_path: str, output_dir: str = None) -> str
         markdown_content.append("")
     
     # 添加评论区
-    if comments:
-        total_comments = data.get('total_comments', len(comments))
-        markdown_content.append(f"## 评论区 ({total_comments} 条评论)\n")
+    for i, comment in enumerate(comments, 1):
+        if i == 1:
+            markdown_content.append(f"## 评论区 ({data.get('total_comments')} 条评论)\n")
         
-        for i, comment in enumerate(comments, 1):
-            markdown_content.append(f"### 评论 {i}\n")
-            comment_markdown = convert_comment_to_markdown(comment)
-            if comment_markdown:
-                markdown_content.append(comment_markdown)
-            markdown_content.append("---\n")
+        markdown_content.append(f"### 评论 {i}\n")
+        comment_markdown = convert_comment_to_markdown(comment)
+        if comment_markdown:
+            markdown_content.append(comment_markdown)
+        markdown_content.append("---\n")
     
     # 合并所有内容
     final_content = '\n'.join(markdown_content).strip()
@@ -180,13 +185,16 @@ def process_json_to_markdown(json_file_path: str, output_dir: str = None) -> str
     return str(output_path)
 
 
-def batch_convert_directory(input_dir: str, output_dir: str = None):
+def batch_convert_directory(input_dir: str, output_dir: str = None, processes: int = None, force: bool = False):
     """
     批量转换目录中的所有JSON文件
+    只转换内容或转换器有变化的文件，多个文件在进程池中并行转换
     
     Args:
         input_dir: 包含JSON文件的目录
         output_dir: 输出目录
+        processes: 进程数，默认使用全部CPU核
+        force: 忽略转换清单，全部重新转换
     """
     input_path = Path(input_dir)
     
@@ -194,8 +202,11 @@ def batch_convert_directory(input_dir: str, output_dir: str = None):
         print(f"❌ 输入目录不存在: {input_dir}")
         return
     
-    # 查找所有JSON文件
-    json_files = list(input_path.glob("*.json"))
+    # 查找所有 JSON / NDJSON 文件（跳过转换清单等隐藏文件）
+    json_files = sorted(
+        path for pattern in ("*.json", "*.ndjson") for path in input_path.glob(pattern)
+        if not path.name.startswith('.')
+    )
     
     if not json_files:
         print(f"❌ 在 {input_dir} 中没有找到JSON文件")
@@ -206,20 +217,19 @@ def batch_convert_directory(input_dir: str, output_dir: str = None):
     # 确定输出目录
     if output_dir is None:
         output_dir = input_path / "markdown"
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # 批量转换
-    success_count = 0
-    for json_file in json_files:
-        try:
-            print(f"🔄 正在转换: {json_file.name}")
-            output_path = process_json_to_markdown(str(json_file), output_dir)
-            print(f"✅ 已生成: {Path(output_path).name}")
-            success_count += 1
-        except Exception as e:
-            print(f"❌ 转换失败 {json_file.name}: {e}")
+    # 批量转换（转换清单保存在输出目录中）
+    manifest = ConversionManifest(output_dir / CONVERSION_MANIFEST_NAME)
+    version = converter_version(
+        f"html_to_markdown-{CONVERTER_REVISION}", converter_signature(), source_files=[Path(__file__)]
+    )
+    stats = run_batch(json_files, process_json_to_markdown, manifest, version,
+                      args=(str(output_dir),), processes=processes, force=force)
     
     print(f"\n🎉 批量转换完成!")
-    print(f"📊 成功转换: {success_count}/{len(json_files)} 个文件")
+    print(f"📊 成功转换: {stats['converted']} 个，未变化跳过: {stats['skipped']} 个，失败: {stats['failed']} 个")
     print(f"📁 输出目录: {output_dir}")
 
 
@@ -238,6 +248,9 @@ def main():
   
   # 指定输出目录
   python src/html_to_markdown.py output/ --batch --output markdown_output/
+  
+  # 忽略转换清单，用4个进程全部重新转换
+  python src/html_to_markdown.py output/ --batch --force --jobs 4
         """
     )
     
@@ -246,6 +259,10 @@ def main():
                        help='批量处理目录中的所有JSON文件')
     parser.add_argument('--output', '-o', 
                        help='输出目录路径（可选）')
+    parser.add_argument('--jobs', '-j', type=int,
+                       help='批量转换的进程数（默认使用全部CPU核）')
+    parser.add_argument('--force', '-f', action='store_true',
+                       help='忽略转换清单，重新转换所有文件')
     
     args = parser.parse_args()
     
@@ -259,7 +276,7 @@ def main():
         if args.batch or input_path.is_dir():
             # 批量处理模式
             print("🚀 启动批量转换模式...")
-            batch_convert_directory(str(input_path), args.output)
+            batch_convert_directory(str(input_path), args.output, processes=args.jobs, force=args.force)
         else:
             # 单文件处理模式
             print(f"🚀 转换单个文件: {input_path.name}")
@@ -0,0 +1,195 @@
+"""
+无浏览器HTTP抓取
+复用 auth.json 中保存的会话 cookies，通过带连接池的异步HTTP客户端
+直接请求帖子和评论的JSON接口；失败时由调用方退回浏览器抓取
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from comment_api import build_comment_tree_from_payloads
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# 评论接口最多翻页次数，防止分页链接异常时无限请求
+MAX_COMMENT_PAGES = 200
+
+
+class HttpFetchError(Exception):
+    """HTTP抓取失败（会话失效、接口不可用或数据不完整）"""
+
+
+def load_session_cookies(auth_file: Path) -> httpx.Cookies:
+    """
+    从 Playwright 的 storage_state 文件中读取 cookies
+    """
+    with open(auth_file, 'r', encoding='utf-8') as f:
+        storage_state = json.load(f)
+
+    cookies = httpx.Cookies()
+    for cookie in storage_state.get('cookies', []):
+        cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain', '').lstrip('.'),
+            path=cookie.get('path', '/')
+        )
+    return cookies
+
+
+def _first_value(record: dict, keys: List[str]):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def build_post_from_payload(payload: dict, url: str) -> Dict[str, Any]:
+    """
+    把帖子接口返回的JSON转换为与 extract_post_content 相同的结构
+    """
+    record = payload
+    for key in ('post', 'data', 'item'):
+        if isinstance(record.get(key), dict):
+            record = record[key]
+            break
+
+    author = _first_value(record, ['author', 'creator', 'user', 'member'])
+    if isinstance(author, dict):
+        author = _first_value(author, ['name', 'full_name', 'display_name', 'username'])
+
+    return {
+        'title': str(_first_value(record, ['title', 'name', 'subject']) or ''),
+        'content': str(_first_value(record, ['body_html', 'html', 'body', 'content', 'description']) or ''),
+        'author': str(author or ''),
+        'timestamp': str(_first_value(record, ['created_at', 'published_at', 'timestamp']) or ''),
+        'url': url
+    }
+
+
+def _next_page_url(payload, current_url: str) -> Optional[str]:
+    """从分页数据中找出下一页地址，没有更多页时返回None"""
+    if not isinstance(payload, dict):
+        return None
+    links = payload.get('links')
+    candidates = [
+        links.get('next') if isinstance(links, dict) else None,
+        payload.get('next'),
+        payload.get('next_page_url'),
+    ]
+    for candidate in candidates:
+        if isinstance(candidate, str) and candidate:
+            return urljoin(current_url, candidate)
+    return None
+
+
+class HttpPostFetcher:
+    """
+    基于会话 cookies 的异步HTTP抓取器，在整个批次中复用连接池
+
+    用法:
+        async with HttpPostFetcher(Config) as fetcher:
+            post_content, comments = await fetcher.fetch_post(url, post_id, clean_comment_html)
+
+    传入 rate_limiter（HostRateLimiter）时，每个接口请求（包括评论翻页）都先经过按主机限速
+    """
+
+    def __init__(self, config, rate_limiter=None):
+        self.config = config
+        self.rate_limiter = rate_limiter
+        self._client = None
+        self._cookies_mtime = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        self._client = httpx.AsyncClient(
+            headers={
+                'User-Agent': USER_AGENT,
+                'Accept': 'application/json',
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            limits=httpx.Limits(
+                max_connections=self.config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=self.config.HTTP_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(self.config.TIMEOUT / 1000),
+            follow_redirects=False
+        )
+        self._reload_cookies_if_changed()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _reload_cookies_if_changed(self):
+        """auth.json 更新后（例如浏览器路径重新登录）重新加载 cookies"""
+        auth_file = self.config.AUTH_FILE
+        if not auth_file.exists():
+            raise HttpFetchError("会话文件不存在，无法使用HTTP抓取")
+        mtime = auth_file.stat().st_mtime
+        if mtime != self._cookies_mtime:
+            self._client.cookies = load_session_cookies(auth_file)
+            self._cookies_mtime = mtime
+
+    def _api_url(self, template: str, post_id: str) -> str:
+        return template.format(site=self.config.SITE_URL.rstrip('/'), post_id=post_id)
+
+    async def _get_json(self, url: str):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.throttle(url)
+        response = await self._client.get(url)
+        if response.status_code in (301, 302, 303, 307, 308, 401, 403):
+            raise HttpFetchError(f"会话可能已失效 (HTTP {response.status_code}): {url}")
+        if response.status_code != 200:
+            raise HttpFetchError(f"接口请求失败 (HTTP {response.status_code}): {url}")
+        try:
+            return response.json()
+        except ValueError:
+            raise HttpFetchError(f"接口没有返回JSON: {url}")
+
+    async def fetch_comment_payloads(self, post_id: str) -> list:
+        """按分页链接依次请求评论接口，返回所有原始JSON"""
+        payloads = []
+        url = self._api_url(self.config.COMMENTS_API_URL_TEMPLATE, post_id)
+        for _ in range(MAX_COMMENT_PAGES):
+            payload = await self._get_json(url)
+            payloads.append(payload)
+            url = _next_page_url(payload, url)
+            if not url:
+                break
+        return payloads
+
+    async def fetch_post(self, url: str, post_id: str, clean_html=None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        抓取帖子正文和完整评论树
+
+        Returns:
+            (post_content, comments): 与浏览器路径相同的数据结构
+        """
+        if not post_id or not post_id.isdigit():
+            raise HttpFetchError(f"URL中没有数字帖子ID，无法调用接口: {url}")
+
+        self._reload_cookies_if_changed()
+
+        print(f"🌐 HTTP抓取帖子接口: {post_id}")
+        post_payload = await self._get_json(self._api_url(self.config.POST_API_URL_TEMPLATE, post_id))
+        post_content = build_post_from_payload(post_payload, url)
+        if not post_content['content']:
+            raise HttpFetchError("帖子接口中没有正文内容")
+
+        comment_payloads = await self.fetch_comment_payloads(post_id)
+        comments = build_comment_tree_from_payloads(comment_payloads, clean_html)
+        print(f"✅ HTTP抓取完成: {len(comment_payloads)} 页评论数据")
+        return post_content, comments
@@ -0,0 +1,234 @@
+"""
+异步图片下载
+在整个批次中共享一个带连接池的异步HTTP客户端，用全局和按主机的并发上限控制下载，
+一个帖子（正文和所有评论）中的图片并行下载，不再阻塞事件循环
+"""
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from attachment_store import get_attachment_store
+from image_harvester import CapturedImage
+from html_normalizer import find_image_sources
+from image_processor import LOCAL_IMAGE_PREFIXES, guess_image_filename, rewrite_image_sources
+from models import CommentTree, iter_comments
+from obsidian_helpers import OBSIDIAN_ATTACHMENTS_DIR
+
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class AsyncImageDownloader:
+    """
+    异步图片下载器
+
+    用法:
+        async with AsyncImageDownloader(Config) as downloader:
+            filename = await downloader.download(img_url, 1)
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._client = None
+        self._semaphore = asyncio.Semaphore(max(1, config.IMAGE_CONCURRENCY))
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # 同一URL在批次中只下载一次
+        self._downloads: Dict[Tuple[str, Path], asyncio.Future] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        self._client = httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=self.config.IMAGE_CONCURRENCY,
+                max_keepalive_connections=self.config.IMAGE_CONCURRENCY
+            ),
+            timeout=httpx.Timeout(self.config.IMAGE_TIMEOUT),
+            follow_redirects=True
+        )
+
+    async def close(self):
+        for dest_dir in {dest_dir for _, dest_dir in self._downloads}:
+            get_attachment_store(dest_dir).save()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(max(1, self.config.IMAGE_PER_HOST_LIMIT))
+        return self._host_semaphores[host]
+
+    async def download(self, img_url: str, img_index: int, dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR) -> Optional[str]:
+        """
+        下载单个图片到目标目录
+
+        Returns:
+            str: 本地文件名，如果下载失败返回None
+        """
+        return await self.prefetch(img_url, img_index, dest_dir)
+
+    def prefetch(self, img_url: str, img_index: int, dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR) -> asyncio.Future:
+        """开始下载但不等待，返回可等待的下载任务；同一URL只会下载一次"""
+        key = (img_url, Path(dest_dir))
+        if key not in self._downloads:
+            self._downloads[key] = asyncio.ensure_future(self._download(img_url, img_index, Path(dest_dir)))
+        return self._downloads[key]
+
+    def store_captured(self, img_url: str, img_index: int, captured: CapturedImage,
+                       dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR) -> Optional[str]:
+        """把浏览器已经下载过的图片内容直接交给附件库，不再请求网络"""
+        try:
+            suggested_name = guess_image_filename(img_url, captured.content_type, img_index)
+            return get_attachment_store(dest_dir).store_bytes(
+                img_url, captured.body, suggested_name, captured.etag, captured.last_modified
+            )
+        except Exception as e:
+            print(f"    ❌ 保存图片时出错: {img_url}: {e}")
+            return None
+
+    async def _download(self, img_url: str, img_index: int, dest_dir: Path) -> Optional[str]:
+        # 新鲜期内直接复用附件库中的文件，不请求网络
+        store = get_attachment_store(dest_dir)
+        cached_filename = store.lookup(img_url)
+        if cached_filename and store.is_fresh(img_url, self.config.IMAGE_CACHE_TTL):
+            return cached_filename
+        headers = store.conditional_headers(img_url) if cached_filename else {}
+
+        host = urlparse(img_url).netloc
+        tmp_path = None
+        async with self._semaphore, self._host_semaphore(host):
+            try:
+                async with self._client.stream('GET', img_url, headers=headers) as response:
+                    etag = response.headers.get('etag')
+                    last_modified = response.headers.get('last-modified')
+                    if response.status_code == 304 and cached_filename:
+                        store.touch(img_url, etag, last_modified)
+                        return cached_filename
+                    response.raise_for_status()
+                    suggested_name = guess_image_filename(img_url, response.headers.get('content-type', ''), img_index)
+                    # 边下载边计算哈希，写入临时文件后交给附件库去重
+                    dest_dir.mkdir(parents=True, exist_ok=True)
+                    digest = hashlib.sha256()
+                    with tempfile.NamedTemporaryFile(dir=str(dest_dir), prefix='.download-', delete=False) as f:
+                        tmp_path = Path(f.name)
+                        async for chunk in response.aiter_bytes(chunk_size=65536):
+                            digest.update(chunk)
+                            f.write(chunk)
+                filename = store.store_file(
+                    img_url, tmp_path, digest.hexdigest(), suggested_name, etag, last_modified
+                )
+                tmp_path = None
+                return filename
+            except httpx.HTTPError as e:
+                print(f"    ❌ 网络错误: {img_url}: {e}")
+            except Exception as e:
+                print(f"    ❌ 保存图片时出错: {img_url}: {e}")
+            finally:
+                if tmp_path is not None and tmp_path.exists():
+                    tmp_path.unlink()
+
+        return None
+
+
+def _collect_fragments(post_content: Dict[str, Any], comments: List[Dict[str, Any]]) -> List[str]:
+    """帖子正文和所有评论中含图片的HTML片段"""
+    fragments = []
+    if post_content and '<img' in (post_content.get('content') or ''):
+        fragments.append(post_content['content'])
+
+    for item in iter_comments(comments):
+        if '<img' in (item.get('text') or ''):
+            fragments.append(item['text'])
+    return fragments
+
+
+async def download_post_images(post_content: Dict[str, Any], comments: List[Dict[str, Any]],
+                               base_url: str, downloader: AsyncImageDownloader,
+                               dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR,
+                               link_prefix: str = '../attachments/',
+                               captured_images: Dict[str, CapturedImage] = None) -> Dict[str, str]:
+    """
+    并行下载帖子正文和所有评论中的图片（不解析HTML，用正则找出图片地址）
+    captured_images 中已有的图片（浏览器加载页面时收到的响应）直接保存，不再下载
+
+    Returns:
+        dict: 原始 src -> 本地附件路径，交给 html_normalizer 在同一次解析中改写
+    """
+    img_srcs = [
+        src for html in _collect_fragments(post_content, comments) for src in find_image_sources(html)
+        if not src.startswith(LOCAL_IMAGE_PREFIXES) and not src.startswith('data:')
+    ]
+    if not img_srcs:
+        return {}
+
+    captured_images = captured_images or {}
+
+    async def resolve(img_url: str, img_index: int) -> Optional[str]:
+        captured = captured_images.get(img_url)
+        if captured is not None:
+            return downloader.store_captured(img_url, img_index, captured, dest_dir)
+        return await downloader.download(img_url, img_index, dest_dir)
+
+    img_urls = [urljoin(base_url, src) for src in img_srcs]
+    reused_count = sum(1 for img_url in set(img_urls) if img_url in captured_images)
+    if reused_count:
+        print(f"🖼️ 复用浏览器已加载的 {reused_count} 个图片，其余并行下载（共 {len(img_srcs)} 个）...")
+    else:
+        print(f"🖼️ 并行下载 {len(img_srcs)} 个图片（正文和评论）...")
+    results = await asyncio.gather(*(
+        resolve(img_url, i) for i, img_url in enumerate(img_urls, 1)
+    ))
+
+    replacements = {}
+    downloaded_count = 0
+    for src, local_filename in zip(img_srcs, results):
+        if local_filename:
+            replacements[src] = f'{link_prefix}{local_filename}'
+            downloaded_count += 1
+
+    get_attachment_store(dest_dir).save()
+
+    print(f"🎉 图片处理完成！成功下载 {downloaded_count}/{len(img_srcs)} 个图片")
+    return replacements
+
+
+async def process_post_images_async(post_content: Dict[str, Any], comments: List[Dict[str, Any]],
+                                    base_url: str, downloader: AsyncImageDownloader,
+                                    dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR,
+                                    link_prefix: str = '../attachments/',
+                                    captured_images: Dict[str, CapturedImage] = None
+                                    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    下载图片并把图片路径替换为本地附件路径（不生成Markdown时使用）
+
+    Returns:
+        (processed_content, processed_comments): 处理后的副本，原数据不变
+    """
+    replacements = await download_post_images(
+        post_content, comments, base_url, downloader, dest_dir, link_prefix, captured_images
+    )
+
+    def rewrite(html: str) -> str:
+        return rewrite_image_sources([html], replacements)[0] if replacements and '<img' in html else html
+
+    processed_content = dict(post_content) if post_content else post_content
+    if processed_content and processed_content.get('content'):
+        processed_content['content'] = rewrite(processed_content['content'])
+
+    tree = CommentTree.from_legacy(comments)
+    for comment in tree:
+        if comment.text:
+            comment.text = rewrite(comment.text)
+    return processed_content, tree.to_legacy()
@@ -0,0 +1,73 @@
+"""
+从浏览器自身的网络响应中收集图片
+页面加载帖子和评论时浏览器已经（带着会话cookies）下载过大部分图片，
+记录这些响应的内容后交给附件库保存，只有浏览器中没有加载过的图片才需要单独下载
+"""
+import asyncio
+from typing import Dict, NamedTuple
+
+
+class CapturedImage(NamedTuple):
+    """浏览器收到的一张图片"""
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: str
+
+
+class BrowserImageHarvester:
+    """
+    记录页面收到的图片响应
+
+    用法:
+        harvester = BrowserImageHarvester()
+        harvester.attach(page)          # 在 page.goto 之前
+        ...
+        await harvester.drain()
+        harvester.images                # URL -> CapturedImage
+    """
+
+    def __init__(self, max_image_bytes: int = 20 * 1024 * 1024):
+        self.max_image_bytes = max_image_bytes
+        self.images: Dict[str, CapturedImage] = {}
+        self._pending = set()
+
+    def attach(self, page):
+        page.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if response.request.resource_type != 'image' or response.status != 200:
+            return
+        task = asyncio.ensure_future(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            # 响应已被丢弃（页面跳转、上下文关闭等），之后单独下载即可
+            return
+        if not body or len(body) > self.max_image_bytes:
+            return
+
+        headers = response.headers
+        captured = CapturedImage(
+            body=body,
+            content_type=headers.get('content-type', ''),
+            etag=headers.get('etag'),
+            last_modified=headers.get('last-modified')
+        )
+        self.images[response.url] = captured
+
+        # 重定向前的地址（HTML中的src）也指向同一份内容
+        request = response.request.redirected_from
+        while request is not None:
+            self.images[request.url] = captured
+            request = request.redirected_from
+
+    async def drain(self) -> Dict[str, CapturedImage]:
+        """等待所有正在读取的响应完成，返回收集到的图片"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        return self.images
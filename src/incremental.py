@@ -0,0 +1,128 @@
+"""
+增量抓取
+读取上一次的 data.json（或 data.ndjson），用评论ID识别已知评论：
+加载 "Previous Comments" 时一旦页面中出现已知评论就停止翻页，
+然后把新评论合并进已保存的评论树
+"""
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from comment_api import normalize_comment_id
+from models import count_comments, iter_comments
+from stream_store import load_thread
+
+
+# <img> 标签中的 src 属性
+_IMG_SRC_RE = re.compile(r'(<img\b[^>]*?)\s+src\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+)', re.IGNORECASE)
+
+
+# 页面中是否已经出现任一已知评论（与单次往返提取使用相同的DOM id规则）
+_HAS_KNOWN_COMMENT_JS = """
+(args) => {
+    const region = document.querySelector(args.container);
+    if (!region) {
+        return false;
+    }
+    const known = new Set(args.knownIds);
+    const normalize = (value) => String(value || '').trim().replace(/^(?:comment|reply)[-_]/i, '');
+    for (const li of region.querySelectorAll('li')) {
+        const body = li.querySelector('.comment-body');
+        const rawId = li.getAttribute('data-comment-id') || li.getAttribute('data-id') || li.id ||
+            (body && (body.getAttribute('data-comment-id') || body.id)) || '';
+        if (rawId && known.has(normalize(rawId))) {
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+
+def load_previous_output(json_path: Path) -> Optional[Dict[str, Any]]:
+    """读取上一次的抓取结果，不存在或损坏时返回None"""
+    if not json_path or not Path(json_path).exists():
+        return None
+    try:
+        return load_thread(json_path)
+    except Exception as e:
+        print(f"⚠️ 读取上一次的抓取结果失败: {e}")
+        return None
+
+
+def collect_known_ids(comments: List[Dict[str, Any]], known: Optional[Set[str]] = None) -> Set[str]:
+    """收集评论树中所有评论的规范化ID"""
+    if known is None:
+        known = set()
+    for comment in iter_comments(comments):
+        comment_id = normalize_comment_id(comment.get('id'))
+        if comment_id:
+            known.add(comment_id)
+    return known
+
+
+def _text_key(text: str) -> str:
+    """
+    正文的匹配形式：去掉图片地址并统一空白
+    已保存的正文中图片已改写为 ../attachments/ 本地路径，新抓取的仍是CDN地址
+    """
+    text = _IMG_SRC_RE.sub(r'\1', text or '')
+    return ' '.join(text.replace('/>', '>').split())
+
+
+def _comment_key(comment: Dict[str, Any]) -> str:
+    """评论的匹配键：优先使用ID，旧数据没有ID时用作者+正文（忽略图片地址）"""
+    comment_id = normalize_comment_id(comment.get('id'))
+    if comment_id:
+        return f"id:{comment_id}"
+    return f"text:{(comment.get('author') or '').strip()}|{_text_key(comment.get('text', ''))}"
+
+
+def merge_comment_trees(old_comments: List[Dict[str, Any]],
+                        new_comments: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    把新抓取的评论合并进已保存的评论树
+
+    - 已知评论：保留原有内容（图片已处理为本地路径），只更新作者和相对时间，并递归合并回复
+    - 新评论：追加到对应父评论（或根列表）末尾
+    - 本次没有加载到的旧评论：原样保留
+
+    Returns:
+        (merged, added_count): 合并后的评论树和新增评论数
+    """
+    merged = [dict(comment) for comment in old_comments]
+    index = {_comment_key(comment): comment for comment in merged}
+    added_count = 0
+
+    for new_comment in new_comments:
+        existing = index.get(_comment_key(new_comment))
+        if existing is None:
+            merged.append(new_comment)
+            index[_comment_key(new_comment)] = new_comment
+            added_count += count_comments([new_comment])
+            continue
+
+        for key in ('author', 'timestamp'):
+            if new_comment.get(key):
+                existing[key] = new_comment[key]
+        existing['replies'], added_replies = merge_comment_trees(
+            existing.get('replies', []), new_comment.get('replies', [])
+        )
+        added_count += added_replies
+
+    return merged, added_count
+
+
+def make_known_comment_check(page, container: str, known_ids: Set[str]):
+    """
+    生成翻页停止条件：页面中出现任一已知评论时返回True
+    """
+    known_list = sorted(known_ids)
+
+    async def has_known_comment() -> bool:
+        try:
+            return await page.evaluate(_HAS_KNOWN_COMMENT_JS, {'container': container, 'knownIds': known_list})
+        except Exception:
+            return False
+
+    return has_known_comment
@@ -0,0 +1,187 @@
+"""
+持久化任务队列
+用 SQLite 记录每个URL的抓取状态、尝试次数、错误、耗时和输出路径，
+重新运行时按主键 O(1) 跳过已完成的帖子，并从中断的位置继续；
+抓取工作者用 claim_next 从队列中逐个领取任务
+"""
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+# 任务状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    canonical_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,  -- 上次成功之后的尝试次数
+    last_error TEXT,
+    enqueued_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    markdown_path TEXT,
+    json_path TEXT,
+    batch TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_canonical_id ON jobs (canonical_id);
+"""
+
+# 可以领取的任务：本批次中待处理的任务，以及在本批次开始前失败、且尝试次数未达上限的任务
+_CLAIMABLE = (
+    "batch = :batch AND (status = 'pending' OR "
+    "(status = 'failed' AND attempts < :max_attempts AND finished_at < :batch_started))"
+)
+
+
+class JobQueue:
+    """
+    基于 SQLite 的抓取任务表
+
+    用法:
+        queue = JobQueue(Config.JOB_DB_FILE)
+        queue.recover_interrupted()
+        queue.enqueue(urls, extract_post_id)
+        while (job := queue.claim_next(max_attempts)) is not None:
+            ...
+            queue.mark_done(job['url'], markdown_path, json_path)
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        # 旧版任务表没有 batch 列
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        if 'batch' not in columns:
+            self._conn.execute('ALTER TABLE jobs ADD COLUMN batch TEXT')
+        self._conn.commit()
+        # 当前批次（enqueue 时生成）：只领取本次运行加入的URL
+        self.batch = None
+        self.batch_started = None
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def enqueue(self, urls: Iterable[str], id_func, done_func=None) -> int:
+        """
+        把URL加入任务表（已存在的URL保持原状态）
+
+        Args:
+            urls: URL列表
+            id_func: 由URL计算规范ID的函数
+            done_func: 可选，判断URL是否已有输出的函数；已有输出的新任务直接记为完成
+
+        Returns:
+            int: 新加入的任务数
+        """
+        now = time.time()
+        self.batch = uuid.uuid4().hex
+        self.batch_started = now
+        added = 0
+        with self._conn:
+            for url in urls:
+                exists = self._conn.execute('SELECT 1 FROM jobs WHERE url = ?', (url,)).fetchone()
+                if exists:
+                    self._conn.execute('UPDATE jobs SET batch = ? WHERE url = ?', (self.batch, url))
+                    continue
+                status = STATUS_DONE if done_func and done_func(url) else STATUS_PENDING
+                self._conn.execute(
+                    'INSERT INTO jobs (url, canonical_id, status, enqueued_at, batch) VALUES (?, ?, ?, ?, ?)',
+                    (url, id_func(url), status, now, self.batch)
+                )
+                added += 1
+        return added
+
+    def requeue_done(self) -> int:
+        """增量模式：把本批次中已完成的任务重新设为待处理，返回数量"""
+        with self._conn:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ? WHERE batch = ? AND status = ?',
+                (STATUS_PENDING, self.batch, STATUS_DONE)
+            )
+        return cursor.rowcount
+
+    def pending(self, max_attempts: int) -> List[Dict]:
+        """本批次中可以领取的任务（按加入顺序）"""
+        rows = self._conn.execute(
+            f'SELECT * FROM jobs WHERE {_CLAIMABLE} ORDER BY enqueued_at, rowid',
+            self._claim_params(max_attempts)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_next(self, max_attempts: int) -> Optional[Dict]:
+        """
+        领取下一个任务并标记为运行中（单条 UPDATE ... RETURNING，原子操作）
+
+        Returns:
+            dict: 任务记录；没有可领取的任务时返回None
+        """
+        params = dict(self._claim_params(max_attempts), running=STATUS_RUNNING, now=time.time())
+        with self._conn:
+            row = self._conn.execute(
+                'UPDATE jobs SET status = :running, attempts = attempts + 1, started_at = :now, '
+                'finished_at = NULL '
+                f'WHERE url = (SELECT url FROM jobs WHERE {_CLAIMABLE} ORDER BY enqueued_at, rowid LIMIT 1) '
+                'RETURNING *',
+                params
+            ).fetchone()
+        return dict(row) if row else None
+
+    def _claim_params(self, max_attempts: int) -> Dict:
+        return {'batch': self.batch, 'max_attempts': max_attempts, 'batch_started': self.batch_started}
+
+    def recover_interrupted(self) -> int:
+        """把上次崩溃时仍处于运行中的任务重置为待处理，返回重置的数量"""
+        with self._conn:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ? WHERE status = ?',
+                (STATUS_PENDING, STATUS_RUNNING)
+            )
+        return cursor.rowcount
+
+    def get(self, url: str) -> Optional[Dict]:
+        row = self._conn.execute('SELECT * FROM jobs WHERE url = ?', (url,)).fetchone()
+        return dict(row) if row else None
+
+    def mark_done(self, url: str, markdown_path: str = None, json_path: str = None):
+        """标记完成并清零尝试次数：重试上限只计算上次成功之后的连续失败"""
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, attempts = 0, last_error = NULL, finished_at = ?, '
+                'duration = ? - started_at, markdown_path = ?, json_path = ? WHERE url = ?',
+                (STATUS_DONE, now, now, markdown_path, json_path, url)
+            )
+
+    def mark_failed(self, url: str, error: str):
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, last_error = ?, finished_at = ?, duration = ? - started_at '
+                'WHERE url = ?',
+                (STATUS_FAILED, str(error)[:1000], now, now, url)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        rows = self._conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
@@ -0,0 +1,72 @@
+"""
+Playwright 启动缓存
+把浏览器安装检查结果和上一次成功的启动方案保存到磁盘，
+以 Playwright 版本和浏览器可执行文件的修改时间为键，升级或重装浏览器后自动失效
+"""
+import json
+import os
+from importlib import metadata
+from pathlib import Path
+
+
+def compute_cache_key(playwright) -> str:
+    """
+    根据 Playwright 版本和各浏览器可执行文件的修改时间生成缓存键
+    """
+    try:
+        version = metadata.version('playwright')
+    except metadata.PackageNotFoundError:
+        version = 'unknown'
+
+    parts = [f"playwright={version}"]
+    for browser_type in (playwright.firefox, playwright.chromium):
+        try:
+            executable = browser_type.executable_path
+            mtime = os.path.getmtime(executable) if os.path.exists(executable) else 'missing'
+        except Exception:
+            mtime = 'missing'
+        parts.append(f"{browser_type.name}={mtime}")
+    return '|'.join(parts)
+
+
+class LaunchCache:
+    """
+    磁盘上的启动缓存
+    缓存键变化时，旧条目整体作废
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, key: str) -> dict:
+        """返回与缓存键匹配的条目，不匹配时返回空字典"""
+        return self.data if self.data.get('key') == key else {}
+
+    def update(self, key: str, **fields):
+        """更新缓存条目并写回磁盘"""
+        if self.data.get('key') != key:
+            self.data = {'key': key}
+        self.data.update(fields)
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠️ 写入启动缓存失败: {e}")
+
+
+def order_attempts(attempts: list, preferred_name: str) -> list:
+    """把上次成功的启动方案排到最前面，其余保持原有顺序"""
+    if not preferred_name:
+        return list(attempts)
+    preferred = [attempt for attempt in attempts if attempt['name'] == preferred_name]
+    others = [attempt for attempt in attempts if attempt['name'] != preferred_name]
+    return preferred + others
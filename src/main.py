@@ -1,23 +1,37 @@
 """
 主程序入口
 """
-import json
+import argparse
 import asyncio
 import sys
 import time
+from contextlib import AsyncExitStack
 from datetime import datetime, timedelta
 from pathlib import Path
 from playwright.async_api import async_playwright
 
 from config import Config
-from login import auto_login, check_login_status
-from scraper import load_all_comments, extract_comments
-from image_processor import process_images_in_content, process_images_in_content_obsidian, create_markdown_from_html
+from browser_pool import BrowserPool
+from job_queue import JobQueue
+from launch_cache import LaunchCache, compute_cache_key
+from concurrency import HostRateLimiter, OrderedPostLogger, install_request_throttling
+from resource_blocker import install_resource_blocking
+from scraper import load_all_comments, extract_comments, extract_comments_with_api, clean_comment_html
+from comment_api import CommentResponseRecorder
+from http_fetcher import HttpPostFetcher
+from incremental import load_previous_output, collect_known_ids, merge_comment_trees
+from output_writer import OutputManifest, atomic_write_text, compute_content_hash
+from stream_store import save_thread_data, thread_file_in
+from image_downloader import AsyncImageDownloader, download_post_images
+from html_normalizer import normalize_post
+from image_harvester import BrowserImageHarvester
+from pipeline import RenderStage, prefetch_images, prefetch_comment_images
+from markdown_renderer import render_obsidian_markdown
+from render_pool import RenderPool, run_cpu
 from obsidian_helpers import (
     parse_relative_time_to_date,
     sanitize_title_for_filename,
     generate_obsidian_filename,
-    generate_yaml_frontmatter,
     OBSIDIAN_ARTICLES_DIR,
     OBSIDIAN_ATTACHMENTS_DIR
 )
@@ -172,150 +186,18 @@ def get_output_filename(url: str) -> str:
 def is_already_processed(url: str, output_dir: Path) -> bool:
     """
     检查URL是否已经被处理过（输出文件是否存在）
+    抓取结果保存在 output/<id>/data.json 或 data.ndjson，同时兼容旧的 output/post_<id>.json
     """
-    filename = get_output_filename(url)
-    output_file = output_dir / filename
-    return output_file.exists()
-
-
-def process_post_images_obsidian(post_content: dict, base_url: str) -> dict:
-    """处理主帖内容中的图片（Obsidian统一附件管理模式）"""
-    if not post_content or 'content' not in post_content:
-        return post_content
-    
-    processed_content = post_content.copy()
-    processed_content['content'] = process_images_in_content_obsidian(
-        post_content['content'], base_url
-    )
-    return processed_content
-
-
-def process_comment_replies_images_obsidian(replies: list, base_url: str) -> list:
-    """递归处理回复中的图片（Obsidian统一附件管理模式）"""
-    processed_replies = []
-    for reply in replies:
-        processed_reply = reply.copy()
-        if 'text' in reply:
-            processed_reply['text'] = process_images_in_content_obsidian(
-                reply['text'], base_url
-            )
-        # 递归处理嵌套回复
-        if 'replies' in reply and reply['replies']:
-            processed_reply['replies'] = process_comment_replies_images_obsidian(reply['replies'], base_url)
-        processed_replies.append(processed_reply)
-    return processed_replies
-
-
-def process_comments_images_obsidian(comments: list, base_url: str) -> list:
-    """处理评论中的图片（Obsidian统一附件管理模式）"""
-    processed_comments = []
-    for comment in comments:
-        processed_comment = comment.copy()
-        if 'text' in comment:
-            processed_comment['text'] = process_images_in_content_obsidian(
-                comment['text'], base_url
-            )
-        # 处理回复
-        if 'replies' in comment and comment['replies']:
-            processed_comment['replies'] = process_comment_replies_images_obsidian(comment['replies'], base_url)
-        processed_comments.append(processed_comment)
-    return processed_comments
-
-
-def process_post_images(post_content: dict, base_url: str, images_folder: Path) -> dict:
-    """处理主帖内容中的图片（向后兼容）"""
-    if not post_content or 'content' not in post_content:
-        return post_content
-    
-    processed_content = post_content.copy()
-    processed_content['content'] = process_images_in_content(
-        post_content['content'], base_url, images_folder
-    )
-    return processed_content
-
-
-def process_comments_images(comments: list, base_url: str, images_folder: Path) -> list:
-    """处理评论中的图片（向后兼容）"""
-    processed_comments = []
-    for comment in comments:
-        processed_comment = comment.copy()
-        if 'text' in comment:
-            processed_comment['text'] = process_images_in_content(
-                comment['text'], base_url, images_folder
-            )
-        # 处理回复（向后兼容）
-        if 'replies' in comment and comment['replies']:
-            processed_comment['replies'] = process_comments_images(comment['replies'], base_url, images_folder)
-        processed_comments.append(processed_comment)
-    return processed_comments
-
-
-def render_comment_replies(replies: list, indent_level: int = 1) -> str:
-    """递归渲染评论回复"""
-    if not replies:
-        return ""
-    
-    reply_content = []
-    indent = "  " * indent_level  # 缩进表示层级
-    
-    for reply in replies:
-        if 'author' in reply:
-            reply_content.append(f"\n{indent}**{reply['author']}** 回复：\n\n")
-        
-        if 'text' in reply:
-            reply_markdown = create_markdown_from_html(reply['text'])
-            # 为回复内容添加缩进
-            indented_reply = '\n'.join(f"{indent}{line}" for line in reply_markdown.split('\n'))
-            reply_content.append(indented_reply)
-        
-        if 'timestamp' in reply:
-            reply_content.append(f"\n{indent}*发布时间: {reply['timestamp']}*\n\n")
-        
-        # 递归处理嵌套回复
-        if 'replies' in reply and reply['replies']:
-            reply_content.append(render_comment_replies(reply['replies'], indent_level + 1))
-    
-    return ''.join(reply_content)
+    post_id = extract_post_id(url)
+    if thread_file_in(output_dir / post_id):
+        return True
+    return (output_dir / get_output_filename(url)).exists()
 
 
 def generate_obsidian_markdown_file(post_content: dict, comments: list, url: str, markdown_file: Path):
     """生成完全符合Obsidian标准的Markdown文件，包含YAML frontmatter"""
-    markdown_content = []
-    
-    # 生成YAML frontmatter
-    yaml_frontmatter = generate_yaml_frontmatter(post_content, url)
-    markdown_content.append(yaml_frontmatter)
-    
-    # 添加标题和主帖内容
-    if post_content and 'content' in post_content:
-        markdown_content.append("# 主帖内容\n\n")
-        post_markdown = create_markdown_from_html(post_content['content'])
-        markdown_content.append(post_markdown)
-        markdown_content.append("\n---\n\n")
-    
-    # 添加评论
-    if comments:
-        markdown_content.append("## 评论\n\n")
-        for i, comment in enumerate(comments, 1):
-            if 'author' in comment:
-                markdown_content.append(f"### {comment['author']}\n\n")
-            
-            if 'text' in comment:
-                comment_markdown = create_markdown_from_html(comment['text'])
-                markdown_content.append(comment_markdown)
-            
-            if 'timestamp' in comment:
-                markdown_content.append(f"\n*发布时间: {comment['timestamp']}*\n\n")
-            
-            # 添加回复
-            if 'replies' in comment and comment['replies']:
-                markdown_content.append(render_comment_replies(comment['replies']))
-            
-            markdown_content.append("---\n\n")
-    
-    # 写入文件
-    with open(markdown_file, 'w', encoding='utf-8') as f:
-        f.write(''.join(markdown_content))
+    # 写入文件（临时文件+重命名，Obsidian不会读到写了一半的文件）
+    atomic_write_text(markdown_file, render_obsidian_markdown(post_content, comments, url))
 
 
 def generate_markdown_file(post_content: dict, comments: list, markdown_file: Path):
@@ -325,20 +207,129 @@ def generate_markdown_file(post_content: dict, comments: list, markdown_file: Pa
     generate_obsidian_markdown_file(post_content, comments, url, markdown_file)
 
 
+async def save_post_outputs(url: str, unique_post_id: str, post_content: dict, comments: list,
+                            image_downloader: AsyncImageDownloader = None, captured_images: dict = None,
+                            render_pool: RenderPool = None) -> dict:
+    """
+    处理图片并生成 Obsidian Markdown 和 JSON 输出
+    浏览器抓取和HTTP抓取共用这一输出阶段
+    内容哈希与输出清单中的记录一致时跳过写入
+    
+    Args:
+        image_downloader: 批次共享的异步图片下载器，未提供时临时创建一个
+        captured_images: 浏览器加载页面时收到的图片响应（URL -> CapturedImage）
+        render_pool: HTML处理和Markdown渲染使用的进程池，未提供时在当前线程执行
+    
+    Returns:
+        dict: 完整的输出数据（unchanged 表示本次没有重写文件）
+    """
+    if image_downloader is None:
+        async with AsyncImageDownloader(Config) as own_downloader:
+            return await save_post_outputs(url, unique_post_id, post_content, comments,
+                                           own_downloader, captured_images, render_pool)
+    
+    # Phase 4: 安全的文件命名系统
+    
+    # 确保输出目录存在
+    OBSIDIAN_ARTICLES_DIR.mkdir(parents=True, exist_ok=True)
+    OBSIDIAN_ATTACHMENTS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # 使用Obsidian统一附件管理模式处理图片（正文和所有评论的图片并行下载）
+    image_replacements = await download_post_images(
+        post_content, comments, url, image_downloader, captured_images=captured_images
+    )
+    
+    # 每个HTML片段只解析一次：清理系统链接、改写图片路径、生成Markdown（在渲染进程池中执行）
+    processed_content, processed_comments, markdown_text = await run_cpu(
+        render_pool, normalize_post, post_content, comments, url, image_replacements
+    )
+    
+    # Phase 4: 从页面内容获取可读标题（不从URL解码）
+    page_title = processed_content.get('title', '') or 'Untitled Post'
+    print(f"📝 页面标题: {page_title}")
+    
+    # Phase 4: 生成安全的文件名
+    relative_time = processed_content.get('timestamp', '')
+    published_date = parse_relative_time_to_date(relative_time)
+    safe_markdown_filename = generate_safe_markdown_filename(page_title, published_date)
+    print(f"📄 安全文件名: {safe_markdown_filename}")
+    
+    # Phase 4: 使用安全的文件名
+    markdown_file = OBSIDIAN_ARTICLES_DIR / safe_markdown_filename
+    
+    # Phase 4: 使用唯一数字ID作为文件夹名（向后兼容）
+    legacy_output_folder = Config.OUTPUT_DIR / unique_post_id
+    
+    # 构建完整的输出数据
+    output_data = {
+        'url': url,
+        'scraped_at': datetime.now().isoformat(),
+        'post': processed_content,
+        'total_comments': len(processed_comments),
+        'comments': processed_comments
+    }
+    
+    # 内容没有变化时保留上次的文件，不触发 Obsidian 重新索引和同步
+    manifest = OutputManifest(Config.OUTPUT_MANIFEST_FILE)
+    content_hash = compute_content_hash(processed_content, processed_comments, OBSIDIAN_ATTACHMENTS_DIR)
+    if manifest.is_unchanged(unique_post_id, content_hash):
+        entry = manifest.get(unique_post_id)
+        output_data['markdown_file'] = entry['markdown_file']
+        output_data['json_file'] = entry['json_file']
+        output_data['unchanged'] = True
+        print(f"⏸️ 内容未变化，跳过写入: {Path(entry['markdown_file']).name}")
+        print(f"📊 抓取到 {output_data['total_comments']} 条评论")
+        return output_data
+    
+    # 写入完整的Obsidian兼容Markdown文件
+    atomic_write_text(markdown_file, markdown_text)
+    
+    # 保存JSON数据（data.json，或大帖子逐行写出的 data.ndjson）
+    json_file = save_thread_data(legacy_output_folder, output_data, Config.OUTPUT_FORMAT)
+    manifest.record(unique_post_id, content_hash, markdown_file, json_file)
+    
+    # 输出路径只返回给调用方，不写入 data.json
+    output_data['markdown_file'] = str(markdown_file)
+    output_data['json_file'] = str(json_file)
+    output_data['unchanged'] = False
+    
+    # 报告输出结果
+    print(f"✅ Obsidian文件已保存: {markdown_file.name}")
+    print(f"📊 抓取到 {output_data['total_comments']} 条评论")
+    print(f"📁 输出位置:")
+    print(f"   📄 Obsidian文章: {markdown_file}")
+    print(f"   📦 原始数据: {json_file}")
+    
+    if OBSIDIAN_ATTACHMENTS_DIR.exists() and any(OBSIDIAN_ATTACHMENTS_DIR.iterdir()):
+        image_count = len(list(OBSIDIAN_ATTACHMENTS_DIR.glob('*')))
+        print(f"🖼️  统一附件库: {image_count} 个图片")
+    
+    return output_data
+
+
 async def check_playwright_installation():
     """
     检查 Playwright 浏览器是否正确安装
+    结果按 Playwright 版本和浏览器可执行文件修改时间缓存，未变化时跳过实际启动检查
     """
     browsers_to_check = [
         ('firefox', 'Firefox'),
         ('chromium', 'Chromium')
     ]
     
-    available_browsers = []
+    launch_cache = LaunchCache(Config.LAUNCH_CACHE_FILE)
     
-    for browser_type, browser_name in browsers_to_check:
-        try:
-            async with async_playwright() as p:
+    async with async_playwright() as p:
+        cache_key = compute_cache_key(p)
+        cached_browsers = launch_cache.get(cache_key).get('available_browsers')
+        if cached_browsers:
+            print(f"⚡ 使用缓存的浏览器检查结果: {', '.join(cached_browsers)}")
+            return True
+        
+        available_browsers = []
+        
+        for browser_type, browser_name in browsers_to_check:
+            try:
                 print(f"🔍 检查 {browser_name} 浏览器安装状态...")
                 if browser_type == 'firefox':
                     browser = await p.firefox.launch(headless=True, timeout=15000)
@@ -351,10 +342,11 @@ async def check_playwright_installation():
                 await browser.close()
                 print(f"✅ {browser_name} 浏览器可用")
                 available_browsers.append(browser_type)
-        except Exception as e:
-            print(f"❌ {browser_name} 浏览器不可用: {e}")
+            except Exception as e:
+                print(f"❌ {browser_name} 浏览器不可用: {e}")
     
     if available_browsers:
+        launch_cache.update(cache_key, available_browsers=available_browsers)
         print(f"✅ 可用浏览器: {', '.join(available_browsers)}")
         return True
     else:
@@ -363,154 +355,104 @@ async def check_playwright_installation():
         return False
 
 
-async def process_single_url(url: str) -> dict:
+def get_previous_json_path(url: str, job: dict = None) -> Path:
+    """上一次抓取结果的位置：优先使用任务表记录的路径"""
+    if job and job.get('json_path'):
+        return Path(job['json_path'])
+    post_folder = Config.OUTPUT_DIR / extract_post_id(url)
+    return thread_file_in(post_folder) or post_folder / 'data.json'
+
+
+def merge_with_previous(previous_data: dict, comments: list) -> list:
+    """把本次抓取的评论合并进上一次保存的评论树"""
+    merged, added_count = merge_comment_trees(previous_data.get('comments', []), comments)
+    print(f"🔄 增量合并: 新增 {added_count} 条评论")
+    return merged
+
+
+async def process_single_url(url: str, pool: BrowserPool = None, http_fetcher: HttpPostFetcher = None,
+                             previous_json: Path = None, image_downloader: AsyncImageDownloader = None) -> dict:
     """
-    处理单个URL的完整流程
+    处理单个URL的完整流程：抓取阶段 + 输出阶段
+    如果提供了浏览器池则从池中借用页面，否则临时创建一个只服务本URL的池；
+    如果提供了HTTP抓取器则优先走无浏览器路径；
+    如果提供了上一次的 data.json 则增量抓取，只加载新评论并合并
+    """
+    if pool is None:
+        async with BrowserPool(Config) as own_pool:
+            return await process_single_url(url, own_pool, http_fetcher, previous_json, image_downloader)
+    if image_downloader is None:
+        async with AsyncImageDownloader(Config) as own_downloader:
+            return await process_single_url(url, pool, http_fetcher, previous_json, own_downloader)
+    
+    scraped = await scrape_post(url, pool, http_fetcher, previous_json, image_downloader)
+    return await save_post_outputs(image_downloader=image_downloader, **scraped)
+
+
+async def scrape_post(url: str, pool: BrowserPool, http_fetcher: HttpPostFetcher = None,
+                      previous_json: Path = None, image_downloader: AsyncImageDownloader = None,
+                      rate_limiter: HostRateLimiter = None) -> dict:
+    """
+    抓取阶段：获取帖子正文和评论树，页面在返回前归还给浏览器池
+    提取到的图片立即提交给下载器，在评论加载和后续阶段期间并行下载
+    
+    Returns:
+        dict: url、unique_post_id、post_content、comments、captured_images，可直接传给 save_post_outputs
     """
     print(f"🔍 正在处理: {url}")
     
-    # 尝试使用 Firefox 而不是 Chromium
-    async with async_playwright() as p:
-        # 1. 启动浏览器
-        # macOS 优化的浏览器启动参数
-        browser_args = [
-            '--no-sandbox',
-            '--disable-dev-shm-usage',
-            '--disable-web-security', 
-            '--disable-extensions',
-            '--no-first-run',
-            '--disable-default-apps',
-            '--disable-background-timer-throttling',
-            '--disable-backgrounding-occluded-windows',
-            '--disable-renderer-backgrounding',
-            '--disable-features=TranslateUI',
-            '--disable-ipc-flooding-protection',
-            '--enable-features=NetworkService,NetworkServiceInProcess',
-            '--force-color-profile=srgb',
-            '--disable-background-networking',
-            '--disable-client-side-phishing-detection',
-            '--disable-component-update',
-            '--disable-sync',
-            '--metrics-recording-only',
-            '--no-default-browser-check',
-            '--no-service-autorun',
-            '--password-store=basic',
-            '--use-mock-keychain'
-        ]
-        
-        print("🚀 启动浏览器...")
-        browser = None
-        
-        # 尝试不同的浏览器和参数组合
-        browser_attempts = [
-            # 尝试1: Firefox（通常比 Chromium 更稳定）
-            {
-                'type': 'firefox',
-                'args': [],
-                'headless': Config.HEADLESS,
-                'name': 'Firefox'
-            },
-            # 尝试2: Chromium 最小参数
-            {
-                'type': 'chromium', 
-                'args': ['--no-sandbox'],
-                'headless': True,
-                'name': 'Chromium (最小参数)'
-            },
-            # 尝试3: Chromium 完整参数
-            {
-                'type': 'chromium',
-                'args': browser_args,
-                'headless': Config.HEADLESS,
-                'name': 'Chromium (完整参数)'
-            }
-        ]
-        
-        for i, attempt in enumerate(browser_attempts, 1):
-            try:
-                print(f"🔄 尝试启动 {attempt['name']} (方案 {i}/{len(browser_attempts)})")
-                
-                if attempt['type'] == 'firefox':
-                    browser = await p.firefox.launch(
-                        headless=attempt['headless'],
-                        timeout=60000
-                    )
-                else:  # chromium
-                    browser = await p.chromium.launch(
-                        headless=attempt['headless'],
-                        args=attempt['args'],
-                        timeout=60000
-                    )
-                
-                print(f"✅ {attempt['name']} 启动成功")
-                break
-                
-            except Exception as e:
-                print(f"❌ {attempt['name']} 启动失败: {e}")
-                if i == len(browser_attempts):
-                    raise Exception("所有浏览器启动尝试都失败了")
-                continue
-        
+    # 增量模式：读取上一次的结果，用评论ID判断哪些评论已经抓取过
+    previous_data = load_previous_output(previous_json) if previous_json else None
+    known_ids = collect_known_ids(previous_data.get('comments', [])) if previous_data else set()
+    if previous_data:
+        if known_ids:
+            print(f"🔄 增量抓取: 上一次已有 {len(known_ids)} 条带ID的评论")
+        else:
+            print("⚠️ 上一次的结果没有评论ID，执行完整抓取后合并")
+    
+    # 无浏览器HTTP抓取：直接请求帖子和评论接口，失败时退回浏览器
+    if http_fetcher is not None:
         try:
-            # 2. 创建上下文（尝试使用已保存的会话）
-            context_options = {
-                'viewport': {'width': 1920, 'height': 1080},
-                'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'ignore_https_errors': True
+            unique_post_id = extract_post_id(url)
+            post_content, comments = await http_fetcher.fetch_post(url, unique_post_id, clean_comment_html)
+            if image_downloader is not None:
+                prefetch_images(image_downloader, post_content.get('content', ''), url)
+                prefetch_comment_images(image_downloader, comments, url)
+            if previous_data:
+                comments = merge_with_previous(previous_data, comments)
+            return {
+                'url': url,
+                'unique_post_id': unique_post_id,
+                'post_content': post_content,
+                'comments': comments,
+                'captured_images': None
             }
-            
-            # 先检查会话文件是否有效
-            if Config.AUTH_FILE.exists():
-                print("📂 找到保存的登录状态，尝试使用...")
-                try:
-                    with open(Config.AUTH_FILE, 'r') as f:
-                        storage_state = json.load(f)
-                    context_options['storage_state'] = storage_state
-                except Exception as e:
-                    print(f"⚠️  会话文件读取失败，将重新登录: {e}")
-                    if Config.AUTH_FILE.exists():
-                        Config.AUTH_FILE.unlink()  # 删除损坏的会话文件
-            
-            print("🔧 创建浏览器上下文...")
-            context = await browser.new_context(**context_options)
-            print("✅ 浏览器上下文创建成功")
-            
-            print("📄 创建新页面...")
-            # 增加重试机制
-            page = None
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    page = await context.new_page()
-                    print("✅ 页面创建成功")
-                    break
-                except Exception as e:
-                    print(f"⚠️ 页面创建失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        print("🔄 等待后重试...")
-                        await asyncio.sleep(2)
-                    else:
-                        raise Exception(f"页面创建失败，已重试{max_retries}次: {e}")
-            
-            if not page:
-                raise Exception("页面创建失败")
-            
-            # 设置超时
-            page.set_default_timeout(Config.TIMEOUT)
-            
-            # 3. 检查/执行登录
-            login_needed = True
-            if Config.AUTH_FILE.exists():
-                print("🔍 检查登录状态...")
-                login_needed = not await check_login_status(page, Config)
-            
-            if login_needed:
-                print("🔑 需要重新登录...")
-                login_success = await auto_login(page, Config)
-                if not login_success:
-                    raise Exception("登录失败")
-            else:
-                print("✅ 已登录状态有效")
+        except Exception as e:
+            print(f"⚠️ HTTP抓取失败，改用浏览器抓取: {e}")
+    
+    # 1-2. 从浏览器池借用页面（浏览器和上下文由池负责启动、健康检查和轮换）
+    async with pool.page() as page:
+        try:
+            # 拦截提取器用不到的资源（字体、视频、统计脚本等），登录检查和目标页面都生效
+            resource_blocker = await install_resource_blocking(page, Config)
+            # 页面内的文档和接口请求（评论加载、翻页）按主机限速，在资源拦截之前执行
+            if rate_limiter is not None:
+                await install_request_throttling(page, rate_limiter)
+            
+            # 3. 检查/执行登录（每个上下文只检查一次）
+            await pool.ensure_session(page)
+            
+            # 接口捕获模式：在访问目标页面之前开始记录评论接口响应
+            comment_recorder = None
+            if Config.COMMENT_SOURCE == 'network':
+                comment_recorder = CommentResponseRecorder(Config.COMMENT_API_PATTERN)
+                comment_recorder.attach(page)
+            
+            # 图片收集模式：保存浏览器加载页面时收到的图片，之后只下载没加载过的图片
+            image_harvester = None
+            if Config.HARVEST_BROWSER_IMAGES:
+                image_harvester = BrowserImageHarvester()
+                image_harvester.attach(page)
             
             # 4. 访问目标URL
             print(f"📖 访问目标页面: {url}")
@@ -532,84 +474,55 @@ async def process_single_url(url: str) -> dict:
             from scraper import extract_post_content
             post_content = await extract_post_content(page)
             
-            # 7. 加载所有评论
-            await load_all_comments(page, Config)
-            
-            # 8. 提取评论数据
-            comments = await extract_comments(page)
+            # 正文图片立即开始下载，与评论加载并行（收集浏览器图片时由页面自己加载）
+            prefetch = image_downloader is not None and image_harvester is None
+            if prefetch:
+                submitted = prefetch_images(image_downloader, post_content.get('content', ''), url)
+                if submitted:
+                    print(f"🖼️ 已提交 {submitted} 个正文图片，评论加载期间并行下载")
             
-            # 9. Phase 4: 安全的文件命名系统
+            # 7. 加载所有评论（接口捕获模式下正文来自接口，无需展开"more"）
+            #    增量模式下遇到已知评论即停止翻页
+            await load_all_comments(page, Config, expand_more=comment_recorder is None, known_ids=known_ids)
             
-            # 确保输出目录存在
-            OBSIDIAN_ARTICLES_DIR.mkdir(parents=True, exist_ok=True)
-            OBSIDIAN_ATTACHMENTS_DIR.mkdir(parents=True, exist_ok=True)
-            
-            # 使用Obsidian统一附件管理模式处理图片
-            processed_content = process_post_images_obsidian(post_content, url)
-            processed_comments = process_comments_images_obsidian(comments, url)
-            
-            # Phase 4: 从页面内容获取可读标题（不从URL解码）
-            page_title = processed_content.get('title', '') or 'Untitled Post'
-            print(f"📝 页面标题: {page_title}")
+            # 8. 提取评论数据
+            if comment_recorder:
+                comments = await extract_comments_with_api(page, Config, comment_recorder)
+            else:
+                comments = await extract_comments(page)
             
-            # Phase 4: 生成安全的文件名
-            relative_time = processed_content.get('timestamp', '')
-            published_date = parse_relative_time_to_date(relative_time)
-            safe_markdown_filename = generate_safe_markdown_filename(page_title, published_date)
-            print(f"📄 安全文件名: {safe_markdown_filename}")
+            if prefetch:
+                prefetch_comment_images(image_downloader, comments, url)
             
-            # Phase 4: 使用安全的文件名
-            markdown_file = OBSIDIAN_ARTICLES_DIR / safe_markdown_filename
+            if previous_data:
+                comments = merge_with_previous(previous_data, comments)
             
-            # 生成完整的Obsidian兼容Markdown文件
-            generate_obsidian_markdown_file(processed_content, processed_comments, url, markdown_file)
+            captured_images = await image_harvester.drain() if image_harvester else None
             
-            # Phase 4: 使用唯一数字ID作为文件夹名（向后兼容）
-            legacy_output_folder = Config.OUTPUT_DIR / unique_post_id
-            legacy_output_folder.mkdir(parents=True, exist_ok=True)
+            if resource_blocker:
+                resource_blocker.report()
             
-            # 构建完整的输出数据
-            output_data = {
+            # 9. 图片处理和 Obsidian Markdown / JSON 输出由调用方在输出阶段完成
+            return {
                 'url': url,
-                'scraped_at': datetime.now().isoformat(),
-                'post': processed_content,
-                'total_comments': len(processed_comments),
-                'comments': processed_comments
+                'unique_post_id': unique_post_id,
+                'post_content': post_content,
+                'comments': comments,
+                'captured_images': captured_images
             }
             
-            # 保存JSON数据（向后兼容）
-            json_file = legacy_output_folder / 'data.json'
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
-            
-            # 报告输出结果
-            print(f"✅ Obsidian文件已保存: {markdown_file.name}")
-            print(f"📊 抓取到 {output_data['total_comments']} 条评论")
-            print(f"📁 输出位置:")
-            print(f"   📄 Obsidian文章: {markdown_file}")
-            print(f"   📦 原始数据: {json_file}")
-            
-            if OBSIDIAN_ATTACHMENTS_DIR.exists() and any(OBSIDIAN_ATTACHMENTS_DIR.iterdir()):
-                image_count = len(list(OBSIDIAN_ATTACHMENTS_DIR.glob('*')))
-                print(f"🖼️  统一附件库: {image_count} 个图片")
-            
-            return output_data
-            
         except Exception as e:
             print(f"❌ 处理过程中发生错误: {e}")
             raise
-        finally:
-            try:
-                print("🔄 正在关闭浏览器...")
-                await browser.close()
-                print("✅ 浏览器已关闭")
-            except Exception as e:
-                print(f"⚠️  关闭浏览器时出错: {e}")
 
 
-async def main():
+async def main(concurrency: int = None, incremental: bool = None):
     """
     主函数：从test_urls.txt读取URL并处理
+    
+    Args:
+        concurrency: 同时处理的帖子数，默认使用 Config.CONCURRENCY
+        incremental: 是否增量刷新已处理的帖子，默认使用 Config.INCREMENTAL
     """
     try:
         # 检查 Playwright 安装
@@ -647,65 +560,128 @@ async def main():
         
         print(f"📋 找到 {len(urls)} 个URL待处理")
         
-        # 检查每个URL的处理状态
-        urls_to_process = []
-        skipped_count = 0
+        # 把URL加入持久化任务队列（已有输出的新URL直接记为完成）
+        job_queue = JobQueue(Config.JOB_DB_FILE)
+        recovered_count = job_queue.recover_interrupted()
+        if recovered_count > 0:
+            print(f"🔁 恢复了 {recovered_count} 个上次中断的任务")
+        added_count = job_queue.enqueue(
+            urls, extract_post_id,
+            done_func=lambda url: is_already_processed(url, Config.OUTPUT_DIR)
+        )
+        print(f"🗂️ 任务队列: 新加入 {added_count} 个任务")
         
-        for url in urls:
-            if is_already_processed(url, Config.OUTPUT_DIR):
-                post_id = extract_post_id(url)
-                print(f"⏭️ 跳过已处理的帖子: {post_id} (文件已存在)")
-                skipped_count += 1
-            else:
-                urls_to_process.append(url)
+        # 增量模式下已完成的帖子也重新处理，只抓取新评论
+        incremental = Config.INCREMENTAL if incremental is None else incremental
+        if incremental:
+            requeued_count = job_queue.requeue_done()
+            print(f"🔄 增量模式：刷新 {requeued_count} 个已处理的帖子，只加载新评论")
+        
+        # 可领取的任务：待处理的任务，以及之前失败且未达到尝试上限的任务
+        pending_count = len(job_queue.pending(Config.JOB_MAX_ATTEMPTS))
+        skipped_count = len(set(urls)) - pending_count
         
         if skipped_count > 0:
-            print(f"� 跳过了 {skipped_count} 个已处理的URL")
+            print(f"⏭️ 跳过了 {skipped_count} 个已处理或多次失败的URL (最多尝试 {Config.JOB_MAX_ATTEMPTS} 次)")
         
-        if not urls_to_process:
+        if not pending_count:
             print("✅ 所有URL都已处理完成，无需重新抓取")
+            job_queue.close()
             return
             
-        print(f"🎯 需要处理 {len(urls_to_process)} 个新URL")
+        concurrency = max(1, concurrency or Config.CONCURRENCY)
+        print(f"🎯 需要处理 {pending_count} 个新URL (并发数: {concurrency})")
         
         # 循环处理所有未处理的URL
         successful_count = 0
         failed_count = 0
+        unchanged_count = 0
         
-        for i, url in enumerate(urls_to_process, 1):
-            try:
+        # 并发控制：最多同时处理 concurrency 个帖子，同一主机的请求之间保持最小间隔
+        semaphore = asyncio.Semaphore(concurrency)
+        rate_limiter = HostRateLimiter(Config.HOST_MIN_INTERVAL, Config.HOST_REQUEST_INTERVAL)
+        post_logger = OrderedPostLogger(start_index=1)
+        
+        async def process_one(i: int, url: str, pool: BrowserPool, http_fetcher: HttpPostFetcher,
+                              image_downloader: AsyncImageDownloader, render_stage: RenderStage,
+                              render_pool: RenderPool):
+            nonlocal successful_count, failed_count, unchanged_count
+            # 缓冲每个帖子的日志，完成后按输入顺序整段输出
+            # （并发数为1时渲染阶段也与下一个帖子的抓取重叠，同样需要缓冲）
+            with post_logger.capture(i):
                 post_id = extract_post_id(url)
-                print(f"\n🚀 开始处理第 {i}/{len(urls_to_process)} 个URL...")
-                print(f"🔍 正在处理帖子: {post_id}")
-                print(f"🌐 URL: {url}")
-                
-                result = await process_single_url(url)
-                
-                print(f"\n✅ 帖子 {post_id} 处理完成！")
-                print(f"   评论数: {result['total_comments']}")
-                print(f"   保存文件: {get_output_filename(url)}")
-                
-                successful_count += 1
-                
-                # 如果还有更多URL要处理，短暂等待
-                if i < len(urls_to_process):
-                    print("⏳ 等待2秒后处理下一个URL...")
-                    await asyncio.sleep(2)
+                try:
+                    # 抓取阶段占用并发名额（领取任务时获得），直到本帖进入渲染队列才释放；
+                    # 下一个帖子开始抓取时本帖在输出阶段处理图片和渲染，渲染队列已满时抓取暂停
+                    try:
+                        await rate_limiter.wait(url)
+                        print(f"\n🚀 开始处理第 {i}/{pending_count} 个URL...")
+                        print(f"🔍 正在处理帖子: {post_id}")
+                        print(f"🌐 URL: {url}")
+                        
+                        previous_json = get_previous_json_path(url, job_queue.get(url)) if incremental else None
+                        scraped = await scrape_post(url, pool, http_fetcher, previous_json, image_downloader, rate_limiter)
+                        render_future = await render_stage.enqueue(
+                            save_post_outputs, image_downloader=image_downloader, render_pool=render_pool, **scraped
+                        )
+                    finally:
+                        semaphore.release()
                     
-            except Exception as e:
-                post_id = extract_post_id(url)
-                print(f"\n❌ 处理帖子 {post_id} 时发生错误: {e}")
-                failed_count += 1
-                
-                # 继续处理下一个URL
-                continue
+                    result = await render_future
+                    
+                    print(f"\n✅ 帖子 {post_id} 处理完成！")
+                    print(f"   评论数: {result['total_comments']}")
+                    print(f"   保存文件: {result['json_file']}")
+                    
+                    job_queue.mark_done(url, result['markdown_file'], result['json_file'])
+                    successful_count += 1
+                    if result.get('unchanged'):
+                        unchanged_count += 1
+                    
+                except Exception as e:
+                    print(f"\n❌ 处理帖子 {post_id} 时发生错误: {e}")
+                    job_queue.mark_failed(url, e)
+                    failed_count += 1
+        
+        # 整个批次共享一个浏览器池（和HTTP连接池），避免每个URL重复启动浏览器
+        async with AsyncExitStack() as stack:
+            pool = await stack.enter_async_context(BrowserPool(Config))
+            image_downloader = await stack.enter_async_context(AsyncImageDownloader(Config))
+            render_stage = await stack.enter_async_context(RenderStage(workers=concurrency, max_pending=Config.RENDER_QUEUE_SIZE))
+            render_pool = await stack.enter_async_context(RenderPool(Config.RENDER_PROCESSES))
+            http_fetcher = None
+            if Config.FETCH_MODE == 'http':
+                if Config.AUTH_FILE.exists():
+                    print("🌐 HTTP抓取模式：复用已保存的会话，浏览器仅作为备用")
+                    http_fetcher = await stack.enter_async_context(HttpPostFetcher(Config, rate_limiter))
+                else:
+                    print("⚠️ 没有已保存的会话，HTTP抓取模式不可用，使用浏览器抓取")
+            
+            # 有空闲的抓取名额时才从任务队列领取下一个任务
+            with post_logger.install():
+                tasks = []
+                while True:
+                    await semaphore.acquire()
+                    job = job_queue.claim_next(Config.JOB_MAX_ATTEMPTS)
+                    if job is None:
+                        semaphore.release()
+                        break
+                    tasks.append(asyncio.ensure_future(process_one(
+                        len(tasks) + 1, job['url'], pool, http_fetcher, image_downloader, render_stage, render_pool
+                    )))
+                await asyncio.gather(*tasks)
+        
+        job_counts = job_queue.counts()
+        job_queue.close()
         
         # 显示最终统计
         print(f"\n🎉 批量处理完成！")
         print(f"📊 统计信息:")
         print(f"   ✅ 成功处理: {successful_count} 个")
+        print(f"   📝 输出写入: {successful_count - unchanged_count} 个, 内容未变化: {unchanged_count} 个")
         print(f"   ❌ 处理失败: {failed_count} 个")
         print(f"   ⏭️ 已跳过: {skipped_count} 个")
+        print(f"   🗂️ 任务队列: " + ', '.join(f"{status} {count}" for status, count in sorted(job_counts.items())))
         print(f"   📁 Obsidian文章目录: {OBSIDIAN_ARTICLES_DIR}")
         print(f"   🖼️  Obsidian附件目录: {OBSIDIAN_ATTACHMENTS_DIR}")
         print(f"   📦 原始数据目录: {Config.OUTPUT_DIR}")
@@ -724,4 +700,11 @@ if __name__ == "__main__":
     if sys.platform.startswith('win'):
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="抓取OneNewBite帖子及评论")
+    parser.add_argument('--concurrency', '-c', type=int, default=None,
+                        help='同时处理的帖子数（默认读取 CONCURRENCY 环境变量，为1时顺序处理）')
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help='增量刷新已处理的帖子，只加载上次之后的新评论（默认读取 INCREMENTAL 环境变量）')
+    args = parser.parse_args()
+    
+    asyncio.run(main(concurrency=args.concurrency, incremental=args.incremental))
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+HTML -> Markdown 转换缓存
+以 HTML片段 + 转换器名称/版本/选项 的哈希为键，内存 LRU 在前，SQLite 磁盘缓存在后：
+重新抓取或重新生成整个笔记库时，未变化的评论直接命中缓存，不再重复转换
+磁盘缓存超过大小上限时按最近使用时间淘汰
+"""
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from multiprocessing import util as multiprocessing_util
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from config import Config
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS markdown (
+    key TEXT PRIMARY KEY,
+    markdown TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_markdown_last_used ON markdown (last_used);
+"""
+
+# 命中时最多每隔这么久（秒）刷新一次最近使用时间，避免每次命中都写库
+TOUCH_INTERVAL = 3600
+# 新条目攒够这么多条再一次性写库（写锁只在批量写入期间持有，多个渲染进程互不阻塞）
+FLUSH_EVERY = 128
+# 每写入多少条检查一次磁盘缓存大小
+EVICT_CHECK_EVERY = 1024
+
+
+def make_cache_key(namespace: str, html: str) -> str:
+    """namespace 包含转换器名称、版本和选项，任一变化都会得到新的键"""
+    digest = hashlib.sha256(namespace.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(html.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class MarkdownCache:
+    """
+    两级转换缓存
+
+    用法:
+        cache = MarkdownCache(Config.MARKDOWN_CACHE_FILE, max_bytes=64 * 1024 * 1024)
+        markdown = cache.convert('wysiwyg:v1', html, wysiwyg_to_markdown)
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int, memory_items: int = 4096):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._pending = []
+        self._touched = []
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 渲染进程池中的多个进程可能同时写入，等待锁而不是立即失败
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Markdown磁盘缓存不可用，只使用内存缓存: {e}")
+            self._conn = None
+            return
+        # 进程退出时写入剩余条目（渲染进程池的工作进程退出时不执行 atexit，但会执行这里注册的回调）
+        self._finalizer = multiprocessing_util.Finalize(self, self.close, exitpriority=10)
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def get(self, key: str) -> Optional[str]:
+        markdown = self._memory.get(key)
+        if markdown is not None:
+            self._memory.move_to_end(key)
+            return markdown
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                'SELECT markdown, last_used FROM markdown WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            markdown, last_used = row
+            now = time.time()
+            if now - last_used > TOUCH_INTERVAL:
+                self._touched.append((now, key))
+        except sqlite3.Error as e:
+            print(f"⚠️ 读取Markdown缓存失败: {e}")
+            return None
+        self._remember(key, markdown)
+        return markdown
+
+    def put(self, key: str, markdown: str):
+        self._remember(key, markdown)
+        if self._conn is None:
+            return
+        self._pending.append((key, markdown, len(markdown.encode('utf-8', 'surrogatepass')), time.time()))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """把攒下的新条目和命中时间写入磁盘"""
+        if self._conn is None or not (self._pending or self._touched):
+            return
+        pending, self._pending = self._pending, []
+        touched, self._touched = self._touched, []
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO markdown (key, markdown, size, last_used) VALUES (?, ?, ?, ?)',
+                    pending
+                )
+                self._conn.executemany('UPDATE markdown SET last_used = ? WHERE key = ?', touched)
+            previous_writes = self._writes
+            self._writes += len(pending)
+            if self._writes // EVICT_CHECK_EVERY != previous_writes // EVICT_CHECK_EVERY:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"⚠️ 写入Markdown缓存失败: {e}")
+
+    def convert(self, namespace: str, html: str, convert_func: Callable[[str], str]) -> str:
+        """命中时返回缓存结果，否则调用 convert_func 并写入缓存（转换异常不缓存）"""
+        key = make_cache_key(namespace, html)
+        markdown = self.get(key)
+        if markdown is not None:
+            self.hits += 1
+            return markdown
+        self.misses += 1
+        markdown = convert_func(html)
+        self.put(key, markdown)
+        return markdown
+
+    def total_bytes(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM markdown').fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        磁盘缓存超过上限时，从最久未使用的条目开始删除，直到降到上限的 90%
+
+        Returns:
+            int: 删除的条目数
+        """
+        self.flush()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * 0.9
+        doomed = []
+        for key, size in self._conn.execute('SELECT key, size FROM markdown ORDER BY last_used'):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM markdown WHERE key = ?', doomed)
+        self._conn.commit()
+        for (key,) in doomed:
+            self._memory.pop(key, None)
+        return len(doomed)
+
+    def _remember(self, key: str, markdown: str):
+        self._memory[key] = markdown
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+
+_caches: Dict[Path, MarkdownCache] = {}
+
+
+def get_markdown_cache() -> Optional[MarkdownCache]:
+    """返回当前进程共享的缓存实例；配置关闭时返回 None"""
+    if not Config.MARKDOWN_CACHE:
+        return None
+    path = Path(Config.MARKDOWN_CACHE_FILE)
+    cache = _caches.get(path)
+    if cache is None:
+        cache = MarkdownCache(
+            path,
+            max_bytes=int(Config.MARKDOWN_CACHE_MAX_MB * 1024 * 1024),
+            memory_items=Config.MARKDOWN_CACHE_MEMORY_ITEMS
+        )
+        _caches[path] = cache
+    return cache
+
+
+def cached_markdown(namespace: str, html: str, convert_func: Callable[[str], str]) -> str:
+    """经过共享缓存执行转换；缓存关闭时直接转换"""
+    cache = get_markdown_cache()
+    if cache is None:
+        return convert_func(html)
+    return cache.convert(namespace, html, convert_func)
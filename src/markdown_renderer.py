@@ -0,0 +1,92 @@
+"""
+Markdown 渲染
+把帖子和评论树渲染为 Obsidian Markdown 的纯函数，
+都是模块顶层函数，可以直接提交到进程池在其他CPU核心上执行
+"""
+from image_processor import create_markdown_from_html
+from models import Comment, CommentTree
+from obsidian_helpers import generate_yaml_frontmatter
+
+
+def _default_markdown_of(node: dict, field: str) -> str:
+    return create_markdown_from_html(node[field])
+
+
+def _render_reply(reply: Comment, indent: str, markdown_of) -> str:
+    """渲染单条回复（不含其下的回复）"""
+    reply_content = []
+    keys = reply.keys()
+    if 'author' in keys:
+        reply_content.append(f"\n{indent}**{reply.author}** 回复：\n\n")
+    
+    if 'text' in keys:
+        reply_markdown = markdown_of(reply, 'text')
+        # 为回复内容添加缩进
+        reply_content.append('\n'.join(f"{indent}{line}" for line in reply_markdown.split('\n')))
+    
+    if 'timestamp' in keys:
+        reply_content.append(f"\n{indent}*发布时间: {reply.timestamp}*\n\n")
+    return ''.join(reply_content)
+
+
+def _render_replies(tree: CommentTree, start: int, end: int, base_depth: int, markdown_of) -> str:
+    """按先序渲染 tree 中 [start, end) 的回复，缩进为层级减去 base_depth"""
+    return ''.join(
+        _render_reply(tree.comments[index], "  " * (tree.depths[index] - base_depth), markdown_of)
+        for index in range(start, end)
+    )
+
+
+def render_comment_replies(replies: list, indent_level: int = 1, markdown_of=_default_markdown_of) -> str:
+    """
+    渲染评论回复（含嵌套回复，逐层增加缩进）
+    markdown_of(node, field) 返回节点字段的Markdown，默认即时转换
+    """
+    if not replies:
+        return ""
+    tree = replies if isinstance(replies, CommentTree) else CommentTree.from_legacy(replies)
+    return _render_replies(tree, 0, len(tree), -indent_level, markdown_of)
+
+
+def render_obsidian_markdown(post_content: dict, comments: list, url: str, markdown_of=_default_markdown_of) -> str:
+    """
+    生成完全符合Obsidian标准的Markdown内容，包含YAML frontmatter
+    comments 可以是旧版嵌套列表或 CommentTree
+    markdown_of(node, field) 返回节点字段的Markdown（html_normalizer 传入已生成的结果）
+    """
+    markdown_content = []
+    
+    # 生成YAML frontmatter
+    yaml_frontmatter = generate_yaml_frontmatter(post_content, url)
+    markdown_content.append(yaml_frontmatter)
+    
+    # 添加标题和主帖内容
+    if post_content and 'content' in post_content:
+        markdown_content.append("# 主帖内容\n\n")
+        post_markdown = markdown_of(post_content, 'content')
+        markdown_content.append(post_markdown)
+        markdown_content.append("\n---\n\n")
+    
+    # 添加评论
+    tree = comments if isinstance(comments, CommentTree) else CommentTree.from_legacy(comments or [])
+    if len(tree):
+        markdown_content.append("## 评论\n\n")
+        for index in tree.roots():
+            comment = tree.comments[index]
+            keys = comment.keys()
+            if 'author' in keys:
+                markdown_content.append(f"### {comment.author}\n\n")
+            
+            if 'text' in keys:
+                comment_markdown = markdown_of(comment, 'text')
+                markdown_content.append(comment_markdown)
+            
+            if 'timestamp' in keys:
+                markdown_content.append(f"\n*发布时间: {comment.timestamp}*\n\n")
+            
+            # 添加回复（子树是紧随其后的连续一段）
+            markdown_content.append(_render_replies(tree, index + 1, tree.ends[index], tree.depths[index], markdown_of))
+            
+            markdown_content.append("---\n\n")
+    
+    return ''.join(markdown_content)
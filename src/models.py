@@ -0,0 +1,241 @@
+"""
+帖子和评论的数据模型
+评论树以扁平数组保存：评论按先序排列，另外记录每条评论的父评论下标、层级和子树结束位置
+- 遍历是一次顺序扫描，不需要递归
+- 一条评论的子树是连续的一段 [i, end(i))，可以直接切片
+- Comment / Post 使用 __slots__，每条评论不再是一个带 replies 列表的字典
+与旧版 JSON（嵌套的 {'text','author','timestamp','replies'} 字典）之间可以互相转换：
+原字典的键、键顺序和值（包括显式的 None）都原样还原
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 用属性保存的字段，其他字段放在 extra 中
+COMMENT_FIELDS = ('text', 'author', 'timestamp', 'id', 'depth')
+POST_FIELDS = ('title', 'content', 'author', 'timestamp', 'url')
+_COMMENT_KEYS = frozenset(COMMENT_FIELDS + ('replies',))
+
+# 新建对象（不是由旧版字典转换而来）导出时的键顺序，与抓取时一致
+_DEFAULT_COMMENT_LAYOUT = ('text', 'author', 'timestamp', 'replies', 'id', 'depth')
+
+# 键顺序元组的驻留表：键相同的评论共用同一个元组
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _layout_of(data: Dict[str, Any]) -> Tuple[str, ...]:
+    layout = tuple(data)
+    return _layouts.setdefault(layout, layout)
+
+
+def _extra_of(data: Dict[str, Any], known: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    extra = {key: value for key, value in data.items() if key not in known}
+    return extra or None
+
+
+def iter_comments(comments: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """先序遍历旧版评论树中的每个评论字典（不复制、不递归）"""
+    stack = list(reversed(comments))
+    while stack:
+        comment = stack.pop()
+        yield comment
+        replies = comment.get('replies')
+        if replies:
+            stack.extend(reversed(replies))
+
+
+def count_comments(comments: List[Dict[str, Any]]) -> int:
+    """旧版评论树中的评论总数（包括嵌套回复）"""
+    return sum(1 for _ in iter_comments(comments))
+
+
+class Comment:
+    """
+    单条评论（不含回复，回复关系由 CommentTree 保存）
+    layout 记录旧版字典的键顺序，用于判断字段是否存在和原样还原；新建的评论为 None
+    """
+    __slots__ = ('text', 'author', 'timestamp', 'id', 'depth', 'extra', 'layout')
+
+    def __init__(self, text: Optional[str] = None, author: Optional[str] = None,
+                 timestamp: Optional[str] = None, id: Optional[str] = None, depth: Optional[int] = None,
+                 extra: Optional[Dict[str, Any]] = None, layout: Optional[Tuple[str, ...]] = None):
+        self.text = text
+        self.author = author
+        self.timestamp = timestamp
+        self.id = id
+        # 旧版字典中的 depth 字段（树中的层级见 CommentTree.depths）
+        self.depth = depth
+        self.extra = extra
+        self.layout = layout
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Comment':
+        comment = cls(data.get('text'), data.get('author'), data.get('timestamp'), data.get('id'),
+                      data.get('depth'), layout=_layout_of(data))
+        if not data.keys() <= _COMMENT_KEYS:
+            comment.extra = _extra_of(data, _COMMENT_KEYS)
+        return comment
+
+    def keys(self) -> Tuple[str, ...]:
+        """旧版字典的键（按原顺序，含 replies）"""
+        if self.layout is not None:
+            return self.layout
+        return tuple(key for key in _DEFAULT_COMMENT_LAYOUT
+                     if key == 'replies' or getattr(self, key) is not None) + tuple(self.extra or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """旧版字典（replies 为空列表，由 CommentTree.to_legacy 填充）"""
+        extra = self.extra or {}
+        return {key: [] if key == 'replies' else extra[key] if key in extra else getattr(self, key)
+                for key in self.keys()}
+
+    def copy(self, **changes) -> 'Comment':
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(changes)
+        return Comment(**values)
+
+    def __contains__(self, field: str) -> bool:
+        """兼容旧版的 'text' in comment 写法"""
+        layout = self.layout if self.layout is not None else self.keys()
+        return field in layout and field != 'replies'
+
+    def __getitem__(self, field: str):
+        """兼容旧版的 comment['text'] 写法"""
+        if field not in self:
+            raise KeyError(field)
+        return self.extra[field] if self.extra and field in self.extra else getattr(self, field)
+
+    def __repr__(self) -> str:
+        return f"Comment(author={self.author!r}, id={self.id!r})"
+
+
+class CommentTree:
+    """
+    扁平的评论树
+
+    用法:
+        tree = CommentTree.from_legacy(comments)     # 旧版嵌套列表 -> 扁平数组
+        for comment in tree: ...                      # 先序遍历
+        for index, comment in tree.items(): tree.depths[index]
+        tree.subtree(index)                           # 一条评论及其全部回复
+        tree.to_legacy()                              # 扁平数组 -> 旧版嵌套列表
+    """
+    __slots__ = ('comments', 'parents', 'depths', 'ends')
+
+    def __init__(self, comments: List[Comment] = None, parents: List[int] = None,
+                 depths: List[int] = None, ends: List[int] = None):
+        self.comments = comments if comments is not None else []
+        # 父评论下标，顶层评论为 -1
+        self.parents = parents if parents is not None else []
+        self.depths = depths if depths is not None else []
+        # 子树结束位置（不含），子树为 comments[i:ends[i]]
+        self.ends = ends if ends is not None else []
+
+    @classmethod
+    def from_legacy(cls, comments: List[Dict[str, Any]]) -> 'CommentTree':
+        tree = cls()
+        nodes, parents, depths, ends = tree.comments, tree.parents, tree.depths, tree.ends
+        from_dict = Comment.from_dict
+        # 栈中保存 (同一层的评论列表, 下一个位置, 父评论下标)，按先序逐条展开
+        stack = [(comments, 0, -1)]
+        while stack:
+            items, position, parent = stack.pop()
+            if position >= len(items):
+                if parent >= 0:
+                    ends[parent] = len(nodes)
+                continue
+            stack.append((items, position + 1, parent))
+            data = items[position]
+            index = len(nodes)
+            nodes.append(from_dict(data))
+            parents.append(parent)
+            depths.append(len(stack) - 1)
+            ends.append(index + 1)
+            replies = data.get('replies')
+            if replies:
+                stack.append((replies, 0, index))
+        return tree
+
+    def to_legacy(self) -> List[Dict[str, Any]]:
+        """还原为旧版嵌套列表（每条评论都生成新的字典）"""
+        roots: List[Dict[str, Any]] = []
+        nodes: List[Dict[str, Any]] = []
+        for comment, parent in zip(self.comments, self.parents):
+            data = comment.to_dict()
+            nodes.append(data)
+            if parent < 0:
+                roots.append(data)
+            else:
+                nodes[parent].setdefault('replies', []).append(data)
+        return roots
+
+    def __len__(self) -> int:
+        return len(self.comments)
+
+    def __iter__(self) -> Iterator[Comment]:
+        return iter(self.comments)
+
+    def items(self) -> Iterator[Tuple[int, Comment]]:
+        return enumerate(self.comments)
+
+    def roots(self) -> List[int]:
+        """顶层评论的下标"""
+        return [index for index, parent in enumerate(self.parents) if parent < 0]
+
+    def children(self, index: int) -> List[int]:
+        """直接回复的下标"""
+        children = []
+        child = index + 1
+        while child < self.ends[index]:
+            children.append(child)
+            child = self.ends[child]
+        return children
+
+    def subtree(self, index: int) -> 'CommentTree':
+        """一条评论及其全部回复组成的新树（下标从0开始，层级保持不变）"""
+        end = self.ends[index]
+        return CommentTree(
+            self.comments[index:end],
+            [-1] + [parent - index for parent in self.parents[index + 1:end]],
+            self.depths[index:end],
+            [child_end - index for child_end in self.ends[index:end]]
+        )
+
+    def map_text(self, func: Callable[[str], str]) -> 'CommentTree':
+        """对每条评论的 text 应用 func，返回共享树结构的新树（原树不变）"""
+        comments = [
+            comment.copy(text=func(comment.text)) if comment.text is not None else comment
+            for comment in self.comments
+        ]
+        return CommentTree(comments, self.parents, self.depths, self.ends)
+
+
+class Post:
+    """帖子正文及其评论树"""
+    __slots__ = ('title', 'content', 'author', 'timestamp', 'url', 'extra', 'layout', 'comments')
+
+    def __init__(self, title: Optional[str] = None, content: Optional[str] = None,
+                 author: Optional[str] = None, timestamp: Optional[str] = None, url: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None, layout: Optional[Tuple[str, ...]] = None,
+                 comments: Optional[CommentTree] = None):
+        self.title = title
+        self.content = content
+        self.author = author
+        self.timestamp = timestamp
+        self.url = url
+        self.extra = extra
+        self.layout = layout
+        self.comments = comments if comments is not None else CommentTree()
+
+    @classmethod
+    def from_legacy(cls, post_content: Optional[Dict[str, Any]], comments: List[Dict[str, Any]] = ()) -> 'Post':
+        post_content = post_content or {}
+        return cls(*(post_content.get(field) for field in POST_FIELDS), extra=_extra_of(post_content, POST_FIELDS),
+                   layout=tuple(post_content), comments=CommentTree.from_legacy(list(comments)))
+
+    def to_legacy(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """还原为旧版的 (post_content, comments)"""
+        if self.layout is not None:
+            keys = self.layout
+        else:
+            keys = tuple(field for field in POST_FIELDS if getattr(self, field) is not None) + tuple(self.extra or ())
+        post_content = {key: getattr(self, key) if key in POST_FIELDS else self.extra[key] for key in keys}
+        return post_content, self.comments.to_legacy()
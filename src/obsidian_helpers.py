@@ -15,9 +15,10 @@ def parse_relative_time_to_date(relative_time: str) -> str:
     """
     将相对时间转换为绝对日期
     例如: "2w" -> "2024-03-15", "1y" -> "2023-01-20"
+    HTTP抓取得到的ISO时间（如 "2024-03-01T10:00:00Z"）直接取其日期（换算为本地时间）
     
     Args:
-        relative_time: 相对时间字符串，如 "2w", "1y", "3d"
+        relative_time: 相对时间字符串，如 "2w", "1y", "3d"，或ISO 8601时间
     
     Returns:
         str: YYYY-MM-DD 格式的日期
@@ -26,6 +27,13 @@ def parse_relative_time_to_date(relative_time: str) -> str:
         return datetime.now().strftime('%Y-%m-%d')
     
     try:
+        # ISO 8601 时间
+        if re.match(r'\d{4}-\d{2}-\d{2}', relative_time.strip()):
+            absolute = datetime.fromisoformat(relative_time.strip().replace('Z', '+00:00'))
+            if absolute.tzinfo is not None:
+                absolute = absolute.astimezone()
+            return absolute.strftime('%Y-%m-%d')
+        
         # 提取数字和单位
         match = re.match(r'(\d+)([wdmy])', relative_time.lower().strip())
         if not match:
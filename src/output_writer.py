@@ -0,0 +1,129 @@
+"""
+输出写入
+- 对帖子正文、评论树和引用的附件计算内容哈希，记录在输出清单中
+- 哈希未变化时跳过重写 Markdown 和 data.json，避免触发 Obsidian 重新索引和同步
+- 需要写入的文件先写临时文件再重命名，保证不会留下写了一半的文件
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from models import iter_comments
+
+
+# 处理后HTML中引用的本地附件
+_ATTACHMENT_SRC_RE = re.compile(r'src="\.\./attachments/([^"]+)"')
+
+# 绝对时间（HTTP抓取得到的ISO时间）；其他时间都是 "3h"、"2 days ago" 这类相对时间，每次抓取都会变化
+_ABSOLUTE_TIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# 每次运行都会变化、不计入哈希的字段
+VOLATILE_FIELDS = ('scraped_at',)
+
+
+def collect_attachment_names(post_content: Dict[str, Any], comments: List[Dict[str, Any]]) -> List[str]:
+    """收集帖子和评论中引用的附件文件名（去重并排序）"""
+    names = set(_ATTACHMENT_SRC_RE.findall((post_content or {}).get('content', '') or ''))
+
+    for item in iter_comments(comments):
+        names.update(_ATTACHMENT_SRC_RE.findall(item.get('text', '') or ''))
+    return sorted(names)
+
+
+def _stable_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """去掉会随运行变化的字段；相对时间不计入哈希，绝对时间保留"""
+    stable = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS and key != 'replies'}
+    timestamp = stable.get('timestamp')
+    if timestamp and not _ABSOLUTE_TIME_RE.match(str(timestamp).strip()):
+        stable['timestamp'] = None
+    return stable
+
+
+def _stable_comments(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dict(_stable_fields(comment), replies=_stable_comments(comment.get('replies') or []))
+            for comment in comments]
+
+
+def compute_content_hash(post_content: Dict[str, Any], comments: List[Dict[str, Any]],
+                         attachments_dir: Path = None) -> str:
+    """
+    计算帖子内容的规范化哈希
+    包含正文、评论树和引用附件的文件名与大小，不包含抓取时间和相对时间等每次都会变化的字段
+    """
+    attachments = []
+    for name in collect_attachment_names(post_content, comments):
+        size = None
+        if attachments_dir is not None:
+            try:
+                size = (Path(attachments_dir) / name).stat().st_size
+            except OSError:
+                size = None
+        attachments.append([name, size])
+
+    normalized = json.dumps(
+        {'post': _stable_fields(post_content or {}), 'comments': _stable_comments(comments),
+         'attachments': attachments},
+        ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def atomic_write_text(path: Path, text: str):
+    """先写入同目录下的临时文件，再原子替换目标文件"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class OutputManifest:
+    """
+    输出清单：帖子ID -> 内容哈希和输出文件路径
+    保存在磁盘上，跨运行判断输出是否需要重写
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, post_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(post_id)
+
+    def is_unchanged(self, post_id: str, content_hash: str) -> bool:
+        """哈希一致且上次写出的文件都还在时，认为输出无需更新"""
+        entry = self.entries.get(post_id)
+        if not entry or entry.get('hash') != content_hash:
+            return False
+        return all(Path(entry[key]).exists() for key in ('markdown_file', 'json_file') if entry.get(key))
+
+    def record(self, post_id: str, content_hash: str, markdown_file: Path, json_file: Path):
+        """记录本次写出的结果并写回磁盘"""
+        self.entries[post_id] = {
+            'hash': content_hash,
+            'markdown_file': str(markdown_file),
+            'json_file': str(json_file)
+        }
+        atomic_write_text(self.path, json.dumps(self.entries, ensure_ascii=False, indent=2))
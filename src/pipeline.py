@@ -0,0 +1,119 @@
+"""
+分段抓取流水线
+浏览器阶段（加载页面和评论）与输出阶段（图片、Markdown、JSON）通过 asyncio 队列衔接：
+- 提取到正文后立即把其中的图片提交给下载器，图片在评论加载期间并行下载
+- 浏览器阶段结束后立即归还页面和并发名额，输出阶段由渲染工作者在后台完成
+单个帖子的总耗时接近最慢的阶段，而不是各阶段之和
+"""
+import asyncio
+import contextvars
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+from html_normalizer import find_image_sources
+from image_processor import LOCAL_IMAGE_PREFIXES
+from obsidian_helpers import OBSIDIAN_ATTACHMENTS_DIR
+
+
+def find_image_urls(html: str, base_url: str) -> List[str]:
+    """快速找出HTML片段中需要下载的图片地址（不做完整解析）"""
+    urls = []
+    for src in find_image_sources(html):
+        if not src.startswith(LOCAL_IMAGE_PREFIXES) and not src.startswith('data:'):
+            urls.append(urljoin(base_url, src))
+    return urls
+
+
+def prefetch_images(downloader, html: str, base_url: str, dest_dir: Path = OBSIDIAN_ATTACHMENTS_DIR) -> int:
+    """
+    把HTML中的图片立即提交给下载器，不等待下载完成
+    之后输出阶段请求同一URL时会复用进行中的下载
+
+    Returns:
+        int: 提交的图片数
+    """
+    urls = find_image_urls(html, base_url)
+    for index, img_url in enumerate(urls, 1):
+        downloader.prefetch(img_url, index, dest_dir)
+    return len(urls)
+
+
+def prefetch_comment_images(downloader, comments: List[Dict[str, Any]], base_url: str) -> int:
+    """递归提交评论树中的所有图片"""
+    count = 0
+    for comment in comments:
+        count += prefetch_images(downloader, comment.get('text', ''), base_url)
+        count += prefetch_comment_images(downloader, comment.get('replies', []), base_url)
+    return count
+
+
+class RenderStage:
+    """
+    输出阶段的工作者池
+    调用方把渲染任务放入队列后等待结果；任务在提交方的上下文中运行，
+    并发日志仍然归属到对应帖子
+
+    队列有容量上限：渲染跟不上时 enqueue 会等待，抓取阶段因此暂停，
+    已抓取的帖子和图片数据不会无限堆积在内存中
+
+    用法:
+        async with RenderStage(workers=2, max_pending=2) as stage:
+            result = await stage.submit(save_post_outputs, url, post_id, post_content, comments)
+            # 或者先排队（占住抓取名额直到队列有空位），之后再等待结果
+            future = await stage.enqueue(save_post_outputs, ...)
+            result = await future
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 0):
+        self.workers = max(1, workers)
+        # 等待渲染的任务数上限（0 表示不限制）
+        self.max_pending = max(0, max_pending)
+        self._queue: asyncio.Queue = None
+        self._tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, func, *args, **kwargs) -> asyncio.Future:
+        """放入渲染队列（队列已满时等待空位），返回任务结果的 future"""
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((contextvars.copy_context(), func, args, kwargs, future))
+        return future
+
+    async def submit(self, func, *args, **kwargs):
+        """放入渲染队列并等待完成"""
+        return await (await self.enqueue(func, *args, **kwargs))
+
+    async def _worker(self):
+        while True:
+            context, func, args, kwargs, future = await self._queue.get()
+            try:
+                # 在提交方的上下文中创建任务（日志缓冲等上下文变量随任务一起传递）
+                task = context.run(asyncio.ensure_future, func(*args, **kwargs))
+                result = await task
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,52 @@
+"""
+渲染进程池
+HTML 解析和 Markdown 转换是纯CPU工作，放到 ProcessPoolExecutor 中执行，
+事件循环线程只负责驱动浏览器和网络，下一个帖子的抓取与上一个帖子的渲染在不同核心上同时进行
+每次提交以一个帖子为单位（整篇正文或整棵评论树），避免逐条评论往返进程带来的序列化开销
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+
+class RenderPool:
+    """
+    进程池包装，processes 为 0 时在当前线程直接执行
+
+    用法:
+        async with RenderPool(Config.RENDER_PROCESSES) as render_pool:
+            markdown = await render_pool.run(render_obsidian_markdown, post_content, comments, url)
+    """
+
+    def __init__(self, processes: int):
+        self.processes = max(0, processes)
+        self._executor = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        if self.processes > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            # 等待进行中的渲染结束，不阻塞事件循环
+            await asyncio.get_event_loop().run_in_executor(None, executor.shutdown)
+
+    async def run(self, func, *args):
+        """在进程池中执行顶层函数（参数和返回值需要可以 pickle）"""
+        if self._executor is None:
+            return func(*args)
+        return await asyncio.get_event_loop().run_in_executor(self._executor, func, *args)
+
+
+async def run_cpu(render_pool, func, *args):
+    """有进程池时提交到进程池，否则直接执行"""
+    if render_pool is None:
+        return func(*args)
+    return await render_pool.run(func, *args)
@@ -0,0 +1,134 @@
+"""
+资源拦截模块
+通过 page.route 拦截提取器用不到的资源（字体、视频、图片、统计脚本等），
+减少页面加载时间和带宽。只拦截网络请求，不修改DOM，<img src> 属性保持不变，
+image_downloader 仍然可以根据原始地址下载图片
+"""
+from collections import Counter
+from urllib.parse import urlparse
+
+
+# 已知的第三方统计、视频播放器和字体服务主机（包含其子域名）
+DEFAULT_BLOCKED_HOSTS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'segment.io',
+    'segment.com',
+    'hotjar.com',
+    'intercom.io',
+    'intercomcdn.com',
+    'sentry.io',
+    'fullstory.com',
+    'mixpanel.com',
+    'amplitude.com',
+    'heapanalytics.com',
+    'nr-data.net',
+    'newrelic.com',
+    'youtube.com',
+    'ytimg.com',
+    'vimeo.com',
+    'vimeocdn.com',
+    'wistia.com',
+    'wistia.net',
+    'fonts.googleapis.com',
+    'fonts.gstatic.com',
+    'typekit.net',
+]
+
+
+def _parse_list(value: str) -> list:
+    """解析逗号分隔的配置值"""
+    return [item.strip().lower() for item in (value or '').split(',') if item.strip()]
+
+
+class ResourceBlocker:
+    """
+    单个页面的资源拦截器，同时统计拦截和放行的请求
+    """
+
+    def __init__(self, blocked_types, blocked_hosts):
+        self.blocked_types = set(blocked_types)
+        self.blocked_hosts = list(blocked_hosts)
+        self.blocked_by_reason = Counter()
+        self.allowed_requests = 0
+        self.bytes_loaded = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """根据配置创建拦截器"""
+        blocked_types = _parse_list(config.BLOCKED_RESOURCE_TYPES)
+        # 收集浏览器图片时必须让图片正常加载
+        if config.HARVEST_BROWSER_IMAGES:
+            blocked_types = [resource_type for resource_type in blocked_types if resource_type != 'image']
+        blocked_hosts = DEFAULT_BLOCKED_HOSTS + _parse_list(config.BLOCKED_HOSTS)
+        return cls(blocked_types, blocked_hosts)
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked_by_reason.values())
+
+    def _is_blocked_host(self, url: str) -> bool:
+        host = (urlparse(url).hostname or '').lower()
+        return any(host == blocked or host.endswith('.' + blocked) for blocked in self.blocked_hosts)
+
+    def block_reason(self, resource_type: str, url: str):
+        """
+        判断请求是否应被拦截
+        Returns: 拦截原因（资源类型或 'third-party'），不拦截时返回None
+        """
+        # 页面文档本身永远放行
+        if resource_type == 'document':
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if self._is_blocked_host(url):
+            return 'third-party'
+        return None
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.block_reason(request.resource_type, request.url)
+        if reason:
+            self.blocked_by_reason[reason] += 1
+            await route.abort()
+        else:
+            self.allowed_requests += 1
+            await route.continue_()
+
+    def _on_response(self, response):
+        try:
+            content_length = response.headers.get('content-length')
+            if content_length and content_length.isdigit():
+                self.bytes_loaded += int(content_length)
+        except Exception:
+            pass
+
+    async def attach(self, page):
+        """在页面上安装拦截路由"""
+        await page.route('**/*', self._handle_route)
+        page.on('response', self._on_response)
+
+    def report(self):
+        """
+        输出本页面的拦截统计
+        被中止的请求没有响应，无法得知其大小，所以只统计节省的请求数；
+        字节数是放行的请求按 content-length 统计的下载量
+        """
+        details = ', '.join(f"{reason}: {count}" for reason, count in self.blocked_by_reason.most_common())
+        print(f"🚫 资源拦截: 节省 {self.blocked_requests} 个请求" + (f" ({details})" if details else ""))
+        print(f"   放行 {self.allowed_requests} 个请求，放行的请求共下载约 {self.bytes_loaded / 1024:.1f} KB"
+              "（不含被拦截请求的大小）")
+
+
+async def install_resource_blocking(page, config):
+    """
+    根据配置为页面安装资源拦截
+    Returns: ResourceBlocker，未启用时返回None
+    """
+    if not config.BLOCK_RESOURCES:
+        return None
+    blocker = ResourceBlocker.from_config(config)
+    await blocker.attach(page)
+    return blocker
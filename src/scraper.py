@@ -5,6 +5,13 @@ import asyncio
 import re
 from typing import List, Dict, Any
 
+from batch_expand import expand_in_rounds
+from comment_api import api_capture_is_complete, build_comment_tree_from_payloads, merge_api_and_dom_comments
+from comment_extractor import extract_comment_tree
+from dom_stability import install_stability_tracker, wait_for_dom_stable
+from incremental import make_known_comment_check
+from models import count_comments
+
 
 # 关键选择器 - 基于实际网站结构（OneNewBite）
 SELECTORS = {
@@ -29,6 +36,16 @@ SELECTORS = {
     'COMMENT_BODY_TRUNCATED': '.comment-body.is-truncated'
 }
 
+# 批量展开模式使用的选择器（与逐个点击时的查找顺序一致）
+PREVIOUS_COMMENTS_SELECTORS = [
+    'a:has-text("Previous Comments")',
+    SELECTORS['PREVIOUS_COMMENTS_BUTTON']
+]
+MORE_LINK_SELECTORS = [
+    SELECTORS['EXPAND_MORE_LINKS'],
+    SELECTORS['EXPAND_LINKS_FALLBACK']
+]
+
 
 async def get_expected_comment_count(page):
     """
@@ -108,15 +125,29 @@ async def debug_page_structure(page):
         print(f"调试过程出错: {e}")
 
 
-async def load_all_previous_comments(page, config):
+async def load_all_previous_comments(page, config, stop_condition=None):
     """
     递归加载所有层级的 Previous Comments
     包括根级别和嵌套在回复中的 Previous Comments
+    
+    Args:
+        stop_condition: 可选的异步函数，返回True时停止翻页（增量模式下遇到已知评论）
     """
+    if config.EXPANSION_MODE == 'batch':
+        _, clicks = await expand_in_rounds(
+            page, config, PREVIOUS_COMMENTS_SELECTORS, 'Previous Comments', max_rounds=10,
+            stop_condition=stop_condition
+        )
+        return clicks
+    
     total_loaded = 0
     max_iterations = 10  # 防止无限循环
     
     for iteration in range(max_iterations):
+        if stop_condition and await stop_condition():
+            print(f"  第 {iteration + 1} 轮：已到达已知评论，停止加载")
+            break
+        
         # 查找所有可见的 Previous Comments 按钮（包括嵌套的）
         all_previous_buttons = await page.locator('a:has-text("Previous Comments")').all()
         
@@ -149,13 +180,12 @@ async def load_all_previous_comments(page, config):
             try:
                 print(f"    点击第 {i+1} 个 Previous Comments 按钮...")
                 await button.scroll_into_view_if_needed()
-                await page.wait_for_timeout(500)
                 await button.click()
                 buttons_clicked += 1
                 total_loaded += 1
                 
-                # 每次点击后等待内容加载
-                await page.wait_for_timeout(1500)
+                # 每次点击后等待评论区域稳定（请求完成且DOM不再变化）
+                await wait_for_dom_stable(page, config)
                 
             except Exception as e:
                 print(f"    点击第 {i+1} 个按钮失败: {e}")
@@ -168,8 +198,7 @@ async def load_all_previous_comments(page, config):
         print(f"  第 {iteration + 1} 轮：成功点击了 {buttons_clicked} 个按钮")
         
         # 等待页面稳定
-        await page.wait_for_load_state('networkidle', timeout=10000)
-        await page.wait_for_timeout(config.WAIT_TIME)
+        await wait_for_dom_stable(page, config)
     
     return total_loaded
 
@@ -178,6 +207,12 @@ async def expand_remaining_more_links(page, config, max_iterations=3):
     """
     展开剩余的More链接（用于Previous Comments加载后的额外处理）
     """
+    if config.EXPANSION_MODE == 'batch':
+        _, clicks = await expand_in_rounds(
+            page, config, MORE_LINK_SELECTORS, 'More 链接', max_rounds=max_iterations
+        )
+        return clicks
+    
     expand_count = 0
     
     for iteration in range(max_iterations):
@@ -202,18 +237,15 @@ async def expand_remaining_more_links(page, config, max_iterations=3):
                 try:
                     if await link.is_visible():
                         await link.scroll_into_view_if_needed()
-                        await page.wait_for_timeout(500)
                         await link.click(force=True)
                         links_clicked += 1
                         expand_count += 1
-                        await page.wait_for_timeout(1000)
+                        await wait_for_dom_stable(page, config)
                 except Exception as e:
                     continue
             
             if links_clicked == 0:
                 break
-                
-            await page.wait_for_timeout(config.WAIT_TIME)
             
         except Exception as e:
             print(f"    展开剩余More链接时出错: {e}")
@@ -231,13 +263,13 @@ async def scroll_and_discover_comments(page, config):
     try:
         # 首先滚动到评论区域
         await page.locator('#sidebar-comments-region').scroll_into_view_if_needed()
-        await page.wait_for_timeout(1000)
+        await wait_for_dom_stable(page, config)
         
         # 1. 向下缓慢滚动，触发懒加载
         print("    📜 执行缓慢滚动以触发懒加载...")
         for i in range(3):
             await page.evaluate("window.scrollBy(0, 300)")
-            await page.wait_for_timeout(1500)
+            await wait_for_dom_stable(page, config)
             
         # 2. 滚动到评论区域底部
         print("    ⬇️ 滚动到评论区域底部...")
@@ -247,7 +279,7 @@ async def scroll_and_discover_comments(page, config):
                 commentRegion.scrollTop = commentRegion.scrollHeight;
             }
         """)
-        await page.wait_for_timeout(2000)
+        await wait_for_dom_stable(page, config)
         
         # 3. 回到评论区域顶部
         print("    ⬆️ 回到评论区域顶部...")
@@ -257,17 +289,17 @@ async def scroll_and_discover_comments(page, config):
                 commentRegion.scrollTop = 0;
             }
         """)
-        await page.wait_for_timeout(1000)
+        await wait_for_dom_stable(page, config)
         
         # 4. 尝试调整页面缩放比例
         print("    🔍 调整页面缩放比例...")
         # 先缩小到90%查看更多内容
         await page.evaluate("document.body.style.zoom = '0.9'")
-        await page.wait_for_timeout(1000)
+        await wait_for_dom_stable(page, config)
         
         # 然后恢复正常大小
         await page.evaluate("document.body.style.zoom = '1.0'")
-        await page.wait_for_timeout(1000)
+        await wait_for_dom_stable(page, config)
         
         print("    ✅ 页面滚动和视角调整完成")
         
@@ -275,15 +307,26 @@ async def scroll_and_discover_comments(page, config):
         print(f"    ⚠️ 页面滚动和视角调整时出错: {e}")
 
 
-async def load_all_comments(page, config):
+async def load_all_comments(page, config, expand_more: bool = True, known_ids=None):
     """
     增强的双循环加载策略
     Phase 0: 页面滚动和视角调整
     Phase 1: 循环点击"Previous Comments"直到全部加载
     Phase 2: 循环点击所有"more"链接直到全部展开
+    
+    Args:
+        expand_more: 是否展开"more"链接（接口捕获模式下正文已完整，可跳过）
+        known_ids: 上一次已抓取的评论ID；提供时只加载新评论（增量模式）
     """
     print("开始加载所有评论...")
     
+    # 在第一次点击前安装DOM稳定追踪器，使点击触发的请求能被计入
+    await install_stability_tracker(page)
+    
+    if known_ids:
+        await load_new_comments(page, config, known_ids, expand_more)
+        return
+    
     # Phase 0: 页面滚动和视角调整 (新增)
     print("Phase 0: 页面滚动和视角调整...")
     await scroll_and_discover_comments(page, config)
@@ -299,6 +342,65 @@ async def load_all_comments(page, config):
     
     # Phase 2: 展开所有折叠的评论内容（More 链接）
     print("Phase 2: 展开所有折叠的评论内容...")
+    if not expand_more:
+        print("  接口捕获模式：评论正文来自接口数据，跳过展开")
+        expand_count = 0
+    elif config.EXPANSION_MODE == 'batch':
+        expand_count = await expand_remaining_more_links(page, config, max_iterations=8)
+    else:
+        expand_count = await expand_all_more_links_sequential(page, config)
+    
+    print(f"评论加载完成！共展开了 {expand_count} 项折叠内容")
+    
+    # Phase 3: 展开More链接后，重新检查是否有新的Previous Comments出现
+    print("Phase 3: 检查展开后是否有新的 Previous Comments...")
+    additional_previous = await load_all_previous_comments(page, config)
+    if additional_previous > 0:
+        print(f"  发现并加载了额外的 {additional_previous} 个 Previous Comments")
+        
+        # 如果加载了新的Previous Comments，可能需要重新展开More链接
+        print("  重新检查是否有新的More链接需要展开...")
+        additional_expand = 0 if not expand_more else await expand_remaining_more_links(page, config, max_iterations=3)
+        print(f"  额外展开了 {additional_expand} 项内容")
+    else:
+        print("  没有发现新的 Previous Comments")
+    
+    # Phase 4: 最终发现阶段 - 再次滚动和搜索
+    print("Phase 4: 最终发现阶段 - 再次滚动和搜索...")
+    await scroll_and_discover_comments(page, config)
+    
+    # 最终检查是否还有未发现的Previous Comments
+    final_previous = await load_all_previous_comments(page, config)
+    if final_previous > 0:
+        print(f"  最终发现了额外的 {final_previous} 个 Previous Comments")
+        # 再次展开可能的More链接
+        final_expand = 0 if not expand_more else await expand_remaining_more_links(page, config, max_iterations=2)
+        print(f"  最终额外展开了 {final_expand} 项内容")
+    else:
+        print("  最终检查：没有发现更多Previous Comments")
+
+
+async def load_new_comments(page, config, known_ids, expand_more: bool = True):
+    """
+    增量加载：翻页加载 Previous Comments，直到页面中出现上一次已抓取的评论
+    跳过滚动发现和重复检查阶段，只展开新加载部分的折叠内容
+    """
+    print(f"增量模式：已知 {len(known_ids)} 条评论，只加载新评论...")
+    
+    stop_condition = make_known_comment_check(page, SELECTORS['COMMENT_CONTAINER'], known_ids)
+    loaded = await load_all_previous_comments(page, config, stop_condition=stop_condition)
+    print(f"  增量翻页完成: 点击了 {loaded} 次 Previous Comments")
+    
+    if expand_more:
+        expand_count = await expand_remaining_more_links(page, config, max_iterations=8)
+        print(f"  展开了 {expand_count} 项折叠内容")
+
+
+async def expand_all_more_links_sequential(page, config):
+    """
+    逐个点击展开所有折叠的评论内容（More 链接）
+    每个链接单独检查可见性和文本，并依次尝试三种点击方式
+    """
     expand_count = 0
     max_iterations = 8  # 限制最大迭代次数防止无限循环
     iteration = 0
@@ -355,7 +457,6 @@ async def load_all_comments(page, config):
                         
                         # 滚动到元素
                         await link.scroll_into_view_if_needed()
-                        await page.wait_for_timeout(1000)
                         
                         # 尝试多种点击方式
                         click_success = False
@@ -389,8 +490,8 @@ async def load_all_comments(page, config):
                         if click_success:
                             links_clicked += 1
                             expand_count += 1
-                            # 等待内容展开
-                            await page.wait_for_timeout(1500)
+                            # 等待内容展开（评论区域稳定即可）
+                            await wait_for_dom_stable(page, config)
                         else:
                             print(f"    ❌ 所有方法都无法点击第 {i+1} 个 More 链接")
                             
@@ -407,9 +508,6 @@ async def load_all_comments(page, config):
                 
             print(f"  本轮成功展开 {links_clicked} 个折叠内容")
             
-            # 等待页面稳定
-            await page.wait_for_timeout(config.WAIT_TIME)
-            
             iteration += 1
             
             # 早期退出检查：如果迭代次数超过限制
@@ -421,34 +519,7 @@ async def load_all_comments(page, config):
             print(f"  展开折叠内容时发生错误: {e}")
             break
     
-    print(f"评论加载完成！共展开了 {expand_count} 项折叠内容")
-    
-    # Phase 3: 展开More链接后，重新检查是否有新的Previous Comments出现
-    print("Phase 3: 检查展开后是否有新的 Previous Comments...")
-    additional_previous = await load_all_previous_comments(page, config)
-    if additional_previous > 0:
-        print(f"  发现并加载了额外的 {additional_previous} 个 Previous Comments")
-        
-        # 如果加载了新的Previous Comments，可能需要重新展开More链接
-        print("  重新检查是否有新的More链接需要展开...")
-        additional_expand = await expand_remaining_more_links(page, config, max_iterations=3)
-        print(f"  额外展开了 {additional_expand} 项内容")
-    else:
-        print("  没有发现新的 Previous Comments")
-    
-    # Phase 4: 最终发现阶段 - 再次滚动和搜索
-    print("Phase 4: 最终发现阶段 - 再次滚动和搜索...")
-    await scroll_and_discover_comments(page, config)
-    
-    # 最终检查是否还有未发现的Previous Comments
-    final_previous = await load_all_previous_comments(page, config)
-    if final_previous > 0:
-        print(f"  最终发现了额外的 {final_previous} 个 Previous Comments")
-        # 再次展开可能的More链接
-        final_expand = await expand_remaining_more_links(page, config, max_iterations=2)
-        print(f"  最终额外展开了 {final_expand} 项内容")
-    else:
-        print("  最终检查：没有发现更多Previous Comments")
+    return expand_count
 
 
 async def final_comment_verification(page, extracted_count):
@@ -748,17 +819,79 @@ async def extract_post_content(page) -> Dict[str, Any]:
 async def extract_comments(page) -> List[Dict[str, Any]]:
     """
     提取评论数据，保持正确的层级结构
+    优先在浏览器内一次性提取整个评论树，失败时退回逐条提取
     Returns: List[Dict] - 评论数据结构，只包含根评论，回复嵌套在内
     """
     print("开始提取评论数据...")
     
+    root_comments = None
+    try:
+        root_comments = await extract_comment_tree(page, SELECTORS['COMMENT_CONTAINER'], clean_comment_html)
+        if root_comments is None:
+            print("❌ 未找到评论区容器")
+            return []
+        print("⚡ 单次往返提取完成")
+    except Exception as e:
+        print(f"⚠️ 单次往返提取失败，改用逐条提取: {e}")
+    
+    if root_comments is None:
+        root_comments = await extract_comments_with_locators(page)
+        if root_comments is None:
+            return []
+    
+    print(f"✅ 成功提取 {len(root_comments)} 条根评论")
+    
+    # 计算总评论数（包括所有嵌套回复）
+    total_extracted_comments = count_all_comments_recursively(root_comments)
+    print(f"📊 总评论数统计: 根评论 {len(root_comments)} 条, 总计 {total_extracted_comments} 条 (包括所有回复)")
+    
+    # 最终验证：检查是否达到期望数量
+    await final_comment_verification(page, total_extracted_comments)
+    
+    return root_comments
+
+
+async def extract_comments_with_api(page, config, recorder) -> List[Dict[str, Any]]:
+    """
+    接口捕获模式：用捕获到的评论接口JSON构建评论树
+    接口数据覆盖了页面显示的全部评论且字段完整时直接使用，不再提取DOM；
+    否则DOM提取结果只用于补齐接口中缺失的字段和只存在于页面中的评论
+    """
+    await recorder.drain()
+    api_comments = build_comment_tree_from_payloads(recorder.payloads, clean_comment_html)
+    if not api_comments:
+        # 没有接口数据时，正文可能仍是折叠状态，补做一次展开再从DOM提取
+        print("⚠️ 未捕获到评论接口数据，展开折叠内容后使用DOM提取结果")
+        await expand_remaining_more_links(page, config, max_iterations=8)
+        return await extract_comments(page)
+    
+    api_count = count_all_comments_recursively(api_comments)
+    expected_count = await get_expected_comment_count(page)
+    if api_capture_is_complete(api_comments, expected_count):
+        print(f"📡 从 {len(recorder.payloads)} 个接口响应构建评论树: {api_count}/{expected_count} 条，"
+              f"接口数据完整，跳过DOM提取")
+        return api_comments
+    
+    dom_comments = await extract_comments(page)
+    merged = merge_api_and_dom_comments(api_comments, dom_comments)
+    print(f"📡 从 {len(recorder.payloads)} 个接口响应构建评论树: "
+          f"{api_count} 条来自接口, "
+          f"合并后共 {count_all_comments_recursively(merged)} 条")
+    return merged
+
+
+async def extract_comments_with_locators(page) -> List[Dict[str, Any]]:
+    """
+    逐条提取评论（每条评论多次 Playwright 往返，作为备用方案）
+    Returns: List[Dict] - 根评论列表，找不到评论区时返回None
+    """
     try:
         # 定位评论容器
         container = page.locator('#sidebar-comments-region')
         
         if not await container.is_visible():
             print("❌ 未找到评论区容器")
-            return []
+            return None
         
         # 使用更精确的方法来查找根级评论
         # 首先尝试直接定位根级评论
@@ -802,20 +935,11 @@ async def extract_comments(page) -> List[Dict[str, Any]]:
                 print(f"    ❌ 处理评论 {i+1} 时出错: {e}")
                 continue
         
-        print(f"✅ 成功提取 {len(root_comments)} 条根评论")
-        
-        # 计算总评论数（包括所有嵌套回复）
-        total_extracted_comments = count_all_comments_recursively(root_comments)
-        print(f"📊 总评论数统计: 根评论 {len(root_comments)} 条, 总计 {total_extracted_comments} 条 (包括所有回复)")
-        
-        # 最终验证：检查是否达到期望数量
-        await final_comment_verification(page, total_extracted_comments)
-        
         return root_comments
         
     except Exception as e:
         print(f"❌ 提取评论数据时发生错误: {e}")
-        return []
+        return None
 
 
 async def extract_single_comment_with_replies(item) -> Dict[str, Any]:
@@ -952,14 +1076,9 @@ async def extract_single_reply(item) -> Dict[str, Any]:
 
 def count_all_comments_recursively(comments_list):
     """
-    递归计算所有评论的总数（包括嵌套回复）
+    计算所有评论的总数（包括嵌套回复）
     """
-    total = 0
-    for comment in comments_list:
-        total += 1  # 计算当前评论
-        if comment.get('replies'):
-            total += count_all_comments_recursively(comment['replies'])  # 递归计算回复
-    return total
+    return count_comments(comments_list)
 
 
 def clean_comment_text(text: str) -> str:
@@ -0,0 +1,223 @@
+"""
+NDJSON 流式存储
+大帖子的评论树按行保存：第一行是帖子信息，之后每条评论一行（先序遍历，记录父评论的行号和层级）
+- 写入时逐条编码、逐行写出，不在内存中拼出整份带缩进的JSON文本
+- 读取时逐行迭代，可以一次只处理一棵顶层评论的子树
+- 安装了 orjson 时用它编码和解码，否则使用标准库 json
+data.json 仍可由 export_json 导出
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from output_writer import atomic_write_text
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+NDJSON_FILENAME = 'data.ndjson'
+JSON_FILENAME = 'data.json'
+
+RECORD_POST = 'post'
+RECORD_COMMENT = 'comment'
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _decode(line: bytes) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def iter_comment_records(comments: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    把评论树展开为先序的扁平记录
+    每条记录: {"type": "comment", "index": 行号, "parent": 父评论行号或 None, "depth": 层级, "comment": 不含 replies 的评论}
+    """
+    index = 0
+    # 栈中保存 (评论, 父评论行号, 层级)，逆序入栈保证先序输出
+    stack = [(comment, None, 0) for comment in reversed(comments)]
+    while stack:
+        comment, parent, depth = stack.pop()
+        fields = {key: value for key, value in comment.items() if key != 'replies'}
+        yield {'type': RECORD_COMMENT, 'index': index, 'parent': parent, 'depth': depth, 'comment': fields}
+        replies = comment.get('replies') or []
+        stack.extend((reply, index, depth + 1) for reply in reversed(replies))
+        index += 1
+
+
+def write_thread_ndjson(path: Path, header: Dict[str, Any], comments: List[Dict[str, Any]]):
+    """
+    逐行写出帖子和评论（先写临时文件再原子替换）
+
+    Args:
+        header: 帖子级别的字段（url、scraped_at、post、total_comments）
+        comments: 评论树
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_encode(dict(header, type=RECORD_POST)))
+            for record in iter_comment_records(comments):
+                f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """逐行读取所有记录"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield _decode(line)
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    """只读取第一行的帖子信息"""
+    for record in iter_records(path):
+        header = dict(record)
+        header.pop('type', None)
+        return header
+    return {}
+
+
+def iter_top_level_comments(records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    把扁平记录还原为评论树，每次产出一棵完整的顶层评论（含 replies）
+    内存中只保留当前这棵子树
+    """
+    current: Optional[Dict[str, Any]] = None
+    by_index: Dict[int, Dict[str, Any]] = {}
+    for record in records:
+        if record.get('type') != RECORD_COMMENT:
+            continue
+        comment = dict(record['comment'])
+        comment['replies'] = []
+        parent = record.get('parent')
+        if parent is None:
+            if current is not None:
+                yield current
+            current = comment
+            by_index = {}
+        elif parent in by_index:
+            by_index[parent]['replies'].append(comment)
+        else:
+            # 父评论缺失（文件被截断或手动编辑），按顶层评论处理
+            if current is not None:
+                yield current
+            current = comment
+            by_index = {}
+        by_index[record['index']] = comment
+    if current is not None:
+        yield current
+
+
+def open_thread(path: Path) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """
+    打开抓取结果，返回 (帖子信息, 顶层评论迭代器)
+    data.ndjson 逐棵子树读取；data.json 整体读取后迭代
+    """
+    path = Path(path)
+    if path.suffix != '.ndjson':
+        data = load_thread(path)
+        comments = data.get('comments', [])
+        data.setdefault('total_comments', len(comments))
+        return data, iter(comments)
+
+    records = iter_records(path)
+    header = {}
+    for record in records:
+        if record.get('type') == RECORD_POST:
+            header = {key: value for key, value in record.items() if key != 'type'}
+            break
+    return header, iter_top_level_comments(records)
+
+
+def load_ndjson_thread(path: Path) -> Dict[str, Any]:
+    """读取 NDJSON 并组装成与 data.json 相同的结构"""
+    header, top_level_comments = open_thread(path)
+    comments = list(top_level_comments)
+    data = dict(header)
+    data['comments'] = comments
+    data.setdefault('total_comments', len(comments))
+    return data
+
+
+def load_thread(path: Path) -> Dict[str, Any]:
+    """按扩展名读取 data.json 或 data.ndjson"""
+    path = Path(path)
+    if path.suffix == '.ndjson':
+        return load_ndjson_thread(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def thread_file_in(folder: Path) -> Optional[Path]:
+    """帖子目录中的抓取结果文件（data.json 和 data.ndjson 都存在时取较新的一个）"""
+    candidates = [Path(folder) / name for name in (JSON_FILENAME, NDJSON_FILENAME)]
+    existing = [candidate for candidate in candidates if candidate.exists()]
+    if not existing:
+        return None
+    return max(existing, key=lambda candidate: candidate.stat().st_mtime_ns)
+
+
+def save_thread_data(folder: Path, output_data: Dict[str, Any], output_format: str = 'json') -> Path:
+    """
+    按配置的格式保存抓取结果
+
+    Args:
+        output_data: 含 comments 的完整数据（与 data.json 结构相同）
+        output_format: json（data.json）、ndjson（data.ndjson）或 both（data.ndjson 并导出 data.json）
+
+    Returns:
+        Path: 主数据文件路径
+    """
+    folder = Path(folder)
+    if output_format not in ('ndjson', 'both'):
+        json_path = folder / JSON_FILENAME
+        atomic_write_text(json_path, json.dumps(output_data, ensure_ascii=False, indent=2))
+        return json_path
+
+    ndjson_path = folder / NDJSON_FILENAME
+    header = {key: value for key, value in output_data.items() if key != 'comments'}
+    write_thread_ndjson(ndjson_path, header, output_data.get('comments', []))
+    if output_format == 'both':
+        atomic_write_text(folder / JSON_FILENAME, json.dumps(output_data, ensure_ascii=False, indent=2))
+    return ndjson_path
+
+
+def export_json(ndjson_path: Path, json_path: Path = None) -> Path:
+    """把 data.ndjson 导出为带缩进的 data.json"""
+    ndjson_path = Path(ndjson_path)
+    json_path = Path(json_path) if json_path else ndjson_path.with_name(JSON_FILENAME)
+    data = load_ndjson_thread(ndjson_path)
+    atomic_write_text(json_path, json.dumps(data, ensure_ascii=False, indent=2))
+    return json_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("用法: python src/stream_store.py output/<帖子ID>/data.ndjson [导出的 data.json 路径]")
+        sys.exit(1)
+    exported = export_json(Path(sys.argv[1]), Path(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(f"✅ 已导出: {exported}")
@@ -0,0 +1,256 @@
+"""
+Mighty 富文本专用的 HTML -> Markdown 转换器
+帖子正文和评论只使用 fr-view / mighty-wysiwyg-content 的一小部分标签：
+p、br、strong/b、em/i、a（含 hashtag 和 @提及）、ul/ol/li、img，外加 div/span 包裹
+基于 html.parser 的事件流逐个标签输出，只保留当前打开的标签栈，不构建 BeautifulSoup 树
+输出与 markdownify 0.11.6（requirements.txt 固定的版本）的 markdownify(heading_style="ATX", bullets="-") 完全一致，
+已有归档重新转换后的 Markdown 不变；
+遇到其他标签、注释或不规整的嵌套时整段交给 markdownify 处理
+"""
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from importlib import metadata
+from typing import Iterable, List, Set
+
+# 与 markdownify 相同的空白和缩进规则
+_WHITESPACE_RE = re.compile(r'[\t ]+')
+_LINE_BEGINNING_RE = re.compile(r'^', re.MULTILINE)
+_ASCII_SPACES = ' \n\t\x0c\r'
+
+# markdownify 会删除这些标签内部紧贴边界或相邻嵌套标签的纯空白文本
+_NESTED_TAGS = frozenset(('ul', 'ol', 'li'))
+_LIST_TAGS = frozenset(('ul', 'ol'))
+_VOID_TAGS = frozenset(('br', 'img'))
+SUPPORTED_TAGS = frozenset(('p', 'br', 'div', 'span', 'strong', 'b', 'em', 'i', 'a', 'ul', 'ol', 'li', 'img'))
+
+BULLETS = '-'
+
+# 输出规则变化时递增，使已缓存的转换结果失效
+CONVERTER_VERSION = 1
+
+
+class UnsupportedMarkup(Exception):
+    """片段中含有专用转换器不处理的内容"""
+
+
+class _Element:
+    """一个已打开、尚未关闭的标签"""
+    __slots__ = ('name', 'attrs', 'children')
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        # 子节点记录：('text', 原始文本) 或 (标签名, 转换结果)
+        self.children = []
+
+
+def _is_extracted(element: _Element, children: list, index: int) -> bool:
+    """
+    markdownify 在 ul/ol/li 内删除的纯空白文本：
+    位于开头或结尾，或者与嵌套标签相邻
+    """
+    kind, value = children[index]
+    if kind != 'text' or element.name not in _NESTED_TAGS or value.strip():
+        return False
+    return (index == 0 or index == len(children) - 1
+            or children[index - 1][0] in _NESTED_TAGS or children[index + 1][0] in _NESTED_TAGS)
+
+
+class _WysiwygParser(HTMLParser):
+    def __init__(self, strip: Set[str]):
+        super().__init__(convert_charrefs=True)
+        self.strip = strip
+        self.stack: List[_Element] = [_Element('[document]', {})]
+
+    # ---- 解析事件 ----
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in SUPPORTED_TAGS:
+            raise UnsupportedMarkup(tag)
+        element = _Element(tag, {name: value or '' for name, value in attrs})
+        if tag in _VOID_TAGS:
+            self._close(element, self.stack[-1])
+        else:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in _VOID_TAGS:
+            raise UnsupportedMarkup(tag)
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if len(self.stack) < 2 or self.stack[-1].name != tag:
+            # 隐式闭合、多余的结束标签等交给 BeautifulSoup 的容错逻辑
+            raise UnsupportedMarkup(f'</{tag}>')
+        element = self.stack.pop()
+        self._close(element, self.stack[-1])
+
+    def handle_data(self, data):
+        children = self.stack[-1].children
+        if children and children[-1][0] == 'text':
+            children[-1] = ('text', children[-1][1] + data)
+        else:
+            children.append(('text', data))
+
+    def handle_comment(self, data):
+        raise UnsupportedMarkup('comment')
+
+    def handle_decl(self, decl):
+        raise UnsupportedMarkup('declaration')
+
+    def handle_pi(self, data):
+        raise UnsupportedMarkup('processing instruction')
+
+    def unknown_decl(self, data):
+        raise UnsupportedMarkup('declaration')
+
+    # ---- 转换 ----
+
+    def finish(self) -> str:
+        self.close()
+        if len(self.stack) != 1:
+            raise UnsupportedMarkup('unclosed tag')
+        return self._join_children(self.stack[0])
+
+    def _close(self, element: _Element, parent: _Element):
+        """标签关闭时立即转换，父节点只保存结果字符串"""
+        text = self._join_children(element) if element.name not in _VOID_TAGS else ''
+        name = element.name
+        if name in self.strip:
+            # 只保留内容；空白规则仍按原标签名处理
+            if name in _NESTED_TAGS:
+                raise UnsupportedMarkup(name)
+            parent.children.append((name, text))
+        elif name == 'li':
+            # 有序列表的序号是本项在父节点（删除空白文本后）中的位置
+            parent.children.append((name, None))
+            parent.children[-1] = (name, self._convert_list_item(text, parent))
+        else:
+            parent.children.append((name, self._convert(element, text)))
+
+    def _join_children(self, element: _Element) -> str:
+        children = element.children
+        if element.name in _NESTED_TAGS:
+            children = [child for index, child in enumerate(children)
+                        if not _is_extracted(element, children, index)]
+        last = len(children) - 1
+        # 本节点内的列表是否为嵌套列表（嵌套列表在关闭时已经完成转换）
+        in_list_item = element.name == 'li' or any(ancestor.name == 'li' for ancestor in self.stack)
+        strings = []
+        for index, (kind, value) in enumerate(children):
+            next_kind = children[index + 1][0] if index < last else None
+            if kind == 'text':
+                if not value.strip(_ASCII_SPACES):
+                    # BeautifulSoup 把只含ASCII空白的文本替换为一个换行或空格
+                    value = '\n' if '\n' in value else ' '
+                value = _WHITESPACE_RE.sub(' ', value).replace('*', r'\*').replace('_', r'\_')
+                # 列表项中最后的文本，以及紧接嵌套列表的文本，去掉末尾空白
+                if element.name == 'li' and (next_kind is None or next_kind in _LIST_TAGS):
+                    value = value.rstrip()
+            elif kind in _LIST_TAGS and not in_list_item and next_kind is not None and next_kind not in _LIST_TAGS:
+                # 非嵌套列表后面还有其他内容时补一个换行
+                value += '\n'
+            strings.append(value)
+        return ''.join(strings)
+
+    def _convert(self, element: _Element, text: str) -> str:
+        name = element.name
+        if name == 'p':
+            return '%s\n\n' % text if text else ''
+        if name in ('strong', 'b'):
+            return _inline(text, '**')
+        if name in ('em', 'i'):
+            return _inline(text, '*')
+        if name == 'br':
+            return '  \n'
+        if name == 'a':
+            return _convert_link(element.attrs, text)
+        if name == 'img':
+            attrs = element.attrs
+            title = attrs.get('title', '')
+            title_part = ' "%s"' % title.replace('"', r'\"') if title else ''
+            return '![%s](%s%s)' % (attrs.get('alt', ''), attrs.get('src', ''), title_part)
+        if name in _LIST_TAGS and any(ancestor.name == 'li' for ancestor in self.stack):
+            # 嵌套列表：缩进一级并去掉末尾换行
+            return '\n' + (_LINE_BEGINNING_RE.sub('\t', text) if text else '').rstrip()
+        # div、span 以及非嵌套列表（列表后的换行在父节点汇总时确定）
+        return text
+
+    def _convert_list_item(self, text: str, parent: _Element) -> str:
+        if parent.name == 'ol':
+            start = parent.attrs.get('start')
+            try:
+                start = int(start) if start else 1
+            except ValueError:
+                # markdownify 同样无法处理，交给它抛出原始错误
+                raise UnsupportedMarkup('ol start')
+            siblings = parent.children
+            position = sum(1 for index in range(len(siblings) - 1)
+                           if not _is_extracted(parent, siblings, index))
+            bullet = '%s.' % (start + position)
+        else:
+            depth = sum(1 for element in self.stack if element.name == 'ul') - 1
+            bullet = BULLETS[depth % len(BULLETS)]
+        return '%s %s\n' % (bullet, text.strip())
+
+
+def _chomp(text: str):
+    prefix = ' ' if text and text[0] == ' ' else ''
+    suffix = ' ' if text and text[-1] == ' ' else ''
+    return prefix, suffix, text.strip()
+
+
+def _inline(text: str, mark: str) -> str:
+    prefix, suffix, text = _chomp(text)
+    if not text:
+        return ''
+    return '%s%s%s%s%s' % (prefix, mark, text, mark, suffix)
+
+
+def _convert_link(attrs: dict, text: str) -> str:
+    prefix, suffix, text = _chomp(text)
+    if not text:
+        return ''
+    href = attrs.get('href')
+    title = attrs.get('title')
+    if text.replace(r'\_', '_') == href and not title:
+        return '<%s>' % href
+    title_part = ' "%s"' % title.replace('"', r'\"') if title else ''
+    return '%s[%s](%s%s)%s' % (prefix, text, href, title_part, suffix) if href else text
+
+
+@lru_cache(maxsize=None)
+def _markdownify_version() -> str:
+    try:
+        return metadata.version('markdownify')
+    except metadata.PackageNotFoundError:
+        return 'missing'
+
+
+def converter_signature(strip: Iterable[str] = ()) -> str:
+    """转换器版本和选项（含回退用的 markdownify 版本），用作转换缓存键的一部分"""
+    return f"wysiwyg-{CONVERTER_VERSION}|markdownify-{_markdownify_version()}|strip={','.join(sorted(strip))}"
+
+
+def wysiwyg_to_markdown(html: str, strip: Iterable[str] = ()) -> str:
+    """
+    将 Mighty 富文本片段转换为 Markdown
+
+    Args:
+        html: HTML片段
+        strip: 只保留内容、不做转换的标签（同 markdownify 的 strip 选项）
+
+    Returns:
+        str: Markdown文本；不在支持范围内的片段由 markdownify 转换
+    """
+    if not html:
+        return ''
+    strip = set(strip)
+    parser = _WysiwygParser(strip)
+    try:
+        parser.feed(html)
+        return parser.finish()
+    except UnsupportedMarkup:
+        from markdownify import markdownify as md
+        return md(html, heading_style="ATX", bullets=BULLETS, strip=list(strip) or None)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed attachment store
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from attachment_store import AttachmentStore
+
+
+def test_identical_bytes_stored_once():
+    """The same image under different URLs is stored once and shared"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AttachmentStore(Path(tmp))
+        first = store.store_bytes('https://cdn.example.com/a/cover.png', b'same-bytes', 'cover.png')
+        second = store.store_bytes('https://cdn.example.com/b/copy.png', b'same-bytes', 'copy.png')
+        other = store.store_bytes('https://cdn.example.com/c/cover.png', b'other-bytes', 'cover.png')
+
+        assert first == second
+        assert other != first
+        assert first.startswith('cover_') and first.endswith('.png')
+        assert sorted(path.name for path in Path(tmp).glob('*.png')) == sorted([first, other])
+
+
+def test_url_index_survives_reload():
+    """The URL -> hash index is persisted and only trusted while the file exists"""
+    url = 'https://cdn.example.com/a/cover.png'
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AttachmentStore(Path(tmp))
+        filename = store.store_bytes(url, b'image-bytes', 'cover.png')
+        store.save()
+
+        reloaded = AttachmentStore(Path(tmp))
+        assert reloaded.lookup(url) == filename
+        assert reloaded.lookup('https://cdn.example.com/unknown.png') is None
+
+        (Path(tmp) / filename).unlink()
+        assert reloaded.lookup(url) is None
+
+
+def test_freshness_and_validators():
+    """Validators are recorded for conditional requests and a 304 refreshes the check time"""
+    url = 'https://cdn.example.com/a/cover.png'
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AttachmentStore(Path(tmp))
+        store.store_bytes(url, b'image-bytes', 'cover.png', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+
+        assert store.is_fresh(url, ttl=3600)
+        assert not store.is_fresh(url, ttl=0)
+        assert store.conditional_headers(url) == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+        }
+
+        store.urls[url]['checked_at'] -= 7200
+        assert not store.is_fresh(url, ttl=3600)
+        store.touch(url, etag='"v2"')
+        assert store.is_fresh(url, ttl=3600)
+        assert store.conditional_headers(url)['If-None-Match'] == '"v2"'
+
+
+if __name__ == "__main__":
+    test_identical_bytes_stored_once()
+    test_url_index_survives_reload()
+    test_freshness_and_validators()
+    print("✅ Attachment store tests passed")
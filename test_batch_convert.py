@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for manifest-driven parallel batch conversion
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from batch_convert import ConversionManifest, run_batch
+
+
+def convert_upper(input_path, output_dir):
+    """Top-level converter so it can run in the process pool"""
+    output_path = Path(output_dir) / f"{Path(input_path).stem}.md"
+    output_path.write_text(Path(input_path).read_text(encoding='utf-8').upper(), encoding='utf-8')
+    return str(output_path)
+
+
+def test_only_changed_inputs_are_reconverted():
+    """Unchanged inputs are skipped; content, version or missing outputs trigger reconversion"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs = []
+        for index in range(3):
+            path = tmp / f"post_{index}.json"
+            path.write_text(f'{{"id": {index}}}', encoding='utf-8')
+            inputs.append(path)
+
+        def run(version='v1'):
+            manifest = ConversionManifest(tmp / '.conversion_manifest.json')
+            return run_batch(inputs, convert_upper, manifest, version, args=(str(tmp),), processes=2)
+
+        assert run() == {'converted': 3, 'skipped': 0, 'failed': 0}
+        assert (tmp / 'post_0.md').read_text(encoding='utf-8') == '{"ID": 0}'
+        assert run() == {'converted': 0, 'skipped': 3, 'failed': 0}
+
+        inputs[1].write_text('{"id": 10}', encoding='utf-8')
+        (tmp / 'post_2.md').unlink()
+        assert run() == {'converted': 2, 'skipped': 1, 'failed': 0}
+        assert run(version='v2') == {'converted': 3, 'skipped': 0, 'failed': 0}
+
+
+if __name__ == "__main__":
+    test_only_changed_inputs_are_reconverted()
+    print("✅ Batch convert tests passed")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for batched comment expansion
+"""
+
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from batch_expand import _CLICK_ALL_JS, expand_in_rounds, split_text_selector
+from scraper import PREVIOUS_COMMENTS_SELECTORS
+
+# 在 node 中运行页面内点击脚本的最小 DOM：selector -> 元素列表，元素按名字共享
+NODE_HARNESS = """
+const [script, specs, page] = JSON.parse(process.argv[1]);
+const elements = {};
+const clicked = [];
+for (const [name, text, visible] of page.elements) {
+    elements[name] = {
+        textContent: text,
+        getClientRects: () => (visible ? [{}] : []),
+        click: () => clicked.push(name)
+    };
+}
+global.document = {
+    querySelectorAll: (css) => (page.matches[css] || []).map((name) => elements[name])
+};
+const count = eval(script)(specs);
+console.log(JSON.stringify({ count, clicked }));
+"""
+
+
+class StandInConfig:
+    WAIT_TIME = 0
+    DOM_STABLE_TIMEOUT = 1000
+
+
+class StandInPage:
+    """每轮批量点击返回预设的点击数，其他脚本（稳定等待）直接返回"""
+
+    def __init__(self, clicks_per_round):
+        self.clicks_per_round = list(clicks_per_round)
+        self.click_specs = []
+        self.stable_waits = 0
+
+    async def evaluate(self, script, arg=None):
+        if script == _CLICK_ALL_JS:
+            self.click_specs.append(arg)
+            return self.clicks_per_round.pop(0)
+        return None
+
+    async def wait_for_function(self, script, arg=None, timeout=None, polling=None):
+        self.stable_waits += 1
+
+
+def test_split_text_selector():
+    """:has-text("...") is split into plain CSS and a lowercase text filter"""
+    assert split_text_selector('a.more:has-text("More")') == {'css': 'a.more', 'text': 'more'}
+    assert split_text_selector("button:has-text('Previous Comments')") == {'css': 'button', 'text': 'previous comments'}
+    assert split_text_selector(':has-text("more")') == {'css': '*', 'text': 'more'}
+    assert split_text_selector('div.load-more') == {'css': 'div.load-more', 'text': ''}
+
+
+def run_click_script(selectors, elements, matches):
+    """Runs the in-page click script under node against a stand-in document"""
+    specs = [split_text_selector(selector) for selector in selectors]
+    arg = json.dumps([_CLICK_ALL_JS, specs, {'elements': elements, 'matches': matches}])
+    output = subprocess.run(['node', '-e', NODE_HARNESS, arg], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_fallback_selector_clicks_links_skipped_by_text_filter():
+    """An <a> rejected by the :has-text spec can still be clicked by the fallback selector"""
+    if shutil.which('node') is None:
+        print("⚠️ node not found, skipping in-page click script test")
+        return
+    fallback = PREVIOUS_COMMENTS_SELECTORS[1]
+    elements = [['load-previous', 'Load earlier replies', True],
+                ['profile-link', 'Alice', True],
+                ['hidden', 'Previous Comments', False]]
+    # 第一个选择器 a:has-text(...) 只剩CSS 'a'，匹配页面上所有链接
+    matches = {'a': ['load-previous', 'profile-link', 'hidden'], fallback: ['load-previous']}
+
+    result = run_click_script(PREVIOUS_COMMENTS_SELECTORS, elements, matches)
+
+    assert result == {'count': 1, 'clicked': ['load-previous']}
+
+
+def test_rounds_stop_when_nothing_is_clicked():
+    """Each round clicks everything at once and waits for stability once"""
+    page = StandInPage([3, 1, 0])
+
+    rounds, clicks = asyncio.run(expand_in_rounds(page, StandInConfig, ['a:has-text("more")'], 'more'))
+
+    assert (rounds, clicks) == (2, 4)
+    assert page.stable_waits == 2
+    assert page.click_specs[0] == [{'css': 'a', 'text': 'more'}]
+
+
+def test_rounds_respect_limit_and_stop_condition():
+    """max_rounds caps the loop; a true stop_condition ends it before clicking"""
+    page = StandInPage([1] * 5)
+    assert asyncio.run(expand_in_rounds(page, StandInConfig, ['a'], 'more', max_rounds=3)) == (3, 3)
+
+    async def stop():
+        return True
+
+    page = StandInPage([1])
+    assert asyncio.run(expand_in_rounds(page, StandInConfig, ['a'], 'more', stop_condition=stop)) == (0, 0)
+    assert page.click_specs == []
+
+
+if __name__ == "__main__":
+    test_split_text_selector()
+    test_fallback_selector_clicks_links_skipped_by_text_filter()
+    test_rounds_stop_when_nothing_is_clicked()
+    test_rounds_respect_limit_and_stop_condition()
+    print("✅ Batch expand tests passed")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared browser pool
+Uses a stand-in browser so no real browser is launched
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from browser_pool import BrowserPool, get_browser_attempts
+
+
+class StandInConfig:
+    HEADLESS = False
+    TIMEOUT = 1000
+    CONTEXT_RECYCLE_POSTS = 2
+    AUTH_FILE = Path('/nonexistent/auth.json')
+
+
+class StandInPage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+
+    def set_default_timeout(self, timeout):
+        self.timeout = timeout
+
+    async def close(self):
+        self.closed = True
+
+
+class StandInContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return StandInPage(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class StandInBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self, **options):
+        context = StandInContext()
+        self.contexts.append(context)
+        return context
+
+
+def make_pool():
+    pool = BrowserPool(StandInConfig)
+    pool._browser = StandInBrowser()
+    return pool
+
+
+def test_browser_attempts_follow_headless_setting():
+    """Firefox comes first; the minimal Chromium attempt is always headless"""
+    attempts = get_browser_attempts(StandInConfig)
+
+    assert [attempt['type'] for attempt in attempts] == ['firefox', 'chromium', 'chromium']
+    assert attempts[0]['headless'] is False
+    assert attempts[1]['headless'] is True
+
+
+def test_pages_share_a_context_until_recycled():
+    """A context serves CONTEXT_RECYCLE_POSTS pages, then is closed and replaced"""
+    async def scenario():
+        pool = make_pool()
+        pages = []
+        for _ in range(3):
+            async with pool.page() as page:
+                pages.append(page)
+        return pool, pages
+
+    pool, pages = asyncio.run(scenario())
+
+    first, second = pool._browser.contexts
+    assert [page.context for page in pages] == [first, first, second]
+    assert all(page.closed for page in pages)
+    assert first.closed and not second.closed
+
+
+def test_retired_context_waits_for_borrowed_pages():
+    """A context rotated out while a page is borrowed closes only when that page is returned"""
+    async def scenario():
+        pool = make_pool()
+        async with pool.page():
+            pass
+        async with pool.page() as held:
+            # 第三次借用触发轮换，但旧上下文中仍有页面在使用
+            async with pool.page() as page:
+                assert page.context is not held.context
+            assert not held.context.closed
+        return held.context
+
+    assert asyncio.run(scenario()).closed
+
+
+if __name__ == "__main__":
+    test_browser_attempts_follow_headless_setting()
+    test_pages_share_a_context_until_recycled()
+    test_retired_context_waits_for_borrowed_pages()
+    print("✅ Browser pool tests passed")
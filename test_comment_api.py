@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for building comment trees from captured comment API payloads
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from comment_api import (
+    api_capture_is_complete,
+    build_comment_tree_from_payloads,
+    merge_api_and_dom_comments,
+    normalize_comment_id
+)
+from scraper import extract_comments_with_api
+
+
+SAMPLE_PAYLOADS = [
+    # 第一次加载：最新的评论，回复通过 parent_id 关联
+    {
+        'post': {'id': 43168058, 'body': '<p>帖子正文不应被当作评论</p>'},
+        'items': [
+            {'id': 3, 'body_html': '<p>第三条</p>', 'creator': {'name': 'Carol'},
+             'created_at': '2024-03-03T10:00:00Z'},
+            {'id': 4, 'parent_id': 1, 'body_html': '<p>回复第一条</p>', 'creator': {'name': 'Dave'},
+             'created_at': '2024-03-04T10:00:00Z'},
+        ]
+    },
+    # 点击 "Previous Comments" 后加载的更早评论，回复嵌套在 replies 中
+    {
+        'comments': [
+            {'id': 1, 'body_html': '<p>第一条</p>', 'creator': {'name': 'Alice'},
+             'created_at': '2024-03-01T10:00:00Z',
+             'replies': [
+                 {'id': 2, 'body_html': '<p>嵌套回复</p>', 'user': {'full_name': 'Bob'},
+                  'created_at': '2024-03-02T10:00:00Z'}
+             ]},
+        ]
+    }
+]
+
+
+def test_normalize_comment_id():
+    """DOM id and API id should normalize to the same value"""
+    assert normalize_comment_id('comment-12345') == '12345'
+    assert normalize_comment_id(12345) == '12345'
+    assert normalize_comment_id(None) == ''
+    # 只去掉已知的DOM前缀，其他ID原样保留
+    assert normalize_comment_id('abc-7') != normalize_comment_id('xyz-7')
+    assert normalize_comment_id('0f8e2a6c-1b3d-4c5e-9a7b-000000000042') == '0f8e2a6c-1b3d-4c5e-9a7b-000000000042'
+
+
+def test_build_comment_tree():
+    """Comments from several payloads form one ordered tree"""
+    tree = build_comment_tree_from_payloads(SAMPLE_PAYLOADS)
+
+    assert [comment['id'] for comment in tree] == ['1', '3']
+    first = tree[0]
+    assert first['author'] == 'Alice'
+    assert first['text'] == '<p>第一条</p>'
+    assert [reply['id'] for reply in first['replies']] == ['2', '4']
+    assert first['replies'][0]['author'] == 'Bob'
+    assert first['replies'][0]['depth'] == 1
+
+
+def test_merge_with_dom_comments():
+    """DOM fills missing fields and contributes comments the API never returned"""
+    api_tree = build_comment_tree_from_payloads([
+        {'comments': [{'id': 1, 'body_html': '<p>完整正文</p>'}]}
+    ])
+    dom_tree = [
+        {'id': 'comment-1', 'text': '<p>截断…</p>', 'author': 'Alice', 'timestamp': '2w',
+         'replies': [{'id': 'comment-5', 'text': '<p>页面回复</p>', 'author': 'Eve',
+                      'timestamp': '1w', 'replies': []}]},
+        {'id': 'comment-9', 'text': '<p>只在页面中</p>', 'author': 'Frank', 'timestamp': '3d', 'replies': []}
+    ]
+
+    merged = merge_api_and_dom_comments(api_tree, dom_tree)
+
+    assert [comment['id'] for comment in merged] == ['1', '9']
+    assert merged[0]['text'] == '<p>完整正文</p>'
+    assert merged[0]['author'] == 'Alice'
+    assert merged[0]['timestamp'] == '2w'
+    assert merged[0]['replies'][0]['id'] == '5'
+    assert merged[0]['replies'][0]['depth'] == 1
+
+
+def test_api_capture_completeness():
+    """The capture is complete only when it covers the page's count with every field present"""
+    api_tree = build_comment_tree_from_payloads(SAMPLE_PAYLOADS)
+
+    assert api_capture_is_complete(api_tree, 4)
+    assert api_capture_is_complete(api_tree, 3)
+    assert not api_capture_is_complete(api_tree, 5)
+    # 页面没有显示评论数时无法判断
+    assert not api_capture_is_complete(api_tree, None)
+    # 缺少作者的评论需要DOM补齐
+    api_tree[0]['replies'][0]['author'] = ''
+    assert not api_capture_is_complete(api_tree, 4)
+
+
+class StandInLocator:
+    def __init__(self, text):
+        self.text = text
+        self.first = self
+
+    async def count(self):
+        return 1 if self.text else 0
+
+    async def text_content(self):
+        return self.text
+
+
+class StandInPage:
+    """评论头部显示 comment_count 条评论；DOM提取（page.evaluate）被记录下来"""
+
+    def __init__(self, comment_count):
+        self.comment_count = comment_count
+        self.evaluated = 0
+
+    def locator(self, selector):
+        return StandInLocator(f'{self.comment_count} Comments' if selector == '.comment-count' else None)
+
+    async def evaluate(self, script, arg=None):
+        self.evaluated += 1
+        return [{'id': 'comment-9', 'depth': 0, 'html': '<p>只在页面中</p>', 'author': 'Frank',
+                 'timestamp': '3d', 'replies': []}]
+
+
+class StandInRecorder:
+    payloads = SAMPLE_PAYLOADS
+
+    async def drain(self):
+        pass
+
+
+def test_complete_capture_skips_dom_extraction():
+    """DOM extraction runs only when the API capture falls short of the page's comment count"""
+    page = StandInPage(4)
+    comments = asyncio.run(extract_comments_with_api(page, None, StandInRecorder()))
+    assert page.evaluated == 0
+    assert [comment['id'] for comment in comments] == ['1', '3']
+
+    page = StandInPage(5)
+    comments = asyncio.run(extract_comments_with_api(page, None, StandInRecorder()))
+    assert page.evaluated == 1
+    assert [comment['id'] for comment in comments] == ['1', '3', '9']
+
+
+if __name__ == "__main__":
+    test_normalize_comment_id()
+    test_build_comment_tree()
+    test_merge_with_dom_comments()
+    test_api_capture_completeness()
+    test_complete_capture_skips_dom_extraction()
+    print("✅ Comment API tests passed")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-evaluate comment tree extractor
+The browser side is replaced by a stand-in page that returns the raw tree
+"""
+
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from comment_extractor import _convert_node, extract_comment_tree
+from stream_store import save_thread_data
+
+RAW_TREE = [
+    {'id': 'c1', 'depth': 0, 'html': '<p>first</p>', 'author': 'Alice', 'timestamp': '2h', 'replies': [
+        {'id': 'c2', 'depth': 1, 'html': '<p>reply</p>', 'author': 'Bob', 'timestamp': '1h', 'replies': []},
+        # 正文为空的回复被跳过
+        {'id': 'c3', 'depth': 1, 'html': '   ', 'author': 'Carol', 'timestamp': '1h', 'replies': []}
+    ]},
+    {'id': 'c4', 'depth': 0, 'html': '', 'author': 'Dan', 'timestamp': '3h', 'replies': []}
+]
+
+# 在 node 中运行评论树脚本的最小 DOM：只支持 tag / .class / #id 形式的简单选择器
+NODE_HARNESS = """
+const [script, opts, tree] = JSON.parse(process.argv[1]);
+const simple = /^(\\w+)?(?:\\.([\\w-]+))?(?:#([\\w-]+))?$/;
+const matches = (el, css) => {
+    const m = simple.exec(css);
+    return Boolean(m) && (!m[1] || el.tag === m[1]) && (!m[2] || el.classes.includes(m[2])) &&
+        (!m[3] || el.id === m[3]);
+};
+const build = (spec, parent) => {
+    const el = {
+        tag: spec.tag, id: spec.id || '', classes: spec.cls ? spec.cls.split(' ') : [],
+        parentElement: parent, innerHTML: spec.html || ''
+    };
+    el.children = (spec.children || []).map((child) => build(child, el));
+    el.textContent = (spec.text || '') + el.children.map((child) => child.textContent).join('');
+    el.getAttribute = (name) => (name === 'id' ? el.id : null);
+    el.closest = (css) => {
+        for (let node = el; node; node = node.parentElement) {
+            if (matches(node, css)) return node;
+        }
+        return null;
+    };
+    el.querySelectorAll = (css) => {
+        const found = [];
+        const visit = (node) => node.children.forEach((child) => {
+            if (matches(child, css)) found.push(child);
+            visit(child);
+        });
+        visit(el);
+        return found;
+    };
+    el.contains = (other) => other === el || el.querySelectorAll(other.tag).includes(other);
+    return el;
+};
+const root = build(tree, null);
+global.document = { querySelector: (css) => (matches(root, css) ? root : root.querySelectorAll(css)[0] || null) };
+console.log(JSON.stringify(eval(script)(opts)));
+"""
+
+
+def comment_li(dom_id, author, timestamp, html, replies=()):
+    """评论 li：作者和时间带有页面模板中的换行和缩进"""
+    return {'tag': 'li', 'id': dom_id, 'children': [
+        {'tag': 'div', 'cls': 'comment-header', 'children': [
+            {'tag': 'span', 'cls': 'comment-author', 'text': author},
+            {'tag': 'span', 'cls': 'timestamp', 'text': timestamp}
+        ]},
+        {'tag': 'div', 'cls': 'comment-body', 'html': html},
+        {'tag': 'ul', 'children': list(replies)}
+    ]}
+
+
+class NodePage:
+    """在 node 中对给定的 DOM 执行 page.evaluate 脚本"""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    async def evaluate(self, script, arg=None):
+        harness_arg = json.dumps([script, arg, self.tree])
+        output = subprocess.run(['node', '-e', NODE_HARNESS, harness_arg],
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output)
+
+
+class StandInPage:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def evaluate(self, script, arg=None):
+        self.calls.append((script, arg))
+        return self.result
+
+
+def test_convert_node_builds_nested_comments():
+    """Nodes become comment dicts with cleaned text; empty bodies are dropped"""
+    comment = _convert_node(RAW_TREE[0], str.upper)
+
+    assert comment == {
+        'text': '<P>FIRST</P>', 'author': 'Alice', 'timestamp': '2h',
+        'replies': [{'text': '<P>REPLY</P>', 'author': 'Bob', 'timestamp': '1h',
+                     'replies': [], 'id': 'c2', 'depth': 1}],
+        'id': 'c1', 'depth': 0
+    }
+    assert _convert_node(RAW_TREE[1], str.upper) is None
+
+
+def test_convert_node_defaults_missing_fields():
+    """Missing author, timestamp, id and depth fall back to empty values"""
+    comment = _convert_node({'html': '<p>x</p>'}, lambda html: html)
+
+    assert comment == {'text': '<p>x</p>', 'author': '', 'timestamp': '', 'replies': [], 'id': '', 'depth': 0}
+
+
+def test_extract_comment_tree_uses_one_evaluate():
+    """The whole tree comes from a single page.evaluate call"""
+    page = StandInPage(RAW_TREE)
+
+    comments = asyncio.run(extract_comment_tree(page, '#sidebar-comments-region', lambda html: html))
+
+    assert len(page.calls) == 1
+    assert page.calls[0][1]['container'] == '#sidebar-comments-region'
+    assert [comment['id'] for comment in comments] == ['c1']
+    assert [reply['id'] for reply in comments[0]['replies']] == ['c2']
+
+
+def test_missing_region_returns_none():
+    """No comment region on the page gives None, not an empty list"""
+    assert asyncio.run(extract_comment_tree(StandInPage(None), '#missing', lambda html: html)) is None
+
+
+def test_untrimmed_author_and_timestamp_stay_out_of_data_json():
+    """Whitespace around author and timestamp in the page is trimmed before data.json is written"""
+    if shutil.which('node') is None:
+        print("⚠️ node not found, skipping in-page comment tree script test")
+        return
+    tree = {'tag': 'div', 'id': 'sidebar-comments-region', 'children': [{'tag': 'ul', 'children': [
+        comment_li('c1', '\n      Alice\n    ', '  2h\n', '<p>first</p>', [
+            comment_li('c2', '\tBob ', '\n 1h ', '<p>reply</p>')
+        ])
+    ]}]}
+
+    comments = asyncio.run(extract_comment_tree(NodePage(tree), '#sidebar-comments-region', lambda html: html))
+    with tempfile.TemporaryDirectory() as folder:
+        json_file = save_thread_data(Path(folder), {'comments': comments}, 'json')
+        saved = json.loads(json_file.read_text(encoding='utf-8'))['comments']
+
+    assert [(comment['author'], comment['timestamp']) for comment in saved] == [('Alice', '2h')]
+    assert [(reply['author'], reply['timestamp']) for reply in saved[0]['replies']] == [('Bob', '1h')]
+    assert saved[0]['text'] == '<p>first</p>'
+
+
+if __name__ == "__main__":
+    test_convert_node_builds_nested_comments()
+    test_convert_node_defaults_missing_fields()
+    test_extract_comment_tree_uses_one_evaluate()
+    test_missing_region_returns_none()
+    test_untrimmed_author_and_timestamp_stay_out_of_data_json()
+    print("✅ Comment extractor tests passed")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-host rate limiter and the ordered per-post logger
+"""
+
+import asyncio
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from concurrency import HostRateLimiter, OrderedPostLogger, install_request_throttling
+
+
+def test_logs_are_ordered_and_not_interleaved():
+    """Posts finishing out of order still print whole, in input order"""
+    async def post(logger, index):
+        with logger.capture(index):
+            print(f"start {index}")
+            # 后面的帖子先完成
+            await asyncio.sleep(0.01 * (4 - index))
+            print(f"end {index}")
+
+    async def scenario():
+        logger = OrderedPostLogger(start_index=1)
+        with logger.install():
+            await asyncio.gather(*(post(logger, index) for index in range(1, 4)))
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        asyncio.run(scenario())
+
+    assert output.getvalue().splitlines() == ['start 1', 'end 1', 'start 2', 'end 2', 'start 3', 'end 3']
+
+
+def test_failed_post_does_not_block_later_logs():
+    """A post that raises still releases its slot in the output order"""
+    async def post(logger, index):
+        with logger.capture(index):
+            print(f"post {index}")
+            if index == 1:
+                raise RuntimeError('boom')
+
+    async def scenario():
+        logger = OrderedPostLogger(start_index=1)
+        with logger.install():
+            await asyncio.gather(post(logger, 1), post(logger, 2), return_exceptions=True)
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        asyncio.run(scenario())
+
+    assert output.getvalue().splitlines() == ['post 1', 'post 2']
+
+
+def test_throttle_spaces_requests_per_host():
+    """Requests to one host are spaced by request_interval; other hosts are not delayed"""
+    async def scenario():
+        limiter = HostRateLimiter(0, request_interval=0.05)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.throttle('http://a.test/api') for _ in range(4)))
+        same_host = time.monotonic() - start
+
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.throttle(f'http://host{n}.test/api') for n in range(4)))
+        other_hosts = time.monotonic() - start
+        return same_host, other_hosts
+
+    same_host, other_hosts = asyncio.run(scenario())
+
+    assert same_host >= 0.15
+    assert other_hosts < 0.05
+
+
+def test_page_throttling_covers_document_and_api_requests():
+    """The page route throttles document/xhr/fetch requests and hands every request on"""
+    class FakeRequest:
+        def __init__(self, resource_type, url):
+            self.resource_type = resource_type
+            self.url = url
+
+    class FakeRoute:
+        def __init__(self, resource_type, url):
+            self.request = FakeRequest(resource_type, url)
+            self.fell_back = False
+
+        async def fallback(self):
+            self.fell_back = True
+
+    class FakePage:
+        async def route(self, pattern, handler):
+            self.handler = handler
+
+    class RecordingLimiter:
+        def __init__(self):
+            self.throttled = []
+
+        async def throttle(self, url):
+            self.throttled.append(url)
+
+    async def scenario():
+        page, limiter = FakePage(), RecordingLimiter()
+        await install_request_throttling(page, limiter)
+        routes = [FakeRoute('document', 'http://site.test/posts/1'),
+                  FakeRoute('xhr', 'http://site.test/api/comments?page=2'),
+                  FakeRoute('image', 'http://cdn.test/a.png')]
+        for route in routes:
+            await page.handler(route)
+        return limiter.throttled, routes
+
+    throttled, routes = asyncio.run(scenario())
+
+    assert throttled == ['http://site.test/posts/1', 'http://site.test/api/comments?page=2']
+    assert all(route.fell_back for route in routes)
+
+
+if __name__ == "__main__":
+    test_logs_are_ordered_and_not_interleaved()
+    test_failed_post_does_not_block_later_logs()
+    test_throttle_spaces_requests_per_host()
+    test_page_throttling_covers_document_and_api_requests()
+    print("✅ Concurrency tests passed")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the event-driven DOM stability wait
+The page is a stand-in that records the scripts it is asked to run
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from dom_stability import (
+    COMMENT_REGION_SELECTOR, _INSTALL_TRACKER_JS, _IS_STABLE_JS, _MARK_ACTIVITY_JS, wait_for_dom_stable
+)
+
+
+class StandInConfig:
+    WAIT_TIME = 500
+    DOM_STABLE_TIMEOUT = 10000
+
+
+class StandInPage:
+    def __init__(self, settles=True):
+        self.settles = settles
+        self.evaluated = []
+        self.waits = []
+
+    async def evaluate(self, script, arg=None):
+        self.evaluated.append((script, arg))
+
+    async def wait_for_function(self, script, arg=None, timeout=None, polling=None):
+        self.waits.append((script, arg, timeout))
+        if not self.settles:
+            raise TimeoutError('Timeout exceeded')
+
+
+def test_waits_with_configured_quiet_window():
+    """The tracker is installed, activity is marked, then the stability check polls"""
+    page = StandInPage()
+
+    assert asyncio.run(wait_for_dom_stable(page, StandInConfig)) is True
+    assert page.evaluated == [(_INSTALL_TRACKER_JS, COMMENT_REGION_SELECTOR), (_MARK_ACTIVITY_JS, None)]
+    assert page.waits == [(_IS_STABLE_JS, 500, 10000)]
+
+
+def test_explicit_window_overrides_config():
+    """quiet_ms and timeout_ms arguments take precedence over the config"""
+    page = StandInPage()
+
+    asyncio.run(wait_for_dom_stable(page, StandInConfig, selector='#x', quiet_ms=50, timeout_ms=200))
+
+    assert page.evaluated[0] == (_INSTALL_TRACKER_JS, '#x')
+    assert page.waits == [(_IS_STABLE_JS, 50, 200)]
+
+
+def test_timeout_returns_false():
+    """A region that never settles returns False instead of raising"""
+    assert asyncio.run(wait_for_dom_stable(StandInPage(settles=False), StandInConfig)) is False
+
+
+if __name__ == "__main__":
+    test_waits_with_configured_quiet_window()
+    test_explicit_window_overrides_config()
+    test_timeout_returns_false()
+    print("✅ DOM stability tests passed")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for reflink / hard link / copy attachment migration
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from file_linking import FileLinker
+
+
+def test_auto_mode_avoids_copying_on_same_filesystem():
+    """Auto mode clones or hard-links within one filesystem and records the strategy"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'source.png'
+        source.write_bytes(b'\x89PNG' + b'\0' * 1024)
+        linker = FileLinker('auto')
+
+        strategy = linker.link(source, Path(tmp) / 'linked.png')
+        assert strategy in ('reflink', 'hardlink')
+        assert (Path(tmp) / 'linked.png').read_bytes() == source.read_bytes()
+        if strategy == 'hardlink':
+            assert os.path.samefile(source, Path(tmp) / 'linked.png')
+        assert linker.counts[strategy] == 1
+
+
+def test_copy_mode_and_fallback():
+    """Copy mode always copies; an unsupported strategy falls through to the next one"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'source.png'
+        source.write_bytes(b'image')
+
+        linker = FileLinker('copy')
+        assert linker.link(source, Path(tmp) / 'copied.png') == 'copy'
+        assert not os.path.samefile(source, Path(tmp) / 'copied.png')
+
+        linker = FileLinker('hardlink')
+        device_pair = (source.stat().st_dev, tmp)
+        linker._unsupported.add(('hardlink', device_pair))
+        assert linker.link(source, Path(tmp) / 'fallback.png') == 'copy'
+        assert linker.counts == {'copy': 1}
+
+
+if __name__ == "__main__":
+    test_auto_mode_avoids_copying_on_same_filesystem()
+    test_copy_mode_and_fallback()
+    print("✅ File linking tests passed")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for single-parse HTML normalization
+"""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from html_normalizer import find_image_sources, normalize_fragment
+from image_processor import create_markdown_from_html
+
+
+def test_find_image_sources():
+    """Quoted, unquoted and entity-encoded src values are all found in order"""
+    html = '<img src="/a.png?x=1&amp;y=2"><IMG alt=x SRC=\'/b.gif\'><img src=/c.jpg>'
+    assert find_image_sources(html) == ['/a.png?x=1&y=2', '/b.gif', '/c.jpg']
+
+
+def test_normalize_fragment():
+    """System links are removed, images rewritten, hashtags kept in HTML but unwrapped in markdown"""
+    html = ('<p>读后感 <a class="mighty-hashtag" href="/tags/book">#book</a>'
+            '<img src="https://cdn.example.com/a.png"><a href="#">Reply</a></p>')
+    normalized_html, markdown = normalize_fragment(
+        html, {'https://cdn.example.com/a.png': '../attachments/a.png'}, clean_links=True
+    )
+
+    assert 'Reply' not in normalized_html
+    assert 'src="../attachments/a.png"' in normalized_html
+    assert 'mighty-hashtag' in normalized_html
+    assert markdown == create_markdown_from_html(normalized_html)
+
+
+def test_unchanged_fragment_is_returned_as_is():
+    """Fragments without rewrites keep their original HTML string"""
+    html = '<p>正文 <b>加粗</b> <a href="https://example.com">链接</a></p>'
+    normalized_html, markdown = normalize_fragment(html, {})
+    assert normalized_html is html
+    assert markdown == create_markdown_from_html(html)
+
+
+if __name__ == "__main__":
+    test_find_image_sources()
+    test_normalize_fragment()
+    test_unchanged_fragment_is_returned_as_is()
+    print("✅ HTML normalizer tests passed")
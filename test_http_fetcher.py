@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for the browserless HTTP fetch mode
+Runs against a local stand-in server that mimics the post and comment endpoints
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from http_fetcher import HttpPostFetcher, HttpFetchError
+
+
+POST_PAYLOAD = {
+    'post': {
+        'id': 42,
+        'title': '读书帖',
+        'body_html': '<p>正文内容</p>',
+        'creator': {'name': 'Yian'},
+        'created_at': '2024-03-01T10:00:00Z'
+    }
+}
+
+COMMENT_PAGES = {
+    '1': {
+        'items': [
+            {'id': 1, 'body_html': '<p>第一条</p>', 'creator': {'name': 'Alice'},
+             'created_at': '2024-03-01T11:00:00Z'}
+        ],
+        'links': {'next': '/api/v1/posts/42/comments?page=2'}
+    },
+    '2': {
+        'items': [
+            {'id': 2, 'parent_id': 1, 'body_html': '<p>回复</p>', 'creator': {'name': 'Bob'},
+             'created_at': '2024-03-01T12:00:00Z'}
+        ],
+        'links': {'next': None}
+    }
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """模拟帖子和评论接口，要求携带会话cookie"""
+
+    def do_GET(self):
+        if 'session=valid' not in (self.headers.get('Cookie') or ''):
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        parsed = urlparse(self.path)
+        if parsed.path == '/api/v1/posts/42':
+            body = POST_PAYLOAD
+        elif parsed.path == '/api/v1/posts/42/comments':
+            page = parse_qs(parsed.query).get('page', ['1'])[0]
+            body = COMMENT_PAGES[page]
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_config(site_url: str, auth_file: Path, cookie_value: str):
+    auth_file.write_text(json.dumps({
+        'cookies': [{'name': 'session', 'value': cookie_value, 'domain': '127.0.0.1', 'path': '/'}]
+    }))
+
+    class StandInConfig:
+        SITE_URL = site_url
+        AUTH_FILE = auth_file
+        TIMEOUT = 5000
+        HTTP_MAX_CONNECTIONS = 4
+        POST_API_URL_TEMPLATE = '{site}/api/v1/posts/{post_id}'
+        COMMENTS_API_URL_TEMPLATE = '{site}/api/v1/posts/{post_id}/comments'
+
+    return StandInConfig
+
+
+def run_with_server(coroutine_factory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        site_url = f"http://127.0.0.1:{server.server_address[1]}"
+        return asyncio.run(coroutine_factory(site_url))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_post_with_session_cookies():
+    """Post and paginated comments are fetched with the saved cookies"""
+    async def scenario(site_url):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = make_config(site_url, Path(tmp) / 'auth.json', 'valid')
+            async with HttpPostFetcher(config) as fetcher:
+                return await fetcher.fetch_post(f"{site_url}/posts/42", '42')
+
+    post_content, comments = run_with_server(scenario)
+
+    assert post_content['title'] == '读书帖'
+    assert post_content['content'] == '<p>正文内容</p>'
+    assert post_content['author'] == 'Yian'
+    assert [comment['id'] for comment in comments] == ['1']
+    assert comments[0]['replies'][0]['author'] == 'Bob'
+
+
+def test_expired_session_raises():
+    """An expired session raises HttpFetchError so the caller can fall back to the browser"""
+    async def scenario(site_url):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = make_config(site_url, Path(tmp) / 'auth.json', 'expired')
+            async with HttpPostFetcher(config) as fetcher:
+                try:
+                    await fetcher.fetch_post(f"{site_url}/posts/42", '42')
+                except HttpFetchError:
+                    return True
+                return False
+
+    assert run_with_server(scenario)
+
+
+def test_every_api_request_is_rate_limited():
+    """The post request and each comment page go through the rate limiter"""
+    class RecordingLimiter:
+        def __init__(self):
+            self.throttled = []
+
+        async def throttle(self, url):
+            self.throttled.append(url)
+
+    limiter = RecordingLimiter()
+
+    async def scenario(site_url):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = make_config(site_url, Path(tmp) / 'auth.json', 'valid')
+            async with HttpPostFetcher(config, limiter) as fetcher:
+                await fetcher.fetch_post(f"{site_url}/posts/42", '42')
+            return site_url
+
+    site_url = run_with_server(scenario)
+
+    assert limiter.throttled == [
+        f"{site_url}/api/v1/posts/42",
+        f"{site_url}/api/v1/posts/42/comments",
+        f"{site_url}/api/v1/posts/42/comments?page=2"
+    ]
+
+
+if __name__ == "__main__":
+    test_fetch_post_with_session_cookies()
+    test_expired_session_raises()
+    test_every_api_request_is_rate_limited()
+    print("✅ HTTP fetch tests passed")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the async image downloader
+Runs against a local server that serves slow images and counts concurrent requests
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from image_downloader import AsyncImageDownloader, process_post_images_async
+from image_harvester import CapturedImage
+
+
+class SlowImageHandler(BaseHTTPRequestHandler):
+    """每个图片延迟返回，并记录同时进行的最大请求数和请求次数"""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    requests = []
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.requests.append(self.path)
+        try:
+            time.sleep(0.2)
+            if self.path.startswith('/missing'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = b'\x89PNG' + self.path.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloaderConfig:
+    IMAGE_CONCURRENCY = 8
+    IMAGE_PER_HOST_LIMIT = 3
+    IMAGE_TIMEOUT = 5
+    IMAGE_CACHE_TTL = 0
+
+
+def test_post_images_downloaded_in_parallel():
+    """Post and comment images are downloaded together within the per-host limit"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/posts/1"
+
+    post_content = {'content': '<p><img src="/img/cover.png"><img src="/img/shared.png"></p>'}
+    comments = [
+        {'text': '<p><img src="/img/a.png"></p>', 'replies': [
+            {'text': '<p><img src="/img/b.png"><img src="/img/shared.png"></p>', 'replies': []}
+        ]},
+        {'text': '<p><img src="/missing.png"><img src="../attachments/old.png"></p>', 'replies': []}
+    ]
+
+    async def scenario(dest_dir):
+        async with AsyncImageDownloader(DownloaderConfig) as downloader:
+            return await process_post_images_async(post_content, comments, base_url, downloader, dest_dir)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            processed_content, processed_comments = asyncio.run(scenario(Path(tmp)))
+            saved = sorted(path.name.split('_')[0] for path in Path(tmp).glob('*.png'))
+            leftovers = [path.name for path in Path(tmp).iterdir() if path.name.startswith('.download-')]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert saved == ['a', 'b', 'cover', 'shared']
+    assert not leftovers
+    assert 'src="../attachments/cover_' in processed_content['content']
+    assert 'src="../attachments/shared_' in processed_comments[0]['replies'][0]['text']
+    # 下载失败和已是本地路径的图片保持原样
+    assert 'src="/missing.png"' in processed_comments[1]['text']
+    assert 'src="../attachments/old.png"' in processed_comments[1]['text']
+    # 原数据不变
+    assert 'src="/img/a.png"' in comments[0]['text']
+    # 同一URL只请求一次，并发请求不超过按主机上限
+    assert SlowImageHandler.requests.count('/img/shared.png') == 1
+    assert 1 < SlowImageHandler.max_in_flight <= DownloaderConfig.IMAGE_PER_HOST_LIMIT
+
+
+def test_captured_images_are_not_downloaded_again():
+    """Images already loaded by the browser are stored without a network request"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    site = f"http://127.0.0.1:{server.server_address[1]}"
+    post_content = {'content': '<p><img src="/img/seen.png"><img src="/img/lazy.png"></p>'}
+    captured = {f"{site}/img/seen.png": CapturedImage(b'\x89PNG-seen', 'image/png', '"v1"', None)}
+
+    async def scenario(dest_dir):
+        async with AsyncImageDownloader(DownloaderConfig) as downloader:
+            return await process_post_images_async(
+                post_content, [], f"{site}/posts/2", downloader, dest_dir, captured_images=captured
+            )
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            processed_content, _ = asyncio.run(scenario(Path(tmp)))
+            saved = sorted(path.name.split('_')[0] for path in Path(tmp).glob('*.png'))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert saved == ['lazy', 'seen']
+    assert 'src="../attachments/seen_' in processed_content['content']
+    assert '/img/seen.png' not in SlowImageHandler.requests
+    assert '/img/lazy.png' in SlowImageHandler.requests
+
+
+if __name__ == "__main__":
+    test_post_images_downloaded_in_parallel()
+    test_captured_images_are_not_downloaded_again()
+    print("✅ Image downloader tests passed")
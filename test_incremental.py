@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for merging incrementally scraped comments into a previous run
+"""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from incremental import collect_known_ids, merge_comment_trees
+
+
+OLD_COMMENTS = [
+    {'id': 'comment-1', 'author': 'Alice', 'text': '<p><img src="../attachments/a.png"></p>',
+     'timestamp': '2天前', 'replies': [
+         {'id': 'comment-2', 'author': 'Bob', 'text': '<p>回复</p>', 'timestamp': '2天前', 'replies': []}
+     ]},
+    {'id': 'comment-3', 'author': 'Carol', 'text': '<p>旧评论</p>', 'timestamp': '1天前', 'replies': []}
+]
+
+
+def test_collect_known_ids():
+    """Ids from the whole tree are normalized to their numeric part"""
+    assert collect_known_ids(OLD_COMMENTS) == {'1', '2', '3'}
+
+
+def test_merge_new_comments_and_replies():
+    """New comments and replies are appended, known comments keep their stored text"""
+    new_comments = [
+        {'id': '1', 'author': 'Alice', 'text': '<p><img src="https://cdn.example.com/a.png"></p>',
+         'timestamp': '3天前', 'replies': [
+             {'id': '2', 'author': 'Bob', 'text': '<p>回复</p>', 'timestamp': '3天前', 'replies': []},
+             {'id': '5', 'author': 'Dave', 'text': '<p>新回复</p>', 'timestamp': '1小时前', 'replies': []}
+         ]},
+        {'id': '4', 'author': 'Eve', 'text': '<p>新评论</p>', 'timestamp': '刚刚', 'replies': []}
+    ]
+
+    merged, added_count = merge_comment_trees(OLD_COMMENTS, new_comments)
+
+    assert added_count == 2
+    assert [comment['id'] for comment in merged] == ['comment-1', 'comment-3', '4']
+    assert merged[0]['text'] == OLD_COMMENTS[0]['text']
+    assert merged[0]['timestamp'] == '3天前'
+    assert [reply['author'] for reply in merged[0]['replies']] == ['Bob', 'Dave']
+    # 原始评论树不被修改
+    assert OLD_COMMENTS[0]['timestamp'] == '2天前'
+    assert len(OLD_COMMENTS[0]['replies']) == 1
+
+
+def test_merge_without_ids():
+    """Comments without ids are matched by author and text"""
+    old = [{'author': 'Alice', 'text': '<p>你好</p>', 'replies': []}]
+    new = [{'author': 'Alice', 'text': '<p>你好</p>', 'replies': []},
+           {'author': 'Bob', 'text': '<p>再见</p>', 'replies': []}]
+
+    merged, added_count = merge_comment_trees(old, new)
+
+    assert added_count == 1
+    assert len(merged) == 2
+
+
+def test_merge_without_ids_ignores_image_paths():
+    """Legacy comments with rewritten image paths still match the freshly scraped CDN version"""
+    old = [{'author': 'Alice', 'text': '<p>看图 <img alt="x" src="../attachments/a.png"/></p>', 'replies': []}]
+    new = [{'author': 'Alice', 'text': '<p>看图 <img alt="x" src="https://cdn.example.com/a.png"></p>',
+            'replies': []}]
+
+    merged, added_count = merge_comment_trees(old, new)
+
+    assert added_count == 0
+    assert len(merged) == 1
+    assert merged[0]['text'] == old[0]['text']
+
+
+if __name__ == "__main__":
+    test_collect_known_ids()
+    test_merge_new_comments_and_replies()
+    test_merge_without_ids()
+    test_merge_without_ids_ignores_image_paths()
+    print("✅ Incremental merge tests passed")
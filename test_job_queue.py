@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent SQLite job queue
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from job_queue import JobQueue
+
+
+def post_id(url: str) -> str:
+    return url.rstrip('/').split('/')[-1]
+
+
+def test_enqueue_and_skip_finished():
+    """Finished jobs are skipped on the next run, existing outputs count as finished"""
+    urls = ['https://example.com/posts/1', 'https://example.com/posts/2', 'https://example.com/posts/3']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+
+        with JobQueue(db_path) as queue:
+            added = queue.enqueue(urls, post_id, done_func=lambda url: url.endswith('/3'))
+            assert added == 3
+            assert queue.get(urls[2])['status'] == 'done'
+
+            job = queue.claim_next(max_attempts=3)
+            assert job['url'] == urls[0]
+            queue.mark_done(job['url'], 'articles/a.md', 'output/1/data.json')
+
+        # 重新运行：重复入队不会改变已有状态，只领取未完成的任务
+        with JobQueue(db_path) as queue:
+            assert queue.enqueue(urls, post_id) == 0
+            assert [job['url'] for job in queue.pending(max_attempts=3)] == urls[1:2]
+            job = queue.get(urls[0])
+            assert job['status'] == 'done'
+            assert job['canonical_id'] == '1'
+            assert job['json_path'] == 'output/1/data.json'
+            assert job['attempts'] == 0
+            assert job['duration'] is not None
+
+
+def test_resume_after_crash():
+    """Jobs left running by a crashed batch are reset to pending"""
+    url = 'https://example.com/posts/7'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+
+        with JobQueue(db_path) as queue:
+            queue.enqueue([url], post_id)
+            assert queue.claim_next(max_attempts=3)['url'] == url
+            # 模拟进程崩溃：没有 mark_done / mark_failed
+
+        with JobQueue(db_path) as queue:
+            assert queue.recover_interrupted() == 1
+            assert queue.get(url)['status'] == 'pending'
+            assert queue.counts() == {'pending': 1}
+
+
+def fail_once(db_path: Path, url: str, max_attempts: int):
+    """One incremental run that claims the job and fails it"""
+    with JobQueue(db_path) as queue:
+        queue.enqueue([url], post_id)
+        queue.requeue_done()
+        job = queue.claim_next(max_attempts)
+        assert job is not None
+        queue.mark_failed(url, RuntimeError('登录失败'))
+
+
+def test_retry_limit():
+    """Failed jobs are retried on later runs until the attempt limit is reached"""
+    url = 'https://example.com/posts/9'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+        for _ in range(2):
+            fail_once(db_path, url, max_attempts=3)
+
+        with JobQueue(db_path) as queue:
+            queue.enqueue([url], post_id)
+            job = queue.get(url)
+            assert job['status'] == 'failed'
+            assert job['last_error'] == '登录失败'
+            assert job['attempts'] == 2
+            assert queue.pending(max_attempts=2) == []
+            assert queue.claim_next(max_attempts=2) is None
+            assert queue.claim_next(max_attempts=3)['url'] == url
+
+
+def test_successes_do_not_use_up_retries():
+    """A job that succeeded many times and then failed once is still retried"""
+    url = 'https://example.com/posts/11'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+        # 增量模式下成功运行的次数超过重试上限
+        for _ in range(4):
+            with JobQueue(db_path) as queue:
+                queue.enqueue([url], post_id)
+                queue.requeue_done()
+                queue.claim_next(max_attempts=3)
+                queue.mark_done(url, 'articles/a.md', 'output/11/data.json')
+        fail_once(db_path, url, max_attempts=3)
+
+        with JobQueue(db_path) as queue:
+            queue.enqueue([url], post_id)
+            assert queue.get(url)['attempts'] == 1
+            assert queue.claim_next(max_attempts=3)['url'] == url
+
+
+def test_claim_jobs_in_order():
+    """Workers claim pending jobs in order; failures are retried on the next run only"""
+    urls = ['https://example.com/posts/1', 'https://example.com/posts/2', 'https://example.com/posts/3']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+
+        with JobQueue(db_path) as queue:
+            queue.enqueue(urls, post_id, done_func=lambda url: url.endswith('/3'))
+            assert [job['url'] for job in queue.pending(max_attempts=3)] == urls[:2]
+
+            first = queue.claim_next(max_attempts=3)
+            assert first['url'] == urls[0] and first['status'] == 'running' and first['attempts'] == 1
+            queue.mark_failed(first['url'], 'timeout')
+            second = queue.claim_next(max_attempts=3)
+            assert second['url'] == urls[1]
+            queue.mark_done(second['url'])
+            # 本次运行中失败的任务不会被立即再次领取
+            assert queue.claim_next(max_attempts=3) is None
+
+        # 下一次运行重试失败的任务；只领取本批次的URL
+        with JobQueue(db_path) as queue:
+            queue.enqueue(urls[:1], post_id)
+            assert [job['url'] for job in queue.pending(max_attempts=3)] == urls[:1]
+            assert queue.claim_next(max_attempts=3)['attempts'] == 2
+            assert queue.claim_next(max_attempts=3) is None
+
+
+def test_incremental_runs_keep_claiming_done_jobs():
+    """Incremental runs requeue finished jobs every time, beyond the attempt limit"""
+    url = 'https://example.com/posts/12'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.sqlite3'
+        for run in range(4):
+            with JobQueue(db_path) as queue:
+                queue.enqueue([url], post_id, done_func=lambda _: True)
+                assert queue.requeue_done() == 1
+                job = queue.claim_next(max_attempts=3)
+                assert job is not None and job['attempts'] == 1
+                queue.mark_done(url)
+
+
+if __name__ == "__main__":
+    test_enqueue_and_skip_finished()
+    test_resume_after_crash()
+    test_retry_limit()
+    test_successes_do_not_use_up_retries()
+    test_claim_jobs_in_order()
+    test_incremental_runs_keep_claiming_done_jobs()
+    print("✅ Job queue tests passed")
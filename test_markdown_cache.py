@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test script for the two-level HTML -> Markdown conversion cache
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from markdown_cache import MarkdownCache, make_cache_key
+
+
+def test_hits_survive_restart():
+    """Conversions are served from memory, then from disk after a restart"""
+    calls = []
+
+    def convert(html):
+        calls.append(html)
+        return html.upper()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'markdown_cache.sqlite3'
+        cache = MarkdownCache(db_path, max_bytes=1024 * 1024)
+        assert cache.convert('v1', '<p>a</p>', convert) == '<P>A</P>'
+        assert cache.convert('v1', '<p>a</p>', convert) == '<P>A</P>'
+        assert cache.convert('v2', '<p>a</p>', convert) == '<P>A</P>'
+        assert calls == ['<p>a</p>', '<p>a</p>']
+        assert (cache.hits, cache.misses) == (1, 2)
+        cache.close()
+
+        reopened = MarkdownCache(db_path, max_bytes=1024 * 1024)
+        assert reopened.convert('v1', '<p>a</p>', convert) == '<P>A</P>'
+        assert len(calls) == 2
+        reopened.close()
+
+
+def test_size_based_eviction():
+    """The disk layer drops least recently used entries once it is over its size limit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = MarkdownCache(Path(tmp) / 'markdown_cache.sqlite3', max_bytes=1000, memory_items=2)
+        for index in range(10):
+            cache.put(make_cache_key('v1', str(index)), 'x' * 200)
+
+        assert cache.evict() > 0
+        assert cache.total_bytes() <= 900
+        assert cache.get(make_cache_key('v1', '0')) is None
+        assert cache.get(make_cache_key('v1', '9')) == 'x' * 200
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_hits_survive_restart()
+    test_size_based_eviction()
+    print("✅ Markdown cache tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the slotted Comment/Post model and the flat comment tree
+"""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from markdown_renderer import render_obsidian_markdown
+from models import CommentTree, Post, count_comments
+
+LEGACY_COMMENTS = [
+    {'text': '<p>a</p>', 'author': 'A', 'timestamp': '1d', 'replies': [
+        {'text': '<p>a1</p>', 'author': 'B', 'timestamp': '1d', 'replies': [
+            {'text': '<p>a1x</p>', 'author': 'C', 'timestamp': '1h', 'replies': [], 'id': '3', 'depth': 2}
+        ], 'id': '2', 'depth': 1},
+        {'text': '<p>a2</p>', 'author': 'D', 'timestamp': '2h', 'replies': [], 'id': '4', 'depth': 1, 'likes': 5}
+    ], 'id': '1', 'depth': 0},
+    {'text': '<p>b</p>', 'author': 'E', 'timestamp': '3h', 'replies': [], 'id': '5', 'depth': 0}
+]
+
+
+def test_flat_tree_round_trip():
+    """Legacy nested comments flatten in preorder and convert back unchanged"""
+    tree = CommentTree.from_legacy(LEGACY_COMMENTS)
+
+    assert [comment.id for comment in tree] == ['1', '2', '3', '4', '5']
+    assert tree.parents == [-1, 0, 1, 0, -1]
+    assert tree.depths == [0, 1, 2, 1, 0]
+    assert tree.roots() == [0, 4]
+    assert tree.children(0) == [1, 3]
+    assert len(tree) == count_comments(LEGACY_COMMENTS) == 5
+    assert tree.to_legacy() == LEGACY_COMMENTS
+
+
+def test_round_trip_keeps_keys_exactly():
+    """Explicit None values, missing replies and key order survive a round trip"""
+    legacy = [
+        {'author': None, 'text': '<p>a</p>', 'replies': [{'text': '<p>b</p>', 'likes': 2}]},
+        {'id': '9', 'text': '<p>c</p>'}
+    ]
+
+    restored = CommentTree.from_legacy(legacy).to_legacy()
+
+    assert restored == legacy
+    assert [list(comment) for comment in restored] == [['author', 'text', 'replies'], ['id', 'text']]
+    assert list(restored[0]['replies'][0]) == ['text', 'likes']
+
+
+def test_subtree_and_map_text():
+    """Subtrees are contiguous slices; map_text leaves the original tree untouched"""
+    tree = CommentTree.from_legacy(LEGACY_COMMENTS)
+
+    subtree = tree.subtree(1)
+    assert [comment.author for comment in subtree] == ['B', 'C']
+    assert subtree.parents == [-1, 0]
+    assert subtree.to_legacy() == [LEGACY_COMMENTS[0]['replies'][0]]
+
+    upper = tree.map_text(str.upper)
+    assert upper.comments[3].text == '<P>A2</P>'
+    assert tree.comments[3].text == '<p>a2</p>'
+    assert upper.to_legacy()[0]['replies'][1]['likes'] == 5
+
+
+def test_post_and_rendering():
+    """Post converts to and from the legacy pair; rendering a tree matches rendering the list"""
+    post_content = {'title': 'T', 'content': '<p>body</p>', 'author': 'X', 'timestamp': '1d', 'url': 'u'}
+    post = Post.from_legacy(post_content, LEGACY_COMMENTS)
+
+    assert post.title == 'T'
+    assert post.to_legacy() == (post_content, LEGACY_COMMENTS)
+    assert render_obsidian_markdown(post_content, post.comments, 'u') == \
+        render_obsidian_markdown(post_content, LEGACY_COMMENTS, 'u')
+
+
+if __name__ == "__main__":
+    test_flat_tree_round_trip()
+    test_round_trip_keeps_keys_exactly()
+    test_subtree_and_map_text()
+    test_post_and_rendering()
+    print("✅ Model tests passed")
@@ -5,6 +5,7 @@ Tests date parsing, filename generation, and YAML frontmatter
 """
 
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Add the src directory to the Python path
@@ -36,6 +37,13 @@ def test_date_parsing():
         result = parse_relative_time_to_date(relative_time)
         print(f"  '{relative_time}' -> {result} ({expected})")
     
+    # ISO timestamps from HTTP mode keep their own date
+    assert parse_relative_time_to_date("2024-03-01") == "2024-03-01"
+    assert parse_relative_time_to_date("2024-03-01T10:00:00") == "2024-03-01"
+    utc_noon_local = datetime(2024, 3, 1, 12, tzinfo=timezone.utc).astimezone().strftime('%Y-%m-%d')
+    assert parse_relative_time_to_date("2024-03-01T12:00:00Z") == utc_noon_local
+    assert parse_relative_time_to_date("2024-03-01T12:00:00.123+00:00") == utc_noon_local
+    
     print("✅ Date parsing test completed\n")
 
 def test_title_sanitization():
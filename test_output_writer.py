@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for content-hash change detection and atomic output writes
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from output_writer import OutputManifest, atomic_write_text, compute_content_hash
+
+
+POST = {'title': '读书帖', 'content': '<p><img src="../attachments/cover.png"></p>'}
+COMMENTS = [{'id': '1', 'author': 'Alice', 'text': '<p>你好</p>', 'replies': []}]
+
+
+def test_hash_covers_content_and_attachments():
+    """The hash changes with the comment tree and with attachment files"""
+    with tempfile.TemporaryDirectory() as tmp:
+        attachments_dir = Path(tmp)
+        (attachments_dir / 'cover.png').write_bytes(b'1234')
+        original = compute_content_hash(POST, COMMENTS, attachments_dir)
+
+        assert compute_content_hash(dict(POST), [dict(COMMENTS[0])], attachments_dir) == original
+
+        edited = [dict(COMMENTS[0], text='<p>你好！</p>')]
+        assert compute_content_hash(POST, edited, attachments_dir) != original
+
+        (attachments_dir / 'cover.png').write_bytes(b'123456')
+        assert compute_content_hash(POST, COMMENTS, attachments_dir) != original
+
+
+def test_hash_ignores_relative_times():
+    """Relative timestamps that drift between runs do not change the hash; absolute ones do"""
+    post = dict(POST, timestamp='3h')
+    comments = [dict(COMMENTS[0], timestamp='2 hours ago',
+                     replies=[{'id': '2', 'text': '<p>回复</p>', 'timestamp': '5m', 'replies': []}])]
+    original = compute_content_hash(post, comments)
+
+    later_post = dict(post, timestamp='1d', scraped_at='2024-03-02T00:00:00')
+    later_comments = [dict(comments[0], timestamp='1 day ago',
+                           replies=[dict(comments[0]['replies'][0], timestamp='23h')])]
+    assert compute_content_hash(later_post, later_comments) == original
+
+    # 回复内容变化仍然会改变哈希
+    edited = [dict(comments[0], replies=[dict(comments[0]['replies'][0], text='<p>改了</p>')])]
+    assert compute_content_hash(post, edited) != original
+
+    dated = dict(post, timestamp='2024-03-01T10:00:00Z')
+    assert compute_content_hash(dated, comments) != compute_content_hash(
+        dict(post, timestamp='2024-03-02T10:00:00Z'), comments)
+
+
+def test_manifest_skips_unchanged_outputs():
+    """A recorded hash is unchanged only while the written files still exist"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        markdown_file = tmp / 'articles' / 'post.md'
+        json_file = tmp / 'output' / '1' / 'data.json'
+        atomic_write_text(markdown_file, '# 主帖内容')
+        atomic_write_text(json_file, '{}')
+
+        manifest = OutputManifest(tmp / 'manifest.json')
+        assert not manifest.is_unchanged('1', 'abc')
+        manifest.record('1', 'abc', markdown_file, json_file)
+
+        reloaded = OutputManifest(tmp / 'manifest.json')
+        assert reloaded.is_unchanged('1', 'abc')
+        assert not reloaded.is_unchanged('1', 'def')
+
+        markdown_file.unlink()
+        assert not reloaded.is_unchanged('1', 'abc')
+
+        # 原子写入不留下临时文件
+        assert [path.name for path in json_file.parent.iterdir()] == ['data.json']
+
+
+if __name__ == "__main__":
+    test_hash_covers_content_and_attachments()
+    test_hash_ignores_relative_times()
+    test_manifest_skips_unchanged_outputs()
+    print("✅ Output writer tests passed")
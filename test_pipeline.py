@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the staged scrape/render pipeline helpers
+"""
+
+import asyncio
+import contextvars
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from markdown_renderer import render_obsidian_markdown
+from pipeline import RenderStage, find_image_urls, prefetch_comment_images
+from render_pool import RenderPool
+
+
+class RecordingDownloader:
+    """只记录被提交的图片地址"""
+
+    def __init__(self):
+        self.prefetched = []
+
+    def prefetch(self, img_url, img_index, dest_dir=None):
+        self.prefetched.append(img_url)
+
+
+def test_find_and_prefetch_images():
+    """Remote image URLs are resolved and submitted, local attachments are skipped"""
+    html = '<p><img class="x" src="/img/a.png"><img src="../attachments/old.png"><IMG SRC=\'https://cdn.example.com/b.gif\'></p>'
+    assert find_image_urls(html, 'https://example.com/posts/1') == [
+        'https://example.com/img/a.png',
+        'https://cdn.example.com/b.gif'
+    ]
+
+    downloader = RecordingDownloader()
+    comments = [{'text': '<img src="/img/c.png">', 'replies': [{'text': '<img src="/img/d.png">', 'replies': []}]}]
+    assert prefetch_comment_images(downloader, comments, 'https://example.com/posts/1') == 2
+    assert downloader.prefetched == ['https://example.com/img/c.png', 'https://example.com/img/d.png']
+
+
+def test_render_stage_runs_in_submitter_context():
+    """Render jobs run in a worker but keep the submitting task's context variables"""
+    current_post = contextvars.ContextVar('current_post', default=None)
+
+    async def render(label):
+        await asyncio.sleep(0)
+        if label == 'bad':
+            raise ValueError('render failed')
+        return f"{label}:{current_post.get()}"
+
+    async def submit(stage, label):
+        current_post.set(label)
+        try:
+            return await stage.submit(render, label)
+        except ValueError as e:
+            return str(e)
+
+    async def scenario():
+        async with RenderStage(workers=2) as stage:
+            return await asyncio.gather(*(submit(stage, label) for label in ('a', 'b', 'bad')))
+
+    assert asyncio.run(scenario()) == ['a:a', 'b:b', 'render failed']
+
+
+def test_render_stage_queue_is_bounded():
+    """enqueue waits while the render queue is full, holding back the producer"""
+    async def scenario():
+        release = asyncio.Event()
+
+        async def render(label):
+            await release.wait()
+            return label
+
+        async with RenderStage(workers=1, max_pending=1) as stage:
+            first = await stage.enqueue(render, 'a')     # 被工作者取走
+            await asyncio.sleep(0)
+            second = await stage.enqueue(render, 'b')    # 占满队列
+            third = asyncio.ensure_future(stage.enqueue(render, 'c'))
+            await asyncio.sleep(0.01)
+            blocked = not third.done()
+            release.set()
+            return blocked, [await first, await second, await (await third)]
+
+    assert asyncio.run(scenario()) == (True, ['a', 'b', 'c'])
+
+
+def test_render_pool_matches_inline_rendering():
+    """Markdown rendered in a worker process matches rendering on the event loop thread"""
+    post_content = {'title': '读书帖', 'content': '<p>正文 <b>加粗</b></p>', 'timestamp': '2天前'}
+    comments = [{'author': 'Alice', 'text': '<p>评论</p>', 'timestamp': '1天前', 'replies': [
+        {'author': 'Bob', 'text': '<p>回复</p>', 'timestamp': '1小时前', 'replies': []}
+    ]}]
+    url = 'https://example.com/posts/1'
+
+    async def scenario():
+        async with RenderPool(1) as render_pool:
+            return await render_pool.run(render_obsidian_markdown, post_content, comments, url)
+
+    assert asyncio.run(scenario()) == render_obsidian_markdown(post_content, comments, url)
+
+
+if __name__ == "__main__":
+    test_find_and_prefetch_images()
+    test_render_stage_runs_in_submitter_context()
+    test_render_stage_queue_is_bounded()
+    test_render_pool_matches_inline_rendering()
+    print("✅ Pipeline tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for request blocking during scraping navigations
+"""
+
+import asyncio
+import io
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from resource_blocker import ResourceBlocker, _parse_list, install_resource_blocking
+
+
+def make_config(**overrides):
+    class StandInConfig:
+        BLOCK_RESOURCES = True
+        BLOCKED_RESOURCE_TYPES = 'font, media,IMAGE,'
+        BLOCKED_HOSTS = 'tracker.example'
+        HARVEST_BROWSER_IMAGES = False
+
+    for name, value in overrides.items():
+        setattr(StandInConfig, name, value)
+    return StandInConfig
+
+
+class StandInRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class StandInRoute:
+    def __init__(self, resource_type, url):
+        self.request = StandInRequest(resource_type, url)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = 'abort'
+
+    async def continue_(self):
+        self.outcome = 'continue'
+
+
+def test_parse_list():
+    """Comma-separated settings are trimmed, lowercased and empty items dropped"""
+    assert _parse_list('font, media,IMAGE,') == ['font', 'media', 'image']
+    assert _parse_list('') == []
+    assert _parse_list(None) == []
+
+
+def test_block_reason():
+    """Documents always load; blocked types and third-party hosts (with subdomains) are stopped"""
+    blocker = ResourceBlocker.from_config(make_config())
+
+    assert blocker.block_reason('document', 'https://www.google-analytics.com/') is None
+    assert blocker.block_reason('font', 'https://onenewbite.com/a.woff2') == 'font'
+    assert blocker.block_reason('image', 'https://cdn.example/a.png') == 'image'
+    assert blocker.block_reason('script', 'https://www.googletagmanager.com/gtm.js') == 'third-party'
+    assert blocker.block_reason('xhr', 'https://api.tracker.example/t') == 'third-party'
+    assert blocker.block_reason('xhr', 'https://nottracker.example/t') is None
+    assert blocker.block_reason('script', 'https://onenewbite.com/app.js') is None
+
+
+def test_harvesting_images_keeps_them_loading():
+    """HARVEST_BROWSER_IMAGES removes 'image' from the blocked types"""
+    blocker = ResourceBlocker.from_config(make_config(HARVEST_BROWSER_IMAGES=True))
+
+    assert blocker.block_reason('image', 'https://cdn.example/a.png') is None
+    assert blocker.block_reason('font', 'https://cdn.example/a.woff') == 'font'
+
+
+def test_route_handler_counts_requests():
+    """The route handler aborts or continues each request and keeps per-reason counts"""
+    blocker = ResourceBlocker.from_config(make_config())
+    routes = [StandInRoute('font', 'https://a.test/f.woff'),
+              StandInRoute('image', 'https://a.test/i.png'),
+              StandInRoute('image', 'https://a.test/j.png'),
+              StandInRoute('document', 'https://a.test/posts/1')]
+
+    async def scenario():
+        for route in routes:
+            await blocker._handle_route(route)
+
+    asyncio.run(scenario())
+
+    assert [route.outcome for route in routes] == ['abort', 'abort', 'abort', 'continue']
+    assert blocker.blocked_by_reason == {'font': 1, 'image': 2}
+    assert blocker.blocked_requests == 3
+    assert blocker.allowed_requests == 1
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        blocker.report()
+    report = output.getvalue()
+    # 字节数只来自放行的请求，报告中不能写成节省的流量
+    assert '节省 3 个请求' in report
+    assert '放行的请求共下载约 0.0 KB（不含被拦截请求的大小）' in report
+
+
+def test_disabled_blocking_installs_nothing():
+    """BLOCK_RESOURCES=False leaves the page untouched"""
+    assert asyncio.run(install_resource_blocking(object(), make_config(BLOCK_RESOURCES=False))) is None
+
+
+if __name__ == "__main__":
+    test_parse_list()
+    test_block_reason()
+    test_harvesting_images_keeps_them_loading()
+    test_route_handler_counts_requests()
+    test_disabled_blocking_installs_nothing()
+    print("✅ Resource blocker tests passed")
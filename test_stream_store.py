@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the NDJSON thread store
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from stream_store import (
+    export_json, iter_records, load_thread, open_thread, save_thread_data, thread_file_in
+)
+
+
+def make_output_data():
+    comments = [
+        {'id': '1', 'author': 'Alice', 'text': '<p>一</p>', 'replies': [
+            {'id': '2', 'author': 'Bob', 'text': '<p>二</p>', 'replies': [
+                {'id': '3', 'author': 'Carol', 'text': '<p>三</p>', 'replies': []}
+            ]},
+            {'id': '4', 'author': 'Dan', 'text': '<p>四</p>', 'replies': []}
+        ]},
+        {'id': '5', 'author': 'Eve', 'text': '<p>五</p>', 'replies': []}
+    ]
+    return {
+        'url': 'https://example.com/posts/1',
+        'scraped_at': '2024-01-01T00:00:00',
+        'post': {'title': '标题', 'content': '<p>正文</p>'},
+        'total_comments': 2,
+        'comments': comments
+    }
+
+
+def test_ndjson_round_trip_and_export():
+    """One record per comment with parent links; readers rebuild the same tree and data.json"""
+    output_data = make_output_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        ndjson_path = save_thread_data(Path(tmp), output_data, 'ndjson')
+        assert ndjson_path.name == 'data.ndjson'
+        assert thread_file_in(Path(tmp)) == ndjson_path
+
+        records = list(iter_records(ndjson_path))
+        assert records[0]['type'] == 'post' and 'comments' not in records[0]
+        assert [(r['index'], r['parent'], r['depth']) for r in records[1:]] == [
+            (0, None, 0), (1, 0, 1), (2, 1, 2), (3, 0, 1), (4, None, 0)
+        ]
+
+        assert load_thread(ndjson_path) == output_data
+        header, comments = open_thread(ndjson_path)
+        assert header['total_comments'] == 2
+        assert [comment['id'] for comment in comments] == ['1', '5']
+
+        json_path = export_json(ndjson_path)
+        assert json.loads(json_path.read_text(encoding='utf-8')) == output_data
+
+
+def test_json_format_is_unchanged():
+    """The default format still writes an indented data.json"""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = save_thread_data(Path(tmp), make_output_data(), 'json')
+        assert json_path.name == 'data.json'
+        assert json_path.read_text(encoding='utf-8').startswith('{\n  "url"')
+        assert not (Path(tmp) / 'data.ndjson').exists()
+
+
+if __name__ == "__main__":
+    test_ndjson_round_trip_and_export()
+    test_json_format_is_unchanged()
+    print("✅ Stream store tests passed")
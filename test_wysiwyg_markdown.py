@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the Mighty wysiwyg HTML -> Markdown converter
+Each fixture is checked against markdownify, which the converter replaces
+"""
+
+import sys
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from markdownify import markdownify as md
+
+from wysiwyg_markdown import _WysiwygParser, UnsupportedMarkup, wysiwyg_to_markdown
+
+
+# Fragments in the shape Mighty's fr-view / mighty-wysiwyg-content editor produces
+FIXTURES = [
+    '<div class="fr-view mighty-wysiwyg-content"><p>今天读完了 <strong>《原则》</strong>，最大的收获是：</p>'
+    '<ol><li>极度求真</li><li>极度透明 <em>（很难）</em></li></ol>'
+    '<p><a class="navigate mighty-hashtag" href="https://onenewbite.com/spaces/1/hashtags/reading">#读书</a></p></div>',
+    '<p><a class="mighty-mention" href="https://onenewbite.com/members/42">@Alice</a>&nbsp;同意你的看法<br>补充一点：</p>'
+    '<ul><li>第一点</li><li>第二点<ul><li>细节 a_b</li></ul></li></ul><p>最后</p>',
+    '<p>配图如下</p><p><img src="https://cdn.mightynetworks.com/images/a.png" alt="截图" title="说明 &quot;1&quot;"></p>',
+    '<p>链接：<a href="https://example.com/path_with_underscore">https://example.com/path_with_underscore</a> '
+    '和 <a href="https://example.com" title="标题">文字 </a>结尾 5 * 3</p>',
+    '<div>\n  <p>  多余的\n   空白  </p>\n  <p><b> 粗体 </b><i></i><span>span 内容</span></p>\n</div>',
+    '<ol start="3"><li><p>带段落的列表项</p></li><li></li></ol>纯文本结尾',
+]
+
+
+def test_fixtures_match_markdownify():
+    """Every fixture is converted by the fast path and matches markdownify exactly"""
+    for html in FIXTURES:
+        parser = _WysiwygParser(set())
+        parser.feed(html)
+        assert parser.finish() == md(html, heading_style="ATX", bullets="-"), html
+        assert wysiwyg_to_markdown(html) == md(html, heading_style="ATX", bullets="-")
+
+
+def test_strip_option_matches_markdownify():
+    """Stripped tags keep only their content, as with markdownify's strip option"""
+    for html in FIXTURES:
+        assert wysiwyg_to_markdown(html, strip=['div', 'span']) == md(
+            html, heading_style="ATX", bullets="-", strip=['div', 'span']
+        )
+
+
+def test_unknown_markup_falls_back_to_markdownify():
+    """Tags outside the wysiwyg subset and malformed nesting are converted by markdownify"""
+    for html in ('<h2>标题</h2><blockquote>引用 <code>x</code></blockquote>',
+                 '<p>未闭合的<b>粗体</p>',
+                 '<p>注释<!-- hidden --></p>'):
+        parser = _WysiwygParser(set())
+        try:
+            parser.feed(html)
+            parser.finish()
+            assert False, f"expected fallback for {html}"
+        except UnsupportedMarkup:
+            pass
+        assert wysiwyg_to_markdown(html) == md(html, heading_style="ATX", bullets="-")
+
+
+if __name__ == "__main__":
+    test_fixtures_match_markdownify()
+    test_strip_option_matches_markdownify()
+    test_unknown_markup_falls_back_to_markdownify()
+    print("✅ Wysiwyg markdown tests passed")